@@ -0,0 +1,171 @@
+"""
+Answer Cache
+
+This module provides an in-memory cache of generated chatbot answers, consulted before
+calling the language model. An exact tier matches the normalized question together with a
+hash of the context it was answered from; a semantic tier matches a new question against
+previous ones by the cosine similarity of their query embeddings. Entries are evicted by
+least-recent use and age, and the whole cache is dropped when the menu index changes.
+Hit rates and the generation time saved are tracked for monitoring.
+"""
+
+import os
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from dotenv import load_dotenv
+from summary_cache import normalize_key_part
+
+# Load environment variables
+load_dotenv()
+
+ANSWER_CACHE_SIZE = int(os.getenv("answer_cache_size", 1024))
+ANSWER_CACHE_TTL = float(os.getenv("answer_cache_ttl", 3600))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("answer_cache_threshold", 0.95))
+
+def context_hash(context):
+    """
+    Compute a content hash of a retrieved context.
+
+    Parameters:
+        context (str): The context the answer is generated from.
+
+    Returns:
+        str: Hex digest of the context.
+    """
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    """
+    Thread-safe LRU cache of answers with exact and semantic lookup.
+
+    Parameters:
+        max_entries (int): Maximum number of cached answers. Default is ANSWER_CACHE_SIZE.
+        ttl (float): Seconds after which an answer is considered stale. None disables expiry.
+        threshold (float): Minimum cosine similarity between query embeddings for a
+                           semantic hit. Default is ANSWER_CACHE_THRESHOLD.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.time() - entry["created_at"] > self.ttl
+
+    def set_version(self, version):
+        """
+        Record the version of the menu index answers are generated from, dropping every
+        cached answer if it changed.
+
+        Parameters:
+            version (str): Identifier of the current index, e.g. the documents hash.
+        """
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def get(self, query, context, query_vec=None):
+        """
+        Look up a cached answer, trying the exact tier first and then the semantic tier.
+
+        Parameters:
+            query (str): The user question.
+            context (str): The context retrieved for the question.
+            query_vec (numpy.ndarray, optional): Normalized embedding of the question. The
+                                                 semantic tier is skipped if omitted.
+
+        Returns:
+            str or None: The cached answer, or None on a miss.
+        """
+        key = (normalize_key_part(query), context_hash(context))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                self._stats["saved_seconds"] += entry["seconds"]
+                return entry["answer"]
+            if query_vec is not None:
+                candidates = [(k, e) for k, e in self._entries.items()
+                              if e["vector"] is not None and not self._expired(e)]
+                if candidates:
+                    vectors = np.vstack([e["vector"] for _, e in candidates])
+                    similarities = vectors @ np.asarray(query_vec, dtype=np.float32).ravel()
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.threshold:
+                        key, entry = candidates[best]
+                        self._entries.move_to_end(key)
+                        self._stats["semantic_hits"] += 1
+                        self._stats["saved_seconds"] += entry["seconds"]
+                        return entry["answer"]
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, query, context, answer, seconds, query_vec=None):
+        """
+        Store a generated answer, evicting the least recently used one if the cache is full.
+
+        Parameters:
+            query (str): The user question.
+            context (str): The context the answer was generated from.
+            answer (str): The generated answer.
+            seconds (float): Time taken to generate the answer, credited on later hits.
+            query_vec (numpy.ndarray, optional): Normalized embedding of the question, making
+                                                 the answer available to the semantic tier.
+        """
+        key = (normalize_key_part(query), context_hash(context))
+        vector = None if query_vec is None else np.asarray(query_vec, dtype=np.float32).ravel()
+        with self._lock:
+            self._entries[key] = {"answer": answer, "seconds": seconds, "vector": vector,
+                                  "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove every cached answer, keeping the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Report the cache effectiveness.
+
+        Returns:
+            dict: "exact_hits", "semantic_hits", "misses", "hit_rate" (hits over lookups),
+                  "saved_seconds" (generation time avoided by hits) and current "entries".
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        return stats
+
+_default_cache = None
+
+def get_default_cache():
+    """
+    Return the process-wide answer cache, creating it on first use.
+
+    Returns:
+        AnswerCache: The shared cache instance.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AnswerCache()
+    return _default_cache
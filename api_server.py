@@ -0,0 +1,491 @@
+"""
+Chatbot HTTP API
+
+This module serves the chatbot over an async HTTP API (aiohttp), as a headless alternative
+to the Streamlit app that other services can call and that can be load-balanced:
+
+- POST /query with {"query": ..., "session_id": ...} returns the answer as JSON.
+- POST /query/stream returns the answer as a stream of plain text chunks.
+- POST /reindex brings the index up to date with the menu folder and swaps it in.
+- GET /health describes the served index; GET /metrics returns the telemetry (see
+  telemetry.py) in the Prometheus text format.
+
+The documents and indexes are loaded once per process into an immutable snapshot that all
+requests share read-only. Concurrent retrievals are coalesced into batches by a
+MicroBatcher, blocking work runs on a thread pool, and conversation history is kept per
+session ID in a bounded store, together with the entities of the recent turns that
+follow-up queries are rewritten with before retrieval (see query_rewriter.py). A reindex
+builds a new snapshot next to the served one and then replaces the reference, so there is
+no downtime: requests in flight finish on the snapshot they started with. Each snapshot
+has its own answer cache, so answers from the old and the new documents never mix and a
+reindex does not empty the cache under requests still finishing on the old snapshot. It
+also has a private copy of the structured menu store (menu_store.py), so structured answers
+come from the same menus as its retrieval.
+
+Usage:
+    python api_server.py --port 8080 --prebuilt
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import weakref
+import asyncio
+import tempfile
+import argparse
+import threading
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from dotenv import load_dotenv
+from rag import (load_data_from_json, build_faiss, build_lexical, load_metadata, load_prebuilt, embed_queries,
+                 retrieve_batch, cached_query_llama, cached_stream_llama, get_generator, get_query_embedder,
+                 RETRIEVAL_K)
+from index_store import documents_hash
+from answer_cache import AnswerCache
+from menu_store import answer_structured, restaurant_names, MENU_DB_PATH
+from query_rewriter import Conversation, EntityVocabulary
+from context_budget import assemble_context, CONTEXT_TOKEN_BUDGET
+from micro_batcher import MicroBatcher
+from generation import GeneratorBusy
+from telemetry import get_telemetry
+
+# Load environment variables
+load_dotenv()
+
+API_HOST = os.getenv("api_host", "127.0.0.1")
+API_PORT = int(os.getenv("api_port", 8080))
+API_WORKERS = int(os.getenv("api_workers", 8))
+MAX_SESSIONS = int(os.getenv("api_max_sessions", 10000))
+SESSION_TURNS = int(os.getenv("api_session_turns", 10))
+SESSION_TTL = float(os.getenv("api_session_ttl", 3600))
+MAX_QUERY_CHARS = 1000
+
+class SessionStore:
+    """
+    Thread-safe, bounded store of conversation histories and states keyed by session ID.
+
+    Sessions are evicted by least-recent use and idle time, and only the most recent turns
+    of each are kept, so memory stays bounded however many clients connect.
+
+    Parameters:
+        max_sessions (int): Maximum number of sessions kept. Default is the api_max_sessions setting.
+        max_turns (int): Maximum number of (query, response) turns kept per session.
+        ttl (float): Seconds of inactivity after which a session is dropped. None disables expiry.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, max_turns=SESSION_TURNS, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, session_id):
+        """
+        Return a live session, dropping it if it expired. The lock must be held.
+        """
+        session = self._sessions.get(session_id)
+        if session is not None and self.ttl is not None and time.monotonic() - session["updated"] > self.ttl:
+            del self._sessions[session_id]
+            return None
+        return session
+
+    def history(self, session_id):
+        """
+        Return a copy of a session's history, empty for new or expired sessions.
+        """
+        with self._lock:
+            session = self._get(session_id)
+            return list(session["history"]) if session is not None else []
+
+    def conversation(self, session_id):
+        """
+        Return a copy of the entities in focus of a session, a new Conversation for new or
+        expired sessions. Store the updated copy back with append once the turn is answered.
+        """
+        with self._lock:
+            session = self._get(session_id)
+            return session["conversation"].copy() if session is not None else Conversation()
+
+    def append(self, session_id, query, response, conversation=None):
+        """
+        Add a (query, response) turn to a session, creating it if needed.
+
+        Parameters:
+            session_id (str): The session.
+            query (str): The user's query.
+            response (str): The answer.
+            conversation (Conversation, optional): The session's state after the turn, if
+                                                   it was obtained from conversation.
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or {"history": [], "conversation": Conversation()}
+            session["history"] = (session["history"] + [(query, response)])[-self.max_turns:]
+            if conversation is not None:
+                session["conversation"] = conversation
+            session["updated"] = time.monotonic()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def clear(self, session_id):
+        """
+        Forget a session.
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+class IndexSnapshot:
+    """
+    Documents and indexes served together, never modified once built.
+
+    Parameters:
+        documents (list): The document strings.
+        index (faiss.Index): The FAISS index over the documents.
+        lexical (BM25Index): The BM25 index over the documents.
+        metadata (list): Metadata dict for each document.
+        answers (AnswerCache, optional): Cache of the answers generated from these documents.
+                                         A new, empty cache by default.
+        menu_db (str, optional): Private copy of the structured menu store made with
+                                 copy_menu_store, removed along with the snapshot. Without
+                                 it, every query goes to retrieval.
+    """
+
+    def __init__(self, documents, index, lexical, metadata, answers=None, menu_db=None):
+        self.documents = documents
+        self.index = index
+        self.lexical = lexical
+        self.metadata = metadata
+        self.vocabulary = EntityVocabulary(documents)
+        self.version = documents_hash(documents)
+        self.answers = answers if answers is not None else AnswerCache()
+        self.menu_db = menu_db
+        self.menu_names = restaurant_names(menu_db) if menu_db else []
+        if menu_db:
+            weakref.finalize(self, os.remove, menu_db)
+        self.loaded_at = time.time()
+
+def copy_menu_store(path=MENU_DB_PATH):
+    """
+    Copy the structured menu store to a temporary file, so a snapshot keeps answering from
+    the menus it was loaded with while a reindex rewrites the store.
+
+    Parameters:
+        path (str): Path of the SQLite menu store. Defaults to MENU_DB_PATH.
+
+    Returns:
+        str or None: Path of the copy, or None if there is no menu store.
+    """
+    if not os.path.exists(path):
+        return None
+    fd, copy = tempfile.mkstemp(prefix="menu_snapshot_", suffix=".db")
+    os.close(fd)
+    source, target = sqlite3.connect(path), sqlite3.connect(copy)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    return copy
+
+def load_snapshot(prebuilt=False):
+    """
+    Load the documents and indexes, as app.py does at start-up, with a copy of the
+    structured menu store.
+
+    Parameters:
+        prebuilt (bool): Use the index store as it is, without checking the menu folder
+                         for changes, if it holds a complete index.
+
+    Returns:
+        IndexSnapshot: The loaded snapshot.
+    """
+    loaded = load_prebuilt() if prebuilt else None
+    if loaded is None:
+        documents = load_data_from_json()
+        index, _, _ = build_faiss(documents)
+        loaded = documents, index, build_lexical(documents), load_metadata(documents)
+    return IndexSnapshot(*loaded, menu_db=copy_menu_store())
+
+def build_contexts(items):
+    """
+    Build the answer contexts of a batch of queries, as rag.build_context does for one.
+
+    Queries are embedded together, and those not answered by the structured menu store are
+    retrieved together with retrieve_batch.
+
+    Parameters:
+        items (list): (IndexSnapshot, query) pairs.
+
+    Returns:
+        list: For each item, a (context, query embedding of shape (1, dimension)) pair.
+    """
+    embedder = get_query_embedder()
+    count_tokens = get_generator().count_tokens
+    results = [None] * len(items)
+    groups = {}
+    for position, (snapshot, _) in enumerate(items):
+        groups.setdefault(id(snapshot), (snapshot, []))[1].append(position)
+    for snapshot, positions in groups.values():
+        queries = [items[position][1] for position in positions]
+        query_vecs = embed_queries(queries, embedder)
+        pending = []
+        for i, (position, query) in enumerate(zip(positions, queries)):
+            structured = answer_structured(query, snapshot.menu_names, snapshot.menu_db) if snapshot.menu_db else None
+            if structured is not None:
+                results[position] = (structured, query_vecs[i:i + 1])
+            else:
+                pending.append(i)
+        if not pending:
+            continue
+        retrieved = retrieve_batch([queries[i] for i in pending], snapshot.index, embedder, snapshot.documents,
+                                   k=RETRIEVAL_K, metadata=snapshot.metadata, lexical=snapshot.lexical,
+                                   query_vecs=query_vecs[pending])
+        for i, documents in zip(pending, retrieved):
+            results[positions[i]] = (assemble_context(documents, CONTEXT_TOKEN_BUDGET, count_tokens),
+                                     query_vecs[i:i + 1])
+    return results
+
+class ChatService:
+    """
+    The chatbot behind the API: the served snapshot, sessions and worker threads.
+
+    Parameters:
+        prebuilt (bool): Start from the prebuilt index store (see load_snapshot).
+        workers (int): Threads running retrieval and generation. Default is the api_workers setting.
+        sessions (SessionStore, optional): Store of conversation histories.
+        max_batch_size (int): Maximum number of queries retrieved together. Default is 64.
+        max_wait_ms (float): Milliseconds a query waits for others to share its batch. Default is 5.
+    """
+
+    def __init__(self, prebuilt=False, workers=API_WORKERS, sessions=None, max_batch_size=64, max_wait_ms=5):
+        self.prebuilt = prebuilt
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.sessions = sessions if sessions is not None else SessionStore()
+        self.batcher = MicroBatcher(build_contexts, max_batch_size, max_wait_ms, executor=self.executor)
+        self.snapshot = None
+        self.reindexing = False
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking function on the worker threads.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def start(self):
+        """
+        Load the snapshot, the query embedder and the answer model before serving.
+        """
+        self.snapshot = await self.run(load_snapshot, self.prebuilt)
+        await self.run(get_query_embedder)
+        await self.run(get_generator)
+
+    async def close(self):
+        """
+        Stop the batcher and the worker threads.
+        """
+        await self.batcher.close()
+        self.executor.shutdown(wait=False)
+
+    async def context(self, query, conversation=None):
+        """
+        Build the context of a query on the currently served snapshot.
+
+        Parameters:
+            query (str): The user's query.
+            conversation (Conversation, optional): The session's state, to retrieve with a
+                                                   follow-up rewritten into a standalone query.
+
+        Returns:
+            tuple: (IndexSnapshot, context, query embedding, rewrite as returned by
+                   Conversation.rewrite, or None without a conversation).
+        """
+        snapshot = self.snapshot
+        rewrite = conversation.rewrite(query, snapshot.vocabulary) if conversation is not None else None
+        context, query_vec = await self.batcher.submit((snapshot, rewrite["query"] if rewrite else query))
+        return snapshot, context, query_vec, rewrite
+
+    async def answer(self, session_id, query):
+        """
+        Answer a query in a session.
+
+        Parameters:
+            session_id (str): The session the query belongs to.
+            query (str): The user's query.
+
+        Returns:
+            str: The answer.
+        """
+        history = self.sessions.history(session_id)
+        conversation = self.sessions.conversation(session_id)
+        snapshot, context, query_vec, rewrite = await self.context(query, conversation)
+        response, _ = await self.run(cached_query_llama, context, query, history, query_vec=query_vec,
+                                     cache=snapshot.answers, version=snapshot.version)
+        conversation.add(rewrite)
+        self.sessions.append(session_id, query, response, conversation)
+        return response
+
+    async def stream(self, session_id, query):
+        """
+        Answer a query in a session as a stream of text chunks.
+
+        The turn is added to the session only if the stream completes.
+
+        Yields:
+            str: Successive chunks of the answer.
+        """
+        history = self.sessions.history(session_id)
+        conversation = self.sessions.conversation(session_id)
+        turns = len(history)
+        snapshot, context, query_vec, rewrite = await self.context(query, conversation)
+        chunks = cached_stream_llama(context, query, history, query_vec=query_vec, cache=snapshot.answers,
+                                     version=snapshot.version)
+        done = object()
+        try:
+            while True:
+                chunk = await self.run(next, chunks, done)
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            try:
+                chunks.close()
+            except ValueError:
+                # Still running on a worker after a cancelled request; it is dropped afterwards
+                pass
+        if len(history) > turns:
+            conversation.add(rewrite)
+            self.sessions.append(session_id, query, history[-1][1], conversation)
+
+    async def reindex(self):
+        """
+        Bring the index up to date with the menu folder and serve it once it is loaded.
+
+        The new snapshot keeps the answer cache of the served one if the documents did not change.
+
+        Returns:
+            IndexSnapshot or None: The new snapshot, or None if a reindex is already running.
+        """
+        if self.reindexing:
+            return None
+        self.reindexing = True
+        try:
+            snapshot = await self.run(load_snapshot)
+            if self.snapshot is not None and snapshot.version == self.snapshot.version:
+                snapshot.answers = self.snapshot.answers
+            self.snapshot = snapshot
+        finally:
+            self.reindexing = False
+        return self.snapshot
+
+async def read_query(request):
+    """
+    Read and validate the JSON body of a query request.
+
+    Returns:
+        tuple: (session ID, lowercased query). A new session ID is created if none is given.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Body must be a JSON object")
+    query = str(body.get("query") or "").strip().lower()
+    if not query or len(query) > MAX_QUERY_CHARS:
+        raise web.HTTPBadRequest(text=f"query must be 1 to {MAX_QUERY_CHARS} characters")
+    return str(body.get("session_id") or uuid.uuid4().hex), query
+
+def create_app(service):
+    """
+    Create the aiohttp application serving a ChatService.
+
+    Parameters:
+        service (ChatService): The chatbot to serve; started and closed with the application.
+
+    Returns:
+        aiohttp.web.Application: The application.
+    """
+    routes = web.RouteTableDef()
+
+    @routes.post("/query")
+    async def query(request):
+        session_id, query = await read_query(request)
+        start = time.perf_counter()
+        try:
+            answer = await service.answer(session_id, query)
+        except GeneratorBusy as e:
+            return web.json_response({"error": str(e)}, status=503)
+        return web.json_response({"session_id": session_id, "answer": answer,
+                                  "seconds": round(time.perf_counter() - start, 4)})
+
+    @routes.post("/query/stream")
+    async def query_stream(request):
+        session_id, query = await read_query(request)
+        chunks = service.stream(session_id, query)
+        # Wait for the first chunk, so a busy model still gets a proper error status
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except GeneratorBusy as e:
+            return web.json_response({"error": str(e)}, status=503)
+        response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8",
+                                               "X-Session-Id": session_id})
+        try:
+            await response.prepare(request)
+            await response.write(first.encode("utf-8"))
+            async for chunk in chunks:
+                await response.write(chunk.encode("utf-8"))
+            await response.write_eof()
+        finally:
+            await chunks.aclose()
+        return response
+
+    @routes.post("/reindex")
+    async def reindex(request):
+        start = time.perf_counter()
+        snapshot = await service.reindex()
+        if snapshot is None:
+            return web.json_response({"error": "A reindex is already running"}, status=409)
+        return web.json_response({"documents": len(snapshot.documents), "version": snapshot.version,
+                                  "seconds": round(time.perf_counter() - start, 3)})
+
+    @routes.get("/health")
+    async def health(request):
+        snapshot = service.snapshot
+        return web.json_response({"status": "ok", "documents": len(snapshot.documents),
+                                  "version": snapshot.version, "loaded_at": snapshot.loaded_at,
+                                  "sessions": len(service.sessions), "reindexing": service.reindexing})
+
+    @routes.get("/metrics")
+    async def metrics(request):
+        return web.Response(text=get_telemetry().prometheus_text(), content_type="text/plain")
+
+    app = web.Application()
+    app.add_routes(routes)
+
+    async def on_startup(app):
+        await service.start()
+
+    async def on_cleanup(app):
+        await service.close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the restaurant menu chatbot over HTTP.")
+    parser.add_argument("--host", default=API_HOST, help="interface to listen on")
+    parser.add_argument("--port", type=int, default=API_PORT, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="threads for retrieval and generation")
+    parser.add_argument("--prebuilt", action="store_true", help="start from the prebuilt index store as it is")
+    args = parser.parse_args()
+    web.run_app(create_app(ChatService(args.prebuilt, args.workers)), host=args.host, port=args.port)
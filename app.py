@@ -1,25 +1,64 @@
 import os
+import sys
+import time
 os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 
-import torch
-torch.classes.__path__ = []
-
+script_start = time.perf_counter()
 import streamlit as st
-from chatbot import load_data_from_json, build_faiss, retrieve, query_llama
-from llama_cpp import Llama
+from rag import (load_data_from_json, build_faiss, build_lexical, build_context, load_metadata, embed_query,
+                 cached_stream_llama, get_answer_cache, get_generator, get_query_embedder, load_prebuilt)
+from index_store import documents_hash
+from query_rewriter import Conversation, EntityVocabulary
+from telemetry import get_telemetry, TELEMETRY_PORT
+imports_done = time.perf_counter()
+
+# "prebuilt" starts from the artifacts in index_store/ as they are, without checking the menus
+STARTUP_MODE = os.getenv("startup_mode", "build")
 
 # Streamlit page config
 st.set_page_config(page_title="🍽️ Restaurant Menu Chatbot", layout="wide")
 
+def patch_torch_classes():
+    # Streamlit's file watcher fails on torch.classes; torch is only imported with the embedder
+    if "torch" in sys.modules:
+        sys.modules["torch"].classes.__path__ = []
+
+# Start-up timings, recorded once per process on the first run of the script
+@st.cache_resource
+def startup_report():
+    return {"imports_seconds": imports_done - script_start}
+
+report = startup_report()
+
+# Prometheus metrics endpoint, started once per process when telemetry and telemetry_port are set
+@st.cache_resource
+def metrics_server():
+    telemetry = get_telemetry()
+    return telemetry.serve(TELEMETRY_PORT) if telemetry.enabled and TELEMETRY_PORT else None
+
+metrics_server()
+
 # Initialize chatbot model and FAISS
 @st.cache_resource(show_spinner="Loading model and data...")
 def init_bot():
-    docs = load_data_from_json()
-    index, embeddings, embedder = build_faiss(docs)
-    return docs, index, embedder
+    start = time.perf_counter()
+    prebuilt = load_prebuilt() if STARTUP_MODE == "prebuilt" else None
+    if prebuilt is not None:
+        docs, index, lexical, metadata = prebuilt
+    else:
+        docs = load_data_from_json()
+        index, embeddings, embedder = build_faiss(docs)
+        lexical = build_lexical(docs)
+        metadata = load_metadata(docs)
+    # Load the answer model now, so a local model is warm before the first question
+    get_generator()
+    vocabulary = EntityVocabulary(docs)
+    report["init_seconds"] = time.perf_counter() - start
+    return docs, index, lexical, metadata, documents_hash(docs), vocabulary
 
-docs, index, embedder = init_bot()
+docs, index, lexical, metadata, version, vocabulary = init_bot()
+patch_torch_classes()
 
 # Streamlit UI
 st.title("🍽️ Restaurant Menu Chatbot")
@@ -28,25 +67,66 @@ st.write("Ask a question about the restaurant menus:")
 # History as list of (query, response) to preserve order
 if "history" not in st.session_state:
     st.session_state.history = []
+# Restaurant, category and item of the recent turns, to make follow-ups standalone
+if "conversation" not in st.session_state:
+    st.session_state.conversation = Conversation()
 
 # User input
 query_input = st.text_input("Type your query", value="", key="user_input")
 
 # Handle query
 if st.button("Ask") and query_input.strip():
+    query_start = time.perf_counter()
     query = query_input.strip().lower()
-    recent_history = st.session_state.history[-2:]  # last 2 query-response pairs
-    history_string = "\n".join([f"Query: {q}" for q, r in recent_history])
-    context = "\n".join(retrieve(query+" "+history_string, index, embedder, docs))
-    response, history = query_llama(context, query, st.session_state.history)
-    st.session_state.history = history
+    # Loaded on the first question when starting from prebuilt artifacts
+    embedder = get_query_embedder()
+    patch_torch_classes()
+    # Retrieve with the follow-up resolved into a standalone query, e.g. "where is it" -> "where is kfc"
+    rewrite = st.session_state.conversation.rewrite(query, vocabulary)
+    query_vec = embed_query(rewrite["query"], embedder)
+    context = build_context(rewrite["query"], docs, index, embedder, metadata=metadata, lexical=lexical,
+                            query_vec=query_vec)
+    # Render tokens as they arrive; the history is only extended once the stream completes
+    stats = {}
+    st.subheader("🤖 Bot Response")
+    response = st.write_stream(cached_stream_llama(context, query, st.session_state.history,
+                                                   query_vec=query_vec, version=version, stats=stats))
+    st.session_state.conversation.add(rewrite)
     st.session_state.last_response = response
+    st.session_state.last_stats = dict(stats, search_query=rewrite["query"] if rewrite["rewritten"] else None)
+    if "first_answer_seconds" not in report:
+        report["first_answer_seconds"] = time.perf_counter() - query_start
 
 # Display last response
-if "last_response" in st.session_state:
+elif "last_response" in st.session_state:
     st.subheader("🤖 Bot Response")
     st.markdown(st.session_state.last_response)
 
+# Response timings
+if "last_stats" in st.session_state and st.session_state.last_stats.get("total_seconds") is not None:
+    stats = st.session_state.last_stats
+    source = "answer cache" if stats.get("cached") else "model"
+    st.caption(f"First token after {stats['ttft_seconds']:.2f}s, full answer after "
+               f"{stats['total_seconds']:.2f}s ({source})")
+    if stats.get("search_query"):
+        st.caption(f"Searched for: {stats['search_query']}")
+
+# Answer cache metrics
+cache_stats = get_answer_cache().stats()
+st.sidebar.subheader("⚡ Answer Cache")
+st.sidebar.metric("Hit rate", f"{cache_stats['hit_rate']:.0%}")
+st.sidebar.metric("Generation time saved", f"{cache_stats['saved_seconds']:.1f}s")
+st.sidebar.caption(f"{cache_stats['exact_hits']} exact, {cache_stats['semantic_hits']} semantic hits, "
+                   f"{cache_stats['misses']} misses")
+
+# Start-up report
+with st.sidebar.expander("⏱️ Start-up"):
+    st.caption(f"Mode: {STARTUP_MODE}")
+    st.caption(f"Imports: {report['imports_seconds']:.2f}s")
+    st.caption(f"Data and index loading: {report.get('init_seconds', 0):.2f}s")
+    if "first_answer_seconds" in report:
+        st.caption(f"First answer (including lazy model loading): {report['first_answer_seconds']:.2f}s")
+
 # Show chat history
 if st.session_state.history:
     with st.expander("📜 Chat History"):
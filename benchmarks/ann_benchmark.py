@@ -0,0 +1,126 @@
+"""
+Approximate Nearest Neighbour Benchmark
+
+Measures recall@k and per-query latency of the index types offered by rag.make_index
+(IVF-Flat, IVF-PQ, HNSW) against the exact flat index, on a synthetic clustered corpus
+shaped like MiniLM document embeddings. Also reports build time and index size.
+
+Usage:
+    python -m benchmarks.ann_benchmark --docs 1000000 --queries 1000 --metric cosine
+"""
+
+import json
+import time
+import argparse
+import numpy as np
+import faiss
+from rag import create_index, prepare_vectors, search_params
+
+def synthetic_corpus(n_docs, n_queries, dim=384, n_clusters=1000, seed=0):
+    """
+    Generate clustered document and query vectors.
+
+    Real menu embeddings are far from uniform (items of a restaurant or category sit close
+    together), so documents are drawn around random cluster centres, and queries are
+    perturbed copies of random documents.
+
+    Parameters:
+        n_docs (int): Number of document vectors.
+        n_queries (int): Number of query vectors.
+        dim (int): Vector dimension. Default is 384, as for all-MiniLM-L6-v2.
+        n_clusters (int): Number of cluster centres.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        tuple: (documents, queries) as float32 arrays.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim), dtype=np.float32)
+    documents = np.empty((n_docs, dim), dtype=np.float32)
+    for start in range(0, n_docs, 100000):
+        end = min(n_docs, start + 100000)
+        labels = rng.integers(0, n_clusters, end - start)
+        documents[start:end] = centres[labels] + 0.5 * rng.standard_normal((end - start, dim), dtype=np.float32)
+    picks = rng.integers(0, n_docs, n_queries)
+    queries = documents[picks] + 0.3 * rng.standard_normal((n_queries, dim), dtype=np.float32)
+    return documents, queries
+
+def timed_search(index, queries, k, **kwargs):
+    """
+    Search one query at a time, as the chatbot does, and time it.
+
+    Returns:
+        tuple: (labels, mean latency in milliseconds).
+    """
+    params = search_params(index, **kwargs)
+    labels = np.empty((len(queries), k), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        _, labels[i:i + 1] = index.search(queries[i:i + 1], k, params=params)
+    return labels, (time.perf_counter() - start) * 1000 / len(queries)
+
+def recall_at_k(labels, truth):
+    """
+    Fraction of the true top-k neighbours found in the approximate top-k.
+    """
+    return float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(labels, truth)]))
+
+def run(n_docs, n_queries, k=10, metric="l2", nprobes=(4, 16, 64), ef_searches=(32, 64, 128)):
+    """
+    Benchmark every index type and print one JSON line per configuration.
+
+    Parameters:
+        n_docs (int): Number of document vectors.
+        n_queries (int): Number of queries.
+        k (int): Number of neighbours retrieved. Default is 10.
+        metric (str): "l2" or "cosine".
+        nprobes (tuple): IVF nprobe values to try.
+        ef_searches (tuple): HNSW efSearch values to try.
+
+    Returns:
+        list: One result dict per configuration.
+    """
+    documents, queries = synthetic_corpus(n_docs, n_queries)
+    queries = prepare_vectors(queries, metric)
+    results = []
+
+    def report(kind, build_seconds, index, latency, recall, **knobs):
+        result = {"index": kind, "metric": metric, "docs": n_docs, **knobs,
+                  "recall_at_k": round(recall, 4), "latency_ms": round(latency, 3),
+                  "build_s": round(build_seconds, 1),
+                  "size_mb": round(len(faiss.serialize_index(index)) / 2 ** 20, 1)}
+        results.append(result)
+        print(json.dumps(result))
+
+    start = time.perf_counter()
+    flat = create_index(documents, "flat", metric)
+    build_seconds = time.perf_counter() - start
+    truth, latency = timed_search(flat, queries, k)
+    report("flat", build_seconds, flat, latency, 1.0)
+    del flat
+
+    for kind in ["ivf_flat", "ivf_pq"]:
+        start = time.perf_counter()
+        index = create_index(documents, kind, metric)
+        build_seconds = time.perf_counter() - start
+        for nprobe in nprobes:
+            labels, latency = timed_search(index, queries, k, nprobe=nprobe)
+            report(kind, build_seconds, index, latency, recall_at_k(labels, truth), nprobe=nprobe)
+        del index
+
+    start = time.perf_counter()
+    index = create_index(documents, "hnsw", metric)
+    build_seconds = time.perf_counter() - start
+    for ef_search in ef_searches:
+        labels, latency = timed_search(index, queries, k, ef_search=ef_search)
+        report("hnsw", build_seconds, index, latency, recall_at_k(labels, truth), ef_search=ef_search)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against the flat index.")
+    parser.add_argument("--docs", type=int, default=1000000, help="number of synthetic documents")
+    parser.add_argument("--queries", type=int, default=1000, help="number of queries")
+    parser.add_argument("--k", type=int, default=10, help="neighbours per query")
+    parser.add_argument("--metric", choices=["l2", "cosine"], default="l2")
+    args = parser.parse_args()
+    run(args.docs, args.queries, args.k, args.metric)
@@ -0,0 +1,161 @@
+"""
+Chatbot API Load Test
+
+Starts the HTTP API (api_server.py) in-process on a free local port with the deterministic
+stub LLM, whose latency can be set to mimic a real model, and runs many concurrent
+sessions against it. Each session asks several questions in a row, alternating /query and
+/query/stream, so follow-ups use the per-session history. Optionally a /reindex is sent
+halfway through to check that the index is hot-swapped without failed requests.
+
+Reports latency (p50/p95/p99, and time to first byte of streamed answers), throughput,
+errors and the average retrieval batch size as JSON.
+
+Usage:
+    python -m benchmarks.api_load_benchmark --sessions 64 --turns 4 --first-token-ms 300 --reindex
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the chatbot HTTP API with a stub LLM.")
+    parser.add_argument("--sessions", type=int, default=64, help="concurrent sessions")
+    parser.add_argument("--turns", type=int, default=4, help="questions per session")
+    parser.add_argument("--first-token-ms", type=float, default=300, help="stub LLM time to first token")
+    parser.add_argument("--chunk-ms", type=float, default=20, help="stub LLM time between chunks")
+    parser.add_argument("--workers", type=int, default=32, help="server worker threads")
+    parser.add_argument("--reindex", action="store_true", help="send a /reindex halfway through")
+    parser.add_argument("--output", default=None, help="write the JSON results to this file")
+    return parser.parse_args()
+
+args = parse_args() if __name__ == "__main__" else None
+# The stub backend and its latency are read when the modules are imported
+os.environ["llm_backend"] = "stub"
+os.environ.setdefault("offline_summaries", "true")
+if args is not None:
+    os.environ["stub_first_token_seconds"] = str(args.first_token_ms / 1000)
+    os.environ["stub_seconds_per_chunk"] = str(args.chunk_ms / 1000)
+
+import aiohttp
+from aiohttp import web
+from api_server import ChatService, create_app
+from generation import STUB_FIRST_TOKEN_SECONDS, STUB_SECONDS_PER_CHUNK
+from benchmarks.retrieval_benchmark import synthetic_queries
+from benchmarks.rag_benchmark import percentiles
+
+async def ask(session, base_url, question, session_id, stream):
+    """
+    Send one question and return (session ID, seconds to first byte, total seconds).
+    """
+    start = time.perf_counter()
+    if not stream:
+        async with session.post(f"{base_url}/query", json={"query": question, "session_id": session_id}) as response:
+            response.raise_for_status()
+            body = await response.json()
+            seconds = time.perf_counter() - start
+            return body["session_id"], seconds, seconds
+    async with session.post(f"{base_url}/query/stream", json={"query": question, "session_id": session_id}) as response:
+        response.raise_for_status()
+        first_byte = None
+        async for _ in response.content.iter_any():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+        return response.headers["X-Session-Id"], first_byte, time.perf_counter() - start
+
+async def run_sessions(base_url, questions, n_sessions, turns, reindex):
+    """
+    Run the concurrent sessions, and a reindex halfway if requested.
+
+    Returns:
+        tuple: (latency samples per kind, error messages, reindex response, wall-clock seconds).
+    """
+    samples = {"query": [], "stream": [], "stream_first_byte": []}
+    errors = []
+    reindex_result = {}
+    completed = 0
+    halfway = asyncio.Event()
+
+    async def user(session, i):
+        nonlocal completed
+        session_id = None
+        for turn in range(turns):
+            stream = (i + turn) % 2 == 1
+            question = questions[(i * turns + turn) % len(questions)]
+            try:
+                session_id, first_byte, total = await ask(session, base_url, question, session_id, stream)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            samples["stream" if stream else "query"].append(total)
+            if stream and first_byte is not None:
+                samples["stream_first_byte"].append(first_byte)
+            completed += 1
+            if completed >= n_sessions * turns // 2:
+                halfway.set()
+
+    async def reindex_halfway(session):
+        await halfway.wait()
+        start = time.perf_counter()
+        async with session.post(f"{base_url}/reindex") as response:
+            reindex_result.update(await response.json(), status=response.status,
+                                  request_seconds=round(time.perf_counter() - start, 3))
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=600)) as session:
+        tasks = [user(session, i) for i in range(n_sessions)]
+        if reindex:
+            tasks.append(reindex_halfway(session))
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        seconds = time.perf_counter() - start
+    return samples, errors, reindex_result, seconds
+
+async def run(n_sessions=64, turns=4, workers=32, reindex=False):
+    """
+    Start the API and load test it.
+
+    Parameters:
+        n_sessions (int): Number of concurrent sessions. Default is 64.
+        turns (int): Number of questions per session. Default is 4.
+        workers (int): Server worker threads. Default is 32.
+        reindex (bool): Send a /reindex once half the questions are answered.
+
+    Returns:
+        dict: The results.
+    """
+    service = ChatService(workers=workers)
+    runner = web.AppRunner(create_app(service))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        questions = synthetic_queries(service.snapshot.documents, n_sessions * turns)
+        samples, errors, reindex_result, seconds = await run_sessions(f"http://127.0.0.1:{port}", questions,
+                                                                      n_sessions, turns, reindex)
+    finally:
+        batches, items = service.batcher.batches, service.batcher.items
+        await runner.cleanup()
+    requests = sum(len(samples[kind]) for kind in ("query", "stream"))
+    return {
+        "sessions": n_sessions, "turns": turns, "workers": workers,
+        "stub_first_token_seconds": STUB_FIRST_TOKEN_SECONDS, "stub_seconds_per_chunk": STUB_SECONDS_PER_CHUNK,
+        "requests": requests, "errors": len(errors), "error_samples": errors[:5],
+        "seconds": round(seconds, 3), "qps": round(requests / seconds, 2),
+        "latency_ms": {kind: percentiles(values) for kind, values in samples.items() if values},
+        "mean_retrieval_batch": round(items / batches, 2) if batches else None,
+        "reindex": reindex_result or None,
+    }
+
+if __name__ == "__main__":
+    results = asyncio.run(run(args.sessions, args.turns, args.workers, args.reindex))
+    text = json.dumps(results, indent=4)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    sys.exit(1 if results["errors"] else 0)
@@ -0,0 +1,84 @@
+"""
+Menu Cleaning Benchmark
+
+Compares the item-by-item cleaning loop (build_item_documents) with the column-wise
+table pipeline (flatten_menus -> clean_menu_frame -> build_documents_from_frame) on a
+synthetic corpus generated from the bundled menus, and checks both produce identical
+documents.
+
+Usage:
+    python -m benchmarks.cleaning_benchmark --items 100000
+"""
+
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from data_cleaning import (clean_text, build_item_documents, flatten_menus, clean_menu_frame,
+                           build_documents_from_frame)
+
+def synthetic_menus(n_items, folder_path="menu", items_per_restaurant=500, seed=0):
+    """
+    Generate synthetic menus by sampling items from the bundled menu files.
+
+    Parameters:
+        n_items (int): Total number of menu items to generate.
+        folder_path (str): Folder containing the JSON menu files to sample from.
+        items_per_restaurant (int): Number of items per synthetic restaurant.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        list: Parsed menus in the menu/*.json schema.
+    """
+    rng = random.Random(seed)
+    source = [json.loads(f.read_text(encoding="utf-8")) for f in sorted(Path(folder_path).glob("*.json"))]
+    pool = [(category["category"], item) for data in source for category in data.get("menu", [])
+            for item in category.get("items", [])]
+    menus = []
+    for start in range(0, n_items, items_per_restaurant):
+        count = min(items_per_restaurant, n_items - start)
+        categories = {}
+        for category, item in rng.choices(pool, k=count):
+            item = dict(item, name=f"{item['name']} {rng.randint(1, 999)}")
+            categories.setdefault(category, []).append(item)
+        menus.append({
+            "restaurant": {"name": f"Restaurant {len(menus)}", "location": "Roorkee", "contact": ""},
+            "menu": [{"category": c, "items": items} for c, items in categories.items()],
+        })
+    return menus
+
+def run(n_items):
+    """
+    Time both cleaning paths on a synthetic corpus and print the results.
+
+    Parameters:
+        n_items (int): Number of menu items in the synthetic corpus.
+
+    Returns:
+        dict: Seconds taken by the "loop" and "columnar" paths and the "speedup".
+    """
+    menus = synthetic_menus(n_items)
+
+    start = time.perf_counter()
+    loop_documents = [doc for data in menus
+                      for doc in build_item_documents(data, clean_text(data["restaurant"]["name"]))]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frame = clean_menu_frame(flatten_menus(menus))
+    columnar_documents = build_documents_from_frame(frame)
+    columnar_seconds = time.perf_counter() - start
+
+    assert loop_documents == columnar_documents, "columnar documents differ from the loop"
+    results = {"items": n_items, "loop": loop_seconds, "columnar": columnar_seconds,
+               "speedup": loop_seconds / columnar_seconds}
+    print(f"{n_items} items: loop {loop_seconds:.2f}s, columnar {columnar_seconds:.2f}s "
+          f"({results['speedup']:.1f}x)")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark menu cleaning paths.")
+    parser.add_argument("--items", type=int, default=100000, help="number of synthetic menu items")
+    args = parser.parse_args()
+    run(args.items)
@@ -0,0 +1,105 @@
+"""
+Query Embedding Benchmark
+
+Compares query embedding backends with the PyTorch SentenceTransformer the index was built
+with: per-query latency (p50/p95), cosine similarity of the embeddings, and recall drift -
+the share of the reference top-k documents each backend still retrieves from the FAISS
+index. Backends are the ONNX export ("model.onnx"), its int8 quantization
+("model_quantized.onnx") when present, and the LRU-cached PyTorch embedder on a query
+stream where queries repeat.
+
+Usage:
+    python -m benchmarks.embedding_benchmark --queries 500
+"""
+
+import json
+import time
+import random
+import argparse
+import numpy as np
+from pathlib import Path
+from rag import load_data_from_json, build_faiss, get_embedder, prepare_vectors, search_params, QUERY_PREFIX
+from onnx_embedder import OnnxQueryEmbedder, validate_embedder, ONNX_MODEL_DIR
+from embedding_cache import CachedEmbedder
+from benchmarks.retrieval_benchmark import synthetic_queries
+
+def latencies(embedder, queries):
+    """
+    Embed queries one at a time, as the chatbot does.
+
+    Returns:
+        tuple: (embeddings, per-query latencies in milliseconds).
+    """
+    vectors, times = [], []
+    for query in queries:
+        start = time.perf_counter()
+        vectors.append(np.asarray(embedder.encode([QUERY_PREFIX + query]), dtype=np.float32)[0])
+        times.append((time.perf_counter() - start) * 1000)
+    return np.vstack(vectors), np.array(times)
+
+def top_k(index, vectors, k):
+    _, I = index.search(prepare_vectors(vectors, index.metric_type), k, params=search_params(index))
+    return I
+
+def run(n_queries=500, k=10, model_dir=ONNX_MODEL_DIR, repeat_rate=0.5):
+    """
+    Benchmark every available backend against the PyTorch embedder and print one JSON line each.
+
+    Parameters:
+        n_queries (int): Number of queries. Default is 500.
+        k (int): Number of documents compared for recall drift. Default is 10.
+        model_dir (str): Folder holding the ONNX models.
+        repeat_rate (float): Share of repeated queries in the stream used for the cached backend.
+
+    Returns:
+        list: One result dict per backend.
+    """
+    documents = load_data_from_json()
+    index, _, _ = build_faiss(documents)
+    queries = synthetic_queries(documents, n_queries)
+    reference = get_embedder()
+    reference.encode(queries[:8])
+
+    backends = {"pytorch": reference}
+    for name, model_file in [("onnx", "model.onnx"), ("onnx_int8", "model_quantized.onnx")]:
+        if (Path(model_dir) / model_file).exists():
+            backends[name] = OnnxQueryEmbedder(model_dir, model_file)
+
+    expected, _ = latencies(reference, queries)
+    truth = top_k(index, expected, k)
+    results = []
+    for name, embedder in backends.items():
+        embedder.encode(queries[:8])
+        vectors, times = latencies(embedder, queries)
+        found = top_k(index, vectors, k)
+        result = {
+            "backend": name,
+            "p50_ms": round(float(np.percentile(times, 50)), 3),
+            "p95_ms": round(float(np.percentile(times, 95)), 3),
+            **{key: round(value, 5) if isinstance(value, float) else value
+               for key, value in validate_embedder(embedder, reference, queries).items()},
+            "recall_at_k": round(float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)])), 4),
+        }
+        results.append(result)
+        print(json.dumps(result))
+
+    # Cached embedder on a stream where queries repeat, like popular questions do
+    rng = random.Random(0)
+    stream = [rng.choice(queries[:i]) if i and rng.random() < repeat_rate else query
+              for i, query in enumerate(queries)]
+    cached = CachedEmbedder(reference)
+    _, times = latencies(cached, stream)
+    result = {"backend": "pytorch_cached", "p50_ms": round(float(np.percentile(times, 50)), 3),
+              "p95_ms": round(float(np.percentile(times, 95)), 3),
+              "hit_rate": round(cached.hits / max(1, cached.hits + cached.misses), 3)}
+    results.append(result)
+    print(json.dumps(result))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark query embedding backends.")
+    parser.add_argument("--queries", type=int, default=500, help="number of queries")
+    parser.add_argument("--k", type=int, default=10, help="documents compared for recall drift")
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR, help="folder holding the ONNX models")
+    args = parser.parse_args()
+    run(args.queries, args.k, args.model_dir)
@@ -0,0 +1,136 @@
+"""
+Follow-up Retrieval Benchmark
+
+Measures retrieval for follow-up questions that refer back to the previous turn with a
+pronoun ("how much does it cost", "where is it located"). Two-turn conversations are
+generated from the corpus: the first question names a menu item and its restaurant, and
+the follow-up asks about the same item or about the restaurant. Retrieval for the follow-up
+is compared when searching with:
+
+- "query": the follow-up alone;
+- "concatenated": the follow-up followed by the previous query, as app.py used to;
+- "rewritten": the standalone query from query_rewriter.Conversation.
+
+For each, recall@1/5/10 and MRR@10 are reported, along with the query length and the time
+taken by the rewriting itself. The index is built in a scratch directory with offline
+restaurant summaries, so the real index store is untouched.
+
+Usage:
+    python -m benchmarks.followup_benchmark --conversations 300
+"""
+
+import os
+os.environ["offline_summaries"] = "true"
+
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+import rag
+from context_budget import parse_document
+from query_rewriter import Conversation, EntityVocabulary
+from benchmarks.rag_benchmark import QUESTION_TEMPLATES, percentiles, score
+
+# Follow-ups about the item of the first question, and about its restaurant
+ITEM_FOLLOW_UPS = ["how much does it cost", "is it veg", "what is the spice level of it", "can you describe it"]
+RESTAURANT_FOLLOW_UPS = ["where is it located", "what is their contact number", "where is this place"]
+
+def conversations(documents, n_conversations, seed=0):
+    """
+    Generate two-turn conversations, labeled with the documents answering the follow-up.
+
+    Parameters:
+        documents (list): The indexed document strings.
+        n_conversations (int): Number of conversations.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        list: (first question, follow-up, set of relevant document strings) triples.
+    """
+    rng = random.Random(seed)
+    by_item, by_restaurant = {}, {}
+    for document in documents:
+        parsed = parse_document(document)
+        if parsed["kind"] == "item":
+            by_item.setdefault((parsed["restaurant"], parsed["item"]), set()).add(document)
+        elif parsed["kind"] == "restaurant":
+            by_restaurant.setdefault(parsed["restaurant"], set()).add(document)
+    items = sorted(by_item)
+    result = []
+    for i in range(n_conversations):
+        restaurant, item = rng.choice(items)
+        question = rng.choice(QUESTION_TEMPLATES[:3]).format(item=item, restaurant=restaurant)
+        if i % 4 == 3 and restaurant in by_restaurant:
+            result.append((question, rng.choice(RESTAURANT_FOLLOW_UPS), by_restaurant[restaurant]))
+        else:
+            result.append((question, rng.choice(ITEM_FOLLOW_UPS), by_item[(restaurant, item)]))
+    return result
+
+def run(menus_folder="menu", n_conversations=300, output=None):
+    """
+    Benchmark follow-up retrieval on a corpus.
+
+    Parameters:
+        menus_folder (str): Folder of JSON menu files. Default is the bundled menus.
+        n_conversations (int): Number of generated conversations. Default is 300.
+        output (str, optional): Path the JSON results are written to.
+
+    Returns:
+        dict: The results, with one entry per retrieval query under "strategies".
+    """
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="followup_benchmark_")
+    shutil.copytree(menus_folder, Path(workdir) / "menu")
+    os.chdir(workdir)
+    try:
+        documents, index = rag.update_index("menu")
+        embedder = rag.get_query_embedder()
+        lexical = rag.build_lexical(documents)
+        metadata = rag.load_metadata(documents)
+        vocabulary = EntityVocabulary(documents)
+        samples = conversations(documents, n_conversations)
+
+        queries = {"query": [], "concatenated": [], "rewritten": []}
+        rewrite_times = []
+        for question, follow_up, _ in samples:
+            conversation = Conversation()
+            conversation.add(conversation.rewrite(question, vocabulary))
+            start = time.perf_counter()
+            rewrite = conversation.rewrite(follow_up, vocabulary)
+            rewrite_times.append(time.perf_counter() - start)
+            queries["query"].append(follow_up)
+            queries["concatenated"].append(f"{follow_up} Query: {question}")
+            queries["rewritten"].append(rewrite["query"])
+
+        relevant = [rel for _, _, rel in samples]
+        results = {"documents": len(documents), "conversations": len(samples),
+                   "rewrite_ms": percentiles(rewrite_times), "strategies": {}}
+        for strategy, texts in queries.items():
+            retrieved = [rag.retrieve(text, index, embedder, documents, k=10, metadata=metadata, lexical=lexical)
+                         for text in texts]
+            results["strategies"][strategy] = {
+                "mean_query_words": round(float(np.mean([len(text.split()) for text in texts])), 2),
+                **score(retrieved, relevant),
+            }
+        results["examples"] = [{"question": question, "follow_up": follow_up, "rewritten": rewritten}
+                               for (question, follow_up, _), rewritten in zip(samples[:5], queries["rewritten"])]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    text = json.dumps(results, indent=4)
+    print(text)
+    if output:
+        Path(output).write_text(text, encoding="utf-8")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare retrieval for follow-up questions.")
+    parser.add_argument("--menus", default="menu", help="folder of JSON menu files")
+    parser.add_argument("--conversations", type=int, default=300, help="generated two-turn conversations")
+    parser.add_argument("--output", default=None, help="write the JSON results to this file")
+    args = parser.parse_args()
+    run(args.menus, args.conversations, args.output)
@@ -0,0 +1,109 @@
+"""
+Ingestion Memory Benchmark
+
+Compares the peak memory and time of building the index store from scratch with
+update_index (whole corpus in memory) and with streaming_ingest (chunks through an
+append-only staging store), on synthetic corpora of growing size. Each run happens in a
+fresh Python process inside a scratch directory, with offline restaurant summaries, so the
+peak resident memory reported by the OS belongs to that run alone. For streaming
+ingestion the peak is reported after the ingestion phase and after finalize, which loads
+the documents and fills the FAISS index like the chatbot does at start-up.
+
+Usage:
+    python -m benchmarks.ingest_benchmark --items 2000 --scales 1 10 100
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from benchmarks.cleaning_benchmark import synthetic_menus
+
+CHILD = """
+import json, os, sys, time, resource
+os.environ["offline_summaries"] = "true"
+
+def peak_mb():
+    # ru_maxrss keeps the parent's peak across exec on Linux, VmHWM does not
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            return round(int(next(line for line in f if line.startswith("VmHWM")).split()[1]) / 2 ** 10, 1)
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20, 1)
+
+import rag, streaming_ingest
+mode, chunk_size = sys.argv[1], int(sys.argv[2])
+result = {"mode": mode, "peak_rss_after_import_mb": peak_mb()}
+rag.get_embedder()
+start = time.perf_counter()
+if mode == "batch":
+    documents, _ = rag.update_index("menu")
+    result["documents"] = len(documents)
+else:
+    store = streaming_ingest.ingest_menus("menu", chunk_size=chunk_size)
+    result["ingest_seconds"] = round(time.perf_counter() - start, 3)
+    result["peak_rss_after_ingest_mb"] = peak_mb()
+    result["documents"] = streaming_ingest.finalize(store, "menu")
+    store.clear()
+result["seconds"] = round(time.perf_counter() - start, 3)
+result["peak_rss_mb"] = peak_mb()
+print(json.dumps(result))
+"""
+
+def run_child(mode, workdir, chunk_size):
+    """
+    Build the index store in workdir with a fresh interpreter and return its measurements.
+    """
+    for path in ["index_store", "menu.db", "database.csv", "summary_cache.db"]:
+        target = Path(workdir) / path
+        if target.is_dir():
+            shutil.rmtree(target)
+        elif target.exists():
+            target.unlink()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.getcwd(), os.environ.get("PYTHONPATH", "")]))
+    output = subprocess.run([sys.executable, "-c", CHILD, mode, str(chunk_size)], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run(n_items=2000, scales=(1, 10, 100), items_per_restaurant=500, chunk_size=256, modes=("batch", "stream")):
+    """
+    Measure both ingestion modes at every corpus scale and print one JSON line each.
+
+    Parameters:
+        n_items (int): Number of menu items at scale 1. Default is 2000.
+        scales (iterable): Corpus size multipliers. Default is 1, 10 and 100.
+        items_per_restaurant (int): Number of items per synthetic menu file.
+        chunk_size (int): Items cleaned and embedded together by streaming ingestion.
+        modes (iterable): "batch" and/or "stream".
+
+    Returns:
+        list: One result dict per measurement.
+    """
+    results = []
+    for scale in scales:
+        workdir = tempfile.mkdtemp(prefix="ingest_benchmark_")
+        try:
+            menu_dir = Path(workdir) / "menu"
+            menu_dir.mkdir()
+            for i, menu in enumerate(synthetic_menus(n_items * scale, items_per_restaurant=items_per_restaurant)):
+                (menu_dir / f"synthetic_{i}_menu.json").write_text(json.dumps(menu), encoding="utf-8")
+            for mode in modes:
+                result = {"items": n_items * scale, "scale": scale, **run_child(mode, workdir, chunk_size)}
+                results.append(result)
+                print(json.dumps(result))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare peak memory of batch and streaming ingestion.")
+    parser.add_argument("--items", type=int, default=2000, help="menu items at scale 1")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="corpus size multipliers")
+    parser.add_argument("--items-per-restaurant", type=int, default=500, help="items per synthetic menu file")
+    parser.add_argument("--chunk-size", type=int, default=256, help="items embedded together when streaming")
+    parser.add_argument("--modes", nargs="+", choices=["batch", "stream"], default=["batch", "stream"])
+    args = parser.parse_args()
+    run(args.items, args.scales, args.items_per_restaurant, args.chunk_size, args.modes)
@@ -0,0 +1,228 @@
+"""
+End-to-End RAG Benchmark
+
+Runs the chatbot pipeline on the bundled menu corpus and on a synthetic scale-up corpus, in
+a scratch directory so the real index store is untouched, with offline restaurant
+summaries and the deterministic stub LLM. For each corpus it reports:
+
+- the cold build (cleaning, embedding and indexing) and warm loading times of
+  load_data_from_json, build_faiss and build_lexical;
+- per-stage query latency (embedding, retrieval, context assembly, generation and the whole
+  chatbot call) as p50/p95/p99 in milliseconds, and end-to-end throughput;
+- resident memory after building and the process peak;
+- retrieval quality on generated labeled questions ("what is the price of X at Y"):
+  recall@1/5/10 and MRR@10 for dense-only and hybrid retrieval.
+
+Results are printed and written as JSON, so runs can be compared for regressions.
+
+Usage:
+    python -m benchmarks.rag_benchmark --synthetic-items 20000 --output rag_benchmark.json
+"""
+
+import os
+# Deterministic, offline pipeline: no Gemini summaries, stub answers
+os.environ["offline_summaries"] = "true"
+os.environ["llm_backend"] = "stub"
+
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import numpy as np
+from pathlib import Path
+import rag
+from context_budget import parse_document, assemble_context
+from benchmarks.cleaning_benchmark import synthetic_menus
+
+QUESTION_TEMPLATES = ["what is the price of {item} at {restaurant}", "does {restaurant} serve {item}",
+                      "tell me about the {item} from {restaurant}", "{item} {restaurant}"]
+RECALL_KS = [1, 5, 10]
+
+def percentiles(samples):
+    """
+    Summarize latency samples given in seconds.
+
+    Returns:
+        dict: "p50", "p95", "p99" and "mean" in milliseconds, and the sample count "n".
+    """
+    ms = np.array(samples) * 1000
+    return {"p50": round(float(np.percentile(ms, 50)), 3), "p95": round(float(np.percentile(ms, 95)), 3),
+            "p99": round(float(np.percentile(ms, 99)), 3), "mean": round(float(ms.mean()), 3), "n": len(ms)}
+
+def rss_mb():
+    """
+    Return the current resident memory of the process in megabytes.
+    """
+    with open("/proc/self/statm") as f:
+        return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+
+def peak_rss_mb():
+    """
+    Return the peak resident memory of the process in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10, 1)
+
+def labeled_questions(documents, n_questions, seed=0):
+    """
+    Generate questions about random menu items, labeled with the documents answering them.
+
+    Parameters:
+        documents (list): The indexed document strings.
+        n_questions (int): Number of questions.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        list: (question, set of relevant document strings) pairs. An item listed under
+              several categories has all its documents marked relevant.
+    """
+    rng = random.Random(seed)
+    by_item = {}
+    for document in documents:
+        parsed = parse_document(document)
+        if parsed["kind"] == "item":
+            by_item.setdefault((parsed["restaurant"], parsed["item"]), set()).add(document)
+    items = sorted(by_item)
+    questions = []
+    for _ in range(n_questions):
+        restaurant, item = rng.choice(items)
+        questions.append((rng.choice(QUESTION_TEMPLATES).format(item=item, restaurant=restaurant),
+                          by_item[(restaurant, item)]))
+    return questions
+
+def score(retrieved, relevant):
+    """
+    Score ranked retrieval results against the relevant documents.
+
+    Parameters:
+        retrieved (list): For each question, the retrieved documents, best first.
+        relevant (list): For each question, the set of relevant documents.
+
+    Returns:
+        dict: "recall@k" for each k in RECALL_KS (share of questions with a relevant
+              document in the top k) and "mrr@10".
+    """
+    ranks = [next((rank for rank, doc in enumerate(docs, 1) if doc in rel), None)
+             for docs, rel in zip(retrieved, relevant)]
+    result = {f"recall@{k}": round(float(np.mean([r is not None and r <= k for r in ranks])), 4) for k in RECALL_KS}
+    result["mrr@10"] = round(float(np.mean([1 / r if r is not None and r <= 10 else 0 for r in ranks])), 4)
+    return result
+
+def run_corpus(name, menus_folder, n_questions=200, repeats=5):
+    """
+    Benchmark the pipeline on one corpus, in a scratch directory holding a copy of it.
+
+    Parameters:
+        name (str): Name of the corpus in the results.
+        menus_folder (str): Folder of JSON menu files.
+        n_questions (int): Number of labeled questions. Default is 200.
+        repeats (int): Number of warm loads timed. Default is 5.
+
+    Returns:
+        dict: The results for this corpus.
+    """
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="rag_benchmark_")
+    shutil.copytree(menus_folder, Path(workdir) / "menu")
+    os.chdir(workdir)
+    try:
+        result = {"corpus": name, "menu_files": len(list(Path("menu").glob("*.json")))}
+        start = time.perf_counter()
+        documents, _ = rag.update_index("menu")
+        result["documents"] = len(documents)
+        result["cold_build_seconds"] = round(time.perf_counter() - start, 3)
+        result["rss_after_build_mb"] = rss_mb()
+
+        loads = {"load_data_from_json": [], "build_faiss": [], "build_lexical": [], "load_metadata": []}
+        for _ in range(repeats):
+            for stage, call in [("load_data_from_json", rag.load_data_from_json),
+                                ("build_faiss", lambda: rag.build_faiss(documents)),
+                                ("build_lexical", lambda: rag.build_lexical(documents)),
+                                ("load_metadata", lambda: rag.load_metadata(documents))]:
+                start = time.perf_counter()
+                call()
+                loads[stage].append(time.perf_counter() - start)
+        result["warm_load_ms"] = {stage: percentiles(samples) for stage, samples in loads.items()}
+
+        index, _, embedder = rag.build_faiss(documents)
+        lexical = rag.build_lexical(documents)
+        metadata = rag.load_metadata(documents)
+        questions = labeled_questions(documents, n_questions)
+        stages = {"embed": [], "retrieve": [], "assemble_context": [], "generate": []}
+        hybrid, dense = [], []
+        for question, _ in questions:
+            start = time.perf_counter()
+            query_vec = rag.embed_query(question, embedder)
+            stages["embed"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            retrieved = rag.retrieve(question, index, embedder, documents, k=10, metadata=metadata,
+                                     lexical=lexical, query_vec=query_vec)
+            stages["retrieve"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            context = assemble_context(retrieved[:rag.RETRIEVAL_K])
+            stages["assemble_context"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            rag.query_llama(context, question, [])
+            stages["generate"].append(time.perf_counter() - start)
+            hybrid.append(retrieved)
+            dense.append(rag.retrieve(question, index, embedder, documents, k=10, metadata=metadata,
+                                      query_vec=query_vec))
+
+        chatbot_times = []
+        start_all = time.perf_counter()
+        for question, _ in questions:
+            start = time.perf_counter()
+            rag.chatbot(question, [])
+            chatbot_times.append(time.perf_counter() - start)
+        total = time.perf_counter() - start_all
+        stages["chatbot"] = chatbot_times
+        result["query_latency_ms"] = {stage: percentiles(samples) for stage, samples in stages.items()}
+        result["chatbot_qps"] = round(len(questions) / total, 2)
+        relevant = [rel for _, rel in questions]
+        result["retrieval_quality"] = {"hybrid": score(hybrid, relevant), "dense": score(dense, relevant)}
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run(synthetic_items=20000, n_questions=200, output=None):
+    """
+    Benchmark the bundled corpus and a synthetic scale-up corpus.
+
+    Parameters:
+        synthetic_items (int): Number of menu items in the synthetic corpus; 0 skips it.
+        n_questions (int): Number of labeled questions per corpus.
+        output (str, optional): Path the JSON results are written to.
+
+    Returns:
+        dict: The results, with one entry per corpus under "corpora".
+    """
+    results = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "embedding_model": rag.EMBEDDING_MODEL,
+               "index": rag.index_config(), "retrieval_k": rag.RETRIEVAL_K, "corpora": []}
+    results["corpora"].append(run_corpus("menu", "menu", n_questions))
+    if synthetic_items:
+        folder = tempfile.mkdtemp(prefix="synthetic_menus_")
+        try:
+            for i, menu in enumerate(synthetic_menus(synthetic_items)):
+                (Path(folder) / f"synthetic_{i}_menu.json").write_text(json.dumps(menu), encoding="utf-8")
+            results["corpora"].append(run_corpus(f"synthetic_{synthetic_items}", folder, n_questions))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    text = json.dumps(results, indent=4)
+    print(text)
+    if output:
+        Path(output).write_text(text, encoding="utf-8")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the RAG pipeline end to end.")
+    parser.add_argument("--synthetic-items", type=int, default=20000, help="items in the synthetic corpus, 0 to skip")
+    parser.add_argument("--questions", type=int, default=200, help="labeled questions per corpus")
+    parser.add_argument("--output", default=None, help="write the JSON results to this file")
+    args = parser.parse_args()
+    run(args.synthetic_items, args.questions, args.output)
@@ -0,0 +1,99 @@
+"""
+Batched Retrieval Benchmark
+
+Measures retrieval throughput in queries per second on CPU for the indexed menus: one
+retrieve call per query, retrieve_batch at batch sizes 1 to 256, and concurrent single-query
+requests coalesced by the MicroBatcher. Queries are generated from the indexed menu items,
+e.g. "how much is the farmhouse pizza at dominos pizza".
+
+Usage:
+    python -m benchmarks.retrieval_benchmark --queries 1024
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+from rag import load_data_from_json, build_faiss, build_lexical, load_metadata, retrieve, retrieve_batch
+from context_budget import parse_document
+from micro_batcher import MicroBatcher
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+TEMPLATES = ["how much is the {item} at {restaurant}", "is the {item} spicy", "what does {restaurant} serve",
+             "tell me about {item}", "{item} price"]
+
+def synthetic_queries(documents, n_queries, seed=0):
+    """
+    Generate user-like questions about the indexed menu items.
+
+    Parameters:
+        documents (list): The indexed document strings.
+        n_queries (int): Number of queries to generate.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        list: The query strings.
+    """
+    rng = random.Random(seed)
+    items = [parsed for parsed in map(parse_document, documents) if parsed["kind"] == "item"]
+    return [rng.choice(TEMPLATES).format(**rng.choice(items)) for _ in range(n_queries)]
+
+def report(mode, batch_size, n_queries, seconds, results):
+    result = {"mode": mode, "batch_size": batch_size, "queries": n_queries,
+              "seconds": round(seconds, 3), "qps": round(n_queries / seconds, 1)}
+    results.append(result)
+    print(json.dumps(result))
+
+def run(n_queries=1024, hybrid=True, batch_sizes=BATCH_SIZES):
+    """
+    Benchmark sequential, batched and micro-batched retrieval and print one JSON line each.
+
+    Parameters:
+        n_queries (int): Number of queries per measurement. Default is 1024.
+        hybrid (bool): Use hybrid BM25 + vector retrieval, as the chatbot does. Default is True.
+        batch_sizes (list): Batch sizes to measure.
+
+    Returns:
+        list: One result dict per measurement.
+    """
+    documents = load_data_from_json()
+    index, _, embedder = build_faiss(documents)
+    metadata = load_metadata(documents)
+    lexical = build_lexical(documents) if hybrid else None
+    queries = synthetic_queries(documents, n_queries)
+    kwargs = {"k": 5, "metadata": metadata, "lexical": lexical}
+    results = []
+
+    # Warm up the embedder before timing
+    retrieve_batch(queries[:8], index, embedder, documents, **kwargs)
+
+    start = time.perf_counter()
+    for query in queries:
+        retrieve(query, index, embedder, documents, **kwargs)
+    report("sequential", 1, n_queries, time.perf_counter() - start, results)
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, n_queries, batch_size):
+            retrieve_batch(queries[i:i + batch_size], index, embedder, documents, batch_size=batch_size, **kwargs)
+        report("batch", batch_size, n_queries, time.perf_counter() - start, results)
+
+    async def concurrent(batch_size):
+        batcher = MicroBatcher(lambda batch: retrieve_batch(batch, index, embedder, documents, **kwargs),
+                               max_batch_size=batch_size)
+        await asyncio.gather(*[batcher.submit(query) for query in queries])
+        await batcher.close()
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        asyncio.run(concurrent(batch_size))
+        report("micro_batcher", batch_size, n_queries, time.perf_counter() - start, results)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched retrieval throughput.")
+    parser.add_argument("--queries", type=int, default=1024, help="number of queries per measurement")
+    parser.add_argument("--dense-only", action="store_true", help="disable BM25 hybrid retrieval")
+    args = parser.parse_args()
+    run(args.queries, hybrid=not args.dense_only)
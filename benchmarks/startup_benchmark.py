@@ -0,0 +1,81 @@
+"""
+Start-up Benchmark
+
+Measures the cold start of the chatbot in a fresh Python process: importing rag, loading the
+data and indexes (from the prebuilt index store, or through load_data_from_json and
+build_faiss), and the first question - query embedder loading, retrieval and context
+building, and optionally the generated answer.
+
+Usage:
+    python -m benchmarks.startup_benchmark --mode prebuilt --query-embedder onnx --answer
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+timings = {}
+import rag
+timings["import_rag"] = time.perf_counter() - start
+mode, answer, query = sys.argv[1], sys.argv[2] == "1", sys.argv[3]
+step = time.perf_counter()
+prebuilt = rag.load_prebuilt() if mode == "prebuilt" else None
+if prebuilt is not None:
+    docs, index, lexical, metadata = prebuilt
+else:
+    docs = rag.load_data_from_json()
+    index, _, _ = rag.build_faiss(docs)
+    lexical = rag.build_lexical(docs)
+    metadata = rag.load_metadata(docs)
+timings["load_data"] = time.perf_counter() - step
+timings["ready"] = time.perf_counter() - start
+step = time.perf_counter()
+embedder = rag.get_query_embedder()
+timings["load_query_embedder"] = time.perf_counter() - step
+step = time.perf_counter()
+context = rag.build_context(query, docs, index, embedder, metadata=metadata, lexical=lexical)
+timings["first_context"] = time.perf_counter() - step
+if answer:
+    step = time.perf_counter()
+    rag.query_llama(context, query, [])
+    timings["first_generation"] = time.perf_counter() - step
+timings["time_to_first_answer"] = time.perf_counter() - start
+timings["heavy_modules_loaded"] = sorted(m for m in ["torch", "sentence_transformers", "langchain",
+    "llama_cpp", "google.generativeai", "onnxruntime"] if m in sys.modules)
+print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in timings.items()}))
+"""
+
+def run(mode="prebuilt", query_embedder=None, answer=False, query="what is the price of the farmhouse pizza at dominos"):
+    """
+    Time a cold start in a fresh interpreter.
+
+    Parameters:
+        mode (str): "prebuilt" to load the index store as it is, or "build" to go through
+                    load_data_from_json and build_faiss. Default is "prebuilt".
+        query_embedder (str, optional): "sentence_transformers" or "onnx"; defaults to the
+                                        query_embedder setting.
+        answer (bool): Also generate the first answer with the configured LLM backend.
+        query (str): The first question.
+
+    Returns:
+        dict: Seconds spent per start-up stage, and the heavy modules that got imported.
+    """
+    env = dict(os.environ)
+    if query_embedder:
+        env["query_embedder"] = query_embedder
+    output = subprocess.run([sys.executable, "-c", CHILD, mode, "1" if answer else "0", query],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the chatbot cold start.")
+    parser.add_argument("--mode", choices=["prebuilt", "build"], default="prebuilt")
+    parser.add_argument("--query-embedder", choices=["sentence_transformers", "onnx"], default=None)
+    parser.add_argument("--answer", action="store_true", help="also generate the first answer")
+    args = parser.parse_args()
+    print(json.dumps(run(args.mode, args.query_embedder, args.answer), indent=4))
@@ -0,0 +1,137 @@
+"""
+Context Budgeter
+
+This module turns the documents retrieved for a query into a compact prompt context. Each
+retrieved document repeats its restaurant name and the sentence template it was generated
+from, and retrieval often returns the same dish listed under two categories. Before
+prompting, near-identical documents are dropped, items are grouped under one header per
+restaurant and compressed into table rows, and documents are added in relevance order only
+while the context fits a token budget measured with the answer model's tokenizer.
+"""
+
+import os
+from dotenv import load_dotenv
+from data_cleaning import ITEM_DOCUMENT_PATTERN, RESTAURANT_DOCUMENT_PATTERN, WHITESPACE_PATTERN
+
+# Load environment variables
+load_dotenv()
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("context_token_budget", 1500))
+MAX_DESCRIPTION_WORDS = 25
+TABLE_HEADER = "item | category | price | type | spice | description"
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens of a text, at about four characters per token.
+
+    Parameters:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return (len(text) + 3) // 4
+
+def parse_document(document):
+    """
+    Split a retrieved document into its restaurant and its content.
+
+    Parameters:
+        document (str): A document as built during menu cleaning.
+
+    Returns:
+        dict: "kind" ("item", "restaurant" or "other"), "restaurant" (None for other
+              documents) and, for items, the fields of the item document template.
+    """
+    match = ITEM_DOCUMENT_PATTERN.match(document.strip())
+    if match:
+        return {"kind": "item", **match.groupdict()}
+    match = RESTAURANT_DOCUMENT_PATTERN.match(document.strip())
+    if match:
+        return {"kind": "restaurant", "restaurant": match.group("restaurant")}
+    return {"kind": "other", "restaurant": None}
+
+def shorten(text, max_words=MAX_DESCRIPTION_WORDS):
+    """
+    Truncate text to a maximum number of words.
+
+    Parameters:
+        text (str): The text to shorten.
+        max_words (int): Maximum number of words kept. Default is MAX_DESCRIPTION_WORDS.
+
+    Returns:
+        str: The text, ending in "..." if words were dropped.
+    """
+    words = text.split()
+    return " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+
+def document_key(parsed, document):
+    """
+    Key identifying near-identical documents: the same item at the same price and
+    description of a restaurant, whatever its category, or the same normalized text.
+    """
+    if parsed["kind"] == "item":
+        return ("item", parsed["restaurant"], parsed["item"], parsed["price"], parsed["description"].strip())
+    return ("text", WHITESPACE_PATTERN.sub(" ", document).strip().lower())
+
+def render_line(parsed, document, max_description_words=MAX_DESCRIPTION_WORDS):
+    """
+    Render one document as a context line: a table row for items, the collapsed text
+    otherwise.
+    """
+    if parsed["kind"] == "item":
+        description = shorten(parsed["description"].strip(), max_description_words) or "-"
+        return " | ".join([parsed["item"], parsed["category"], parsed["price"], parsed["veg_nonveg"],
+                           parsed["spice_level"], description])
+    return WHITESPACE_PATTERN.sub(" ", document).strip()
+
+def assemble_context(documents, budget=CONTEXT_TOKEN_BUDGET, count_tokens=estimate_tokens,
+                     max_description_words=MAX_DESCRIPTION_WORDS):
+    """
+    Build a deduplicated, grouped and token-limited context from retrieved documents.
+
+    Documents are taken in the given (relevance) order. A document that would exceed the
+    budget is skipped, so a shorter, less relevant one may still fit.
+
+    Parameters:
+        documents (list): Retrieved document strings, most relevant first.
+        budget (int): Maximum number of context tokens. Default is CONTEXT_TOKEN_BUDGET.
+        count_tokens (callable): Function returning the token count of a text. Default is
+                                 estimate_tokens.
+        max_description_words (int): Maximum words kept from each item description.
+
+    Returns:
+        str: The context, with one "### <restaurant>" section per restaurant holding its
+             information lines followed by a table of its items.
+    """
+    groups = {}
+    seen = set()
+    used = 0
+    for document in documents:
+        parsed = parse_document(document)
+        key = document_key(parsed, document)
+        if key in seen:
+            continue
+        line = render_line(parsed, document, max_description_words)
+        group = groups.get(parsed["restaurant"])
+        cost = count_tokens(line + "\n")
+        if group is None:
+            header = f"### {parsed['restaurant']}\n" if parsed["restaurant"] else "### other\n"
+            cost += count_tokens(header)
+        if parsed["kind"] == "item" and (group is None or not group["items"]):
+            cost += count_tokens(TABLE_HEADER + "\n")
+        if used + cost > budget:
+            continue
+        seen.add(key)
+        used += cost
+        if group is None:
+            group = groups[parsed["restaurant"]] = {"info": [], "items": []}
+        group["items" if parsed["kind"] == "item" else "info"].append(line)
+
+    sections = []
+    for restaurant, group in groups.items():
+        lines = [f"### {restaurant}" if restaurant else "### other"] + group["info"]
+        if group["items"]:
+            lines += [TABLE_HEADER] + group["items"]
+        sections.append("\n".join(lines))
+    return "\n".join(sections)
@@ -7,17 +7,66 @@ The processed data is saved to a CSV file for further use.
 """
 
 import pandas as pd
+import numpy as np
 import re
 import json
 from pathlib import Path
 import csv
-import google.generativeai as genai
 from dotenv import load_dotenv
 import os
+import time
+import random
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from summary_cache import get_default_cache
+from menu_store import save_menus, retain_menus, MENU_DB_PATH
+from telemetry import get_telemetry, traced
 
 # Load environment variables
 load_dotenv()
 GEMINI_TOKEN = os.getenv("gemini_token")
+# In offline mode restaurant summaries come only from the cache or a deterministic fallback
+OFFLINE_SUMMARIES = os.getenv("offline_summaries", "").lower() in ("1", "true", "yes")
+SUMMARY_MODEL = "gemma-3-27b-it"
+# Bounded parallelism, rate limit (requests per second, 0 for none) and retries for summary generation
+SUMMARY_CONCURRENCY = int(os.getenv("summary_concurrency", 4))
+SUMMARY_RATE_LIMIT = float(os.getenv("summary_rate_limit", 0))
+SUMMARY_RETRIES = int(os.getenv("summary_retries", 3))
+
+# Precompiled patterns shared by the scalar cleaners and the column-wise frame pipeline
+NON_TEXT_PATTERN = re.compile(r"[^a-zA-Z0-9\s.â‚¹-]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+NON_PRICE_PATTERN = re.compile(r"[^0-9.]")
+# All synonym rules combined into one alternation, applied in a single pass. Each named
+# group maps to its replacement; "non-veg" is listed before "veg" so it wins at the same position.
+SYNONYMS = {
+    "non_vegetarian": "non vegetarian",
+    "vegetarian": "vegetarian",
+    "pizzas": "pizzas",
+    "meal": "meal",
+    "hot": "hot",
+}
+SYNONYM_PATTERN = re.compile(
+    r"\b(?:(?P<non_vegetarian>non-veg|nonveg)|(?P<vegetarian>veg)|(?P<pizzas>pizza'?s)"
+    r"|(?P<meal>combo)|(?P<hot>spicy))\b"
+)
+# Parse the documents written by build_documents_from_frame and build_restaurant_document back
+# into their fields; keep these in step with the two templates
+ITEM_DOCUMENT_PATTERN = re.compile(
+    r"^(?P<restaurant>.+?) offers (?P<item>.+?) in the category '(?P<category>.*?)'\.\n"
+    r"(?P=item) is (?P<description>.*) for price (?P<price>[0-9.]*) and type: (?P<veg_nonveg>.*?)"
+    r" with spice level: (?P<spice_level>.*?)\.$",
+    re.S,
+)
+RESTAURANT_DOCUMENT_PATTERN = re.compile(r"^(?P<restaurant>.+?) is at ")
+MENU_COLUMNS = ["menu_index", "restaurant", "category", "item", "description", "price", "veg_nonveg", "spice_level"]
+
+def _synonym_replacement(match):
+    """
+    Return the replacement for whichever synonym group matched.
+    """
+    return SYNONYMS[match.lastgroup]
 
 def clean_text(text):
     """
@@ -32,8 +81,8 @@ def clean_text(text):
     if pd.isna(text):
         return "unknown"
     text = str(text).lower()
-    text = re.sub(r"[^a-zA-Z0-9\s.â‚¹-]", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = NON_TEXT_PATTERN.sub("", text)
+    text = WHITESPACE_PATTERN.sub(" ", text).strip()
     return text
 
 def normalize_price(price):
@@ -49,7 +98,7 @@ def normalize_price(price):
     """
     if pd.isna(price):
         return "0"
-    price = re.sub(r"[^0-9.]", "", str(price))
+    price = NON_PRICE_PATTERN.sub("", str(price))
     return price if price else "0"
 
 def apply_synonyms(text):
@@ -62,19 +111,514 @@ def apply_synonyms(text):
     Returns:
         str: Text with synonyms replaced according to predefined patterns.
     """
-    synonyms = {
-        r"\bnon-veg\b": "non vegetarian",
-        r"\bnonveg\b": "non vegetarian",
-        r"\bveg\b": "vegetarian",
-        r"\bpizza'?s\b": "pizzas",
-        r"\bcombo\b": "meal",
-        r"\bspicy\b": "hot"
+    return SYNONYM_PATTERN.sub(_synonym_replacement, text)
+
+def map_unique(values, func):
+    """
+    Apply a scalar cleaning function to a column once per distinct value.
+    
+    Menu columns are highly repetitive (restaurant, category, veg type and spice level take a
+    handful of values, and descriptions repeat across items), so the column is factorized and
+    func only runs on its distinct values before being broadcast back to every row.
+    
+    Parameters:
+        values (pandas.Series): The column to transform.
+        func (callable): Scalar function applied to each distinct value, including missing ones.
+        
+    Returns:
+        pandas.Series: The transformed column, aligned with values.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.array([func(value) for value in uniques], dtype=object)
+    return pd.Series(mapped[codes] if len(codes) else [], index=values.index, dtype=object)
+
+def clean_text_series(values):
+    """
+    Column equivalent of clean_text.
+    
+    Parameters:
+        values (pandas.Series): The texts to clean.
+        
+    Returns:
+        pandas.Series: Cleaned texts; missing values become "unknown".
+    """
+    return map_unique(values, clean_text)
+
+def normalize_price_series(values):
+    """
+    Column equivalent of normalize_price.
+    
+    Parameters:
+        values (pandas.Series): The price strings to normalize.
+        
+    Returns:
+        pandas.Series: Normalized prices as strings; missing or empty prices become "0".
+    """
+    return map_unique(values, normalize_price)
+
+def clean_description_series(values):
+    """
+    Column equivalent of apply_synonyms(clean_text(...)) for item descriptions.
+    
+    Parameters:
+        values (pandas.Series): The descriptions to clean.
+        
+    Returns:
+        pandas.Series: Cleaned descriptions with synonyms replaced.
+    """
+    return map_unique(values, lambda text: apply_synonyms(clean_text(text)))
+
+def flatten_menus(menus):
+    """
+    Flatten parsed menu files into one table with a row per menu item.
+    
+    Parameters:
+        menus (list): Parsed contents of JSON menu files.
+        
+    Returns:
+        pandas.DataFrame: Raw, uncleaned values with columns MENU_COLUMNS, where
+                          "menu_index" is the position of the item's menu in menus.
+    """
+    rows = []
+    for menu_index, data in enumerate(menus):
+        restaurant_name = data.get("restaurant", {}).get("name", "")
+        for category_block in data.get("menu", []):
+            category_name = category_block.get("category", "")
+            for item in category_block.get("items", []):
+                rows.append((menu_index, restaurant_name, category_name, item.get("name", ""),
+                             item.get("description", ""), item.get("price", ""),
+                             item.get("veg_nonveg", ""), item.get("spice_level", "")))
+    return pd.DataFrame(rows, columns=MENU_COLUMNS)
+
+def clean_menu_frame(frame):
+    """
+    Clean a flattened menu table column by column.
+    
+    Applies the same rules as clean_text, normalize_price and apply_synonyms, once per
+    distinct value of each column instead of once per item, and adds a numeric
+    "price_value" column.
+    
+    Parameters:
+        frame (pandas.DataFrame): Table as returned by flatten_menus.
+        
+    Returns:
+        pandas.DataFrame: The cleaned table.
+    """
+    cleaned = frame.copy()
+    for column in ["restaurant", "category", "item", "veg_nonveg", "spice_level"]:
+        cleaned[column] = clean_text_series(frame[column])
+    cleaned["description"] = clean_description_series(frame["description"])
+    cleaned["price"] = normalize_price_series(frame["price"])
+    cleaned["price_value"] = pd.to_numeric(cleaned["price"], errors="coerce")
+    return cleaned
+
+def build_documents_from_frame(frame):
+    """
+    Build the descriptive document for every menu item of a cleaned menu table.
+    
+    Parameters:
+        frame (pandas.DataFrame): Table as returned by clean_menu_frame.
+        
+    Returns:
+        list: One document string per row.
+    """
+    columns = zip(frame["restaurant"], frame["item"], frame["category"], frame["description"],
+                  frame["price"], frame["veg_nonveg"], frame["spice_level"])
+    return [f"""{restaurant_name} offers {item_name} in the category '{category_name}'.
+{item_name} is {description} for price {price} and type: {veg} with spice level: {spice}."""
+            for restaurant_name, item_name, category_name, description, price, veg, spice in columns]
+
+def build_metadata_from_frame(frame):
+    """
+    Build the retrieval metadata of every menu item of a cleaned menu table.
+    
+    Parameters:
+        frame (pandas.DataFrame): Table as returned by clean_menu_frame.
+        
+    Returns:
+        list: One dict per row with its "restaurant", "category", "veg_nonveg" and
+              "price" (None if the price could not be parsed).
+    """
+    columns = zip(frame["restaurant"], frame["category"], frame["veg_nonveg"], frame["price_value"])
+    return [{"restaurant": restaurant_name, "category": category, "veg_nonveg": veg,
+             "price": None if pd.isna(price) else float(price)}
+            for restaurant_name, category, veg, price in columns]
+
+def restaurant_metadata(restaurant_name):
+    """
+    Build the retrieval metadata of a restaurant document, which has no item fields.
+    """
+    return {"restaurant": restaurant_name, "category": None, "veg_nonveg": None, "price": None}
+
+@lru_cache(maxsize=None)
+def get_summary_model(model_name=SUMMARY_MODEL):
+    """
+    Create the Gemini model used for restaurant summaries on first use.
+    
+    google.generativeai is imported here rather than at module level, since loading cached
+    or prebuilt data never needs it.
+    
+    Parameters:
+        model_name (str): Name of the Gemini model. Default is SUMMARY_MODEL.
+    
+    Returns:
+        google.generativeai.GenerativeModel: The configured model.
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_TOKEN)
+    return genai.GenerativeModel(model_name)
+
+def fallback_summary(restaurant_name):
+    """
+    Build a deterministic restaurant summary for when no generated summary is available.
+    
+    Parameters:
+        restaurant_name (str): Cleaned name of the restaurant.
+        
+    Returns:
+        dict: Summary fields "main_information", "cuisines" and "operational_hours".
+    """
+    return {
+        "main_information": f"{restaurant_name} is a restaurant in Roorkee Locality.",
+        "cuisines": "unknown cuisines",
+        "operational_hours": "unknown hours",
     }
-    for pattern, replacement in synonyms.items():
-        text = re.sub(pattern, replacement, text)
-    return text
 
-def load_and_clean_menus_from_json(folder_path="menu"):
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls evenly to at most `rate` per second.
+    
+    Parameters:
+        rate (float): Maximum number of calls per second. 0 or None disables limiting.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        """
+        Block until the next call is allowed.
+        """
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+SUMMARY_FIELDS = {
+    "main_information": re.compile(r"main\s*information", re.I),
+    "cuisines": re.compile(r"cuisines?", re.I),
+    "operational_hours": re.compile(r"operational\s*hours|opening\s*hours|hours", re.I),
+}
+SUMMARY_LINE = re.compile(r"^[\s*#_-]*([a-z ]+?)[\s*_]*:[\s*_]*(.*)$", re.I)
+
+def parse_summary_response(response, restaurant_name):
+    """
+    Parse a generated restaurant summary into its fields.
+    
+    Labels are matched case-insensitively anywhere in the response, ignoring markdown
+    emphasis, blank lines and extra lines. Fields missing from the response are taken
+    from the deterministic fallback summary.
+    
+    Parameters:
+        response (str): Text returned by the model.
+        restaurant_name (str): Cleaned name of the restaurant, used for missing fields.
+        
+    Returns:
+        dict: Summary fields "main_information", "cuisines" and "operational_hours".
+    """
+    summary = fallback_summary(restaurant_name)
+    found = set()
+    for line in (response or "").split("\n"):
+        match = SUMMARY_LINE.match(line)
+        if not match:
+            continue
+        label, value = match.group(1).strip(), match.group(2).strip(" *_")
+        for field, pattern in SUMMARY_FIELDS.items():
+            if field not in found and value and pattern.fullmatch(label):
+                summary[field] = value
+                found.add(field)
+                break
+    return summary
+
+def generate_restaurant_summary(restaurant_name, location, model=None, cache=None, offline=None,
+                                retries=SUMMARY_RETRIES, backoff=1.0, rate_limiter=None):
+    """
+    Get a short description, cuisines and operational hours for a restaurant.
+    
+    Summaries are served from the summary cache when a fresh entry exists; otherwise they are
+    generated with the Gemini model and cached. In offline mode no generation is attempted and
+    any cached entry (even an expired one) or a deterministic fallback is used instead.
+    Failed generations are retried with exponential backoff; if every attempt fails, a stale
+    cache entry or the deterministic fallback is returned instead of failing the whole load.
+    
+    Parameters:
+        restaurant_name (str): Cleaned name of the restaurant.
+        location (str): Cleaned location of the restaurant.
+        model (object, optional): Object with a generate_content(prompt) method returning a
+                                  response with a .text attribute. Defaults to the Gemini model.
+        cache (SummaryCache, optional): Cache to use. Defaults to the shared on-disk cache.
+        offline (bool, optional): Whether to skip generation. Defaults to OFFLINE_SUMMARIES.
+        retries (int): Number of retries after a failed generation. Defaults to SUMMARY_RETRIES.
+        backoff (float): Base delay in seconds between retries, doubled on every attempt.
+        rate_limiter (RateLimiter, optional): Limiter to wait on before each request.
+        
+    Returns:
+        dict: Summary fields "main_information", "cuisines" and "operational_hours".
+    """
+    cache = cache if cache is not None else get_default_cache()
+    offline = OFFLINE_SUMMARIES if offline is None else offline
+    telemetry = get_telemetry()
+    summary = cache.get(restaurant_name, location)
+    if summary is not None:
+        telemetry.count("summaries_total", source="cache")
+        return summary
+    if offline:
+        telemetry.count("summaries_total", source="offline")
+        return cache.get_any(restaurant_name, location) or fallback_summary(restaurant_name)
+
+    if model is None:
+        model = get_summary_model()
+    # Prompt to query
+    prompt = f'''Please provide only the information asked in the given prompt and in the format specified : Provide brief and main information about {restaurant_name}, the restaurant, in Roorkee Locality, and give its operational hours and the name of the cuisines it serves.
+    format of the response should be :
+    Main Information: ...
+    Cuisines: ...
+    Operational Hours: 8 AM to 11 PM '''
+    for attempt in range(retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        try:
+            with telemetry.span("generate_summary"):
+                response = model.generate_content(prompt).text
+            break
+        except Exception as e:
+            if attempt == retries:
+                # Serve a stale entry or the fallback rather than failing the whole load
+                print(f"❌ Failed to generate summary for {restaurant_name}: {e}")
+                telemetry.count("summaries_total", source="fallback")
+                return cache.get_any(restaurant_name, location) or fallback_summary(restaurant_name)
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+    summary = parse_summary_response(response, restaurant_name)
+    cache.set(restaurant_name, location, summary)
+    telemetry.count("summaries_total", source="generated")
+    return summary
+
+def read_restaurant(data):
+    """
+    Extract the cleaned restaurant name, location and contact from a loaded menu file.
+    
+    Parameters:
+        data (dict): Parsed contents of a JSON menu file.
+        
+    Returns:
+        tuple: Cleaned (restaurant_name, location, contact).
+    """
+    restaurant = data.get("restaurant", {})
+    return (clean_text(restaurant.get("name", "")),
+            clean_text(restaurant.get("location", "")),
+            clean_text(restaurant.get("contact", "")))
+
+def build_restaurant_document(restaurant_name, location, contact, summary):
+    """
+    Build the descriptive document for a restaurant from its details and generated summary.
+    
+    Parameters:
+        restaurant_name (str): Cleaned name of the restaurant.
+        location (str): Cleaned location of the restaurant.
+        contact (str): Cleaned contact number of the restaurant.
+        summary (dict): Summary fields as returned by generate_restaurant_summary.
+        
+    Returns:
+        str: The restaurant document.
+    """
+    return f"""{restaurant_name} is at {location}.
+{summary["main_information"]}
+their contact number is {contact}.
+{restaurant_name} serves {summary["cuisines"]} and is open from {summary["operational_hours"]}.
+"""
+
+def build_item_documents(data, restaurant_name):
+    """
+    Build the descriptive documents for every menu item of a restaurant, item by item.
+    
+    This is the reference implementation of the column-wise clean_menu_frame and
+    build_documents_from_frame pipeline used during ingestion.
+    
+    Parameters:
+        data (dict): Parsed contents of a JSON menu file.
+        restaurant_name (str): Cleaned name of the restaurant.
+        
+    Returns:
+        list: One document string per menu item.
+    """
+    documents = []
+    for category_block in data.get("menu", []):
+        category_name = clean_text(category_block.get("category", ""))
+        
+        for item in category_block.get("items", []):
+            item_name = clean_text(item.get("name", ""))
+            description = apply_synonyms(clean_text(item.get("description", "")))
+            price = normalize_price(item.get("price", ""))
+            veg = clean_text(item.get("veg_nonveg", ""))
+            spice = clean_text(item.get("spice_level", ""))
+
+            full_text = f"""{restaurant_name} offers {item_name} in the category '{category_name}'.
+{item_name} is {description} for price {price} and type: {veg} with spice level: {spice}."""
+
+            documents.append(full_text)
+    return documents
+
+def load_and_clean_menu_records(files, model=None, cache=None, offline=None,
+                                max_workers=SUMMARY_CONCURRENCY, rate_limit=SUMMARY_RATE_LIMIT,
+                                menu_db=MENU_DB_PATH):
+    """
+    Load several restaurant menu JSON files, clean them, and generate descriptive information
+    together with retrieval metadata for every document.
+    
+    Restaurant summaries are generated as one batch on a bounded thread pool, optionally
+    rate limited, while the menu item documents are built on the calling thread, so cold
+    ingestion takes roughly as long as the slowest summary rather than the sum of all.
+    The cleaned items of these files are also written to the structured menu store.
+    
+    Parameters:
+        files (list): Paths to the JSON menu files.
+        model, cache, offline: Passed through to generate_restaurant_summary.
+        max_workers (int): Maximum number of summaries generated concurrently.
+        rate_limit (float): Maximum summary requests per second, 0 for no limit.
+        menu_db (str, optional): Path of the structured menu store. None skips writing it.
+        
+    Returns:
+        list: For each file, in order, a (documents, metadata) tuple: the restaurant document
+              followed by one document per menu item, and for each document a dict with its
+              "restaurant", "category", "veg_nonveg" and "price" (None for the restaurant
+              document's item fields).
+    """
+    telemetry = get_telemetry()
+    with telemetry.span("ingest") as span:
+        records = _load_and_clean_menu_records(files, model, cache, offline, max_workers, rate_limit, menu_db)
+        n_documents = sum(len(documents) for documents, _ in records)
+        span.set(files=len(files), documents=n_documents)
+    telemetry.count("ingested_files_total", len(files))
+    telemetry.count("ingested_documents_total", n_documents)
+    return records
+
+def _load_and_clean_menu_records(files, model, cache, offline, max_workers, rate_limit, menu_db):
+    if model is None and not (OFFLINE_SUMMARIES if offline is None else offline):
+        model = get_summary_model()
+    rate_limiter = RateLimiter(rate_limit)
+    menus = []
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            menus.append(json.load(f))
+    restaurants = [read_restaurant(data) for data in menus]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = [
+            executor.submit(generate_restaurant_summary, name, location, model=model, cache=cache,
+                            offline=offline, rate_limiter=rate_limiter)
+            for name, location, _ in restaurants
+        ]
+        # Item documents do not depend on the summaries, so build them while requests are in flight
+        frame = clean_menu_frame(flatten_menus(menus))
+        item_documents = [[] for _ in menus]
+        item_metadata = [[] for _ in menus]
+        columns = zip(frame["menu_index"], build_documents_from_frame(frame), build_metadata_from_frame(frame))
+        for menu_index, document, metadata in columns:
+            item_documents[menu_index].append(document)
+            item_metadata[menu_index].append(metadata)
+        if menu_db:
+            save_menus([(Path(file).name,) + restaurant for file, restaurant in zip(files, restaurants)],
+                       frame, menu_db)
+        summaries = [future.result() for future in pending]
+
+    return [
+        ([build_restaurant_document(name, location, contact, summary)] + items,
+         [restaurant_metadata(name)] + metadata)
+        for (name, location, contact), summary, items, metadata
+        in zip(restaurants, summaries, item_documents, item_metadata)
+    ]
+
+def load_and_clean_menu_files(files, **kwargs):
+    """
+    Load several restaurant menu JSON files, clean them, and generate descriptive information.
+    
+    Parameters:
+        files (list): Paths to the JSON menu files.
+        **kwargs: Passed through to load_and_clean_menu_records.
+        
+    Returns:
+        list: For each file, in order, a list with the restaurant document followed by
+              one document per menu item.
+    """
+    return [documents for documents, _ in load_and_clean_menu_records(files, **kwargs)]
+
+def load_and_clean_menu_file(file, model=None, cache=None, offline=None):
+    """
+    Load a single restaurant menu JSON file, clean it, and generate descriptive information.
+    
+    Parameters:
+        file (str or Path): Path to the JSON menu file.
+        model, cache, offline: Passed through to generate_restaurant_summary.
+        
+    Returns:
+        list: A list of strings describing the restaurant followed by each of its menu items.
+    """
+    return load_and_clean_menu_files([file], model=model, cache=cache, offline=offline)[0]
+
+def write_database(documents, sources, path="database.csv"):
+    """
+    Write all documents to the CSV database, along with the menu file each came from.
+    
+    Parameters:
+        documents (list): List of document strings.
+        sources (list): Menu file name each document was generated from, aligned with documents.
+        path (str): Path of the CSV database. Defaults to "database.csv".
+    """
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Item", "Source"])
+        for doc, source in zip(documents, sources):
+            writer.writerow([doc, source])
+
+def update_database(documents, sources, stale_sources, path="database.csv"):
+    """
+    Replace the rows of the given menu files in the CSV database, keeping all other rows as-is.
+    
+    Rows belonging to any of stale_sources are dropped and the new documents are appended.
+    If the existing database has no "Source" column, it is rewritten from scratch instead.
+    
+    Parameters:
+        documents (list): New document strings for the stale menu files.
+        sources (list): Menu file name each new document was generated from.
+        stale_sources (set): Menu file names whose existing rows should be replaced.
+        path (str): Path of the CSV database. Defaults to "database.csv".
+        
+    Returns:
+        bool: True if the database was updated in place, False if it could not be
+              (missing file or legacy layout) and must be rewritten by the caller.
+    """
+    if not Path(path).exists():
+        return False
+    with open(path, "r", newline="") as file:
+        rows = list(csv.reader(file))
+    if not rows or rows[0] != ["Item", "Source"]:
+        return False
+    kept = [row for row in rows[1:] if len(row) == 2 and row[1] not in stale_sources]
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Item", "Source"])
+        writer.writerows(kept)
+        for doc, source in zip(documents, sources):
+            writer.writerow([doc, source])
+    return True
+
+@traced("load_and_clean_menus_from_json")
+def load_and_clean_menus_from_json(folder_path="menu", model=None, cache=None, offline=None):
     """
     Load restaurant menu data from JSON files, clean it, and generate descriptive information.
     
@@ -84,55 +628,18 @@ def load_and_clean_menus_from_json(folder_path="menu"):
     
     Parameters:
         folder_path (str): Path to the folder containing JSON menu files. Defaults to "menu".
+        model, cache, offline: Passed through to generate_restaurant_summary, e.g. to use a
+                               local stub model or skip generation entirely.
         
     Returns:
         list: A list of strings containing descriptive information about restaurants and their menu items.
     """
     documents = []
-    for file in Path(folder_path).glob("*.json"):
-        with open(file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        restaurant_name = clean_text(data.get("restaurant", {}).get("name", ""))
-        location = clean_text(data.get("restaurant", {}).get("location", ""))
-        contact = clean_text(data.get("restaurant", {}).get("contact", ""))
-        
-        genai.configure(api_key=GEMINI_TOKEN)
-        model = genai.GenerativeModel('gemma-3-27b-it')
-        # Prompt to query
-        prompt = f'''Please provide only the information asked in the given prompt and in the format specified : Provide brief and main information about {restaurant_name}, the restaurant, in Roorkee Locality, and give its operational hours and the name of the cuisines it serves.
-        format of the response should be :
-        Main Information: ...
-        Cuisines: ...
-        Operational Hours: 8 AM to 11 PM '''
-        response = model.generate_content(prompt).text
-        lines = response.split('\n')
-        main_information = lines[0].replace("Main Information: ", "").strip()
-        cuisines = lines[1].replace("Cuisines: ", "").strip()
-        operational_hours = lines[2].replace("Operational Hours: ", "").strip()
-        resto_info = f"""{restaurant_name} is at {location}.
-{main_information}
-their contact number is {contact}.
-{restaurant_name} serves {cuisines} and is open from {operational_hours}.
-"""
-        documents.append(resto_info)
-        for category_block in data.get("menu", []):
-            category_name = clean_text(category_block.get("category", ""))
-            
-            for item in category_block.get("items", []):
-                item_name = clean_text(item.get("name", ""))
-                description = apply_synonyms(clean_text(item.get("description", "")))
-                price = normalize_price(item.get("price", ""))
-                veg = clean_text(item.get("veg_nonveg", ""))
-                spice = clean_text(item.get("spice_level", ""))
-
-                full_text = f"""{restaurant_name} offers {item_name} in the category '{category_name}'.
-{item_name} is {description} for price {price} and type: {veg} with spice level: {spice}."""
-
-                documents.append(full_text)
-    with open("database.csv", "w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Item"])  
-        for doc in documents:
-            writer.writerow([doc])
+    sources = []
+    files = list(Path(folder_path).glob("*.json"))
+    for file, file_documents in zip(files, load_and_clean_menu_files(files, model=model, cache=cache, offline=offline)):
+        documents.extend(file_documents)
+        sources.extend([file.name] * len(file_documents))
+    write_database(documents, sources)
+    retain_menus([file.name for file in files])
     return documents
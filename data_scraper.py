@@ -8,37 +8,44 @@ The data is saved in JSON format for further processing.
 """
 
 import time
-import re
 import os
-import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from pathlib import Path
+from menu_parser import parse_menu_html, save_snapshot
+from telemetry import get_telemetry
 
-def scrape_zomato(url, filename="zomato_menu.json"):
+READ_MORE_XPATH = "//span[contains(translate(text(), 'READ MORE', 'read more'), 'read more')]"
+# Seconds to wait for a page and its expanded descriptions before giving up
+PAGE_TIMEOUT = 30
+
+@lru_cache(maxsize=None)
+def get_driver_path():
     """
-    Scrape restaurant menu data from a Zomato restaurant page.
+    Download the Chrome driver once per process and reuse its path afterwards.
     
-    This function uses Selenium to navigate to a Zomato restaurant page,
-    expand all "Read More" buttons, and extract detailed information about
-    the restaurant and its menu items using BeautifulSoup.
+    Returns:
+        str: Path to the installed Chrome driver executable.
+    """
+    return ChromeDriverManager().install()
+
+def create_driver(page_timeout=PAGE_TIMEOUT):
+    """
+    Start a headless Chrome browser configured for scraping Zomato pages.
     
     Parameters:
-        url (str): The URL of the Zomato restaurant page to scrape.
-        filename (str): The name of the JSON file to save the data to.
-                        Default is "zomato_menu.json".
+        page_timeout (float): Seconds to wait for a page load before raising.
+                              Default is PAGE_TIMEOUT.
     
     Returns:
-        None: The function saves the scraped data to a JSON file and prints
-              confirmation messages to the console.
-    
-    The scraped data includes:
-    - Restaurant information (name, location, contact)
-    - Menu categories
-    - Menu items with details (name, price, description, vegetarian status, spice level)
+        webdriver.Chrome: The browser driver. The caller is responsible for quitting it.
     """
     # Configure Chrome options for headless browsing
     chrome_options = Options()
@@ -50,115 +57,124 @@ def scrape_zomato(url, filename="zomato_menu.json"):
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
 
     # Initialize the Chrome driver
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    driver.get(url)
-    time.sleep(4)  # Wait for page to load completely
-    
-    # Expand all "Read More" buttons to get complete descriptions
-    try:
-        while True:
-            read_more_buttons = driver.find_elements(By.XPATH, "//span[contains(translate(text(), 'READ MORE', 'read more'), 'read more')]")
-            if not read_more_buttons:
-                break
-            for btn in read_more_buttons:
-                try:
-                    driver.execute_script("arguments[0].click();", btn)
-                except Exception:
-                    pass
-            time.sleep(0.5)
-    except Exception:
-        pass
+    driver = webdriver.Chrome(service=Service(get_driver_path()), options=chrome_options)
+    driver.set_page_load_timeout(page_timeout)
+    return driver
 
-    # Parse the page content with BeautifulSoup
-    soup = BeautifulSoup(driver.page_source, "lxml")
-    driver.quit()
+def load_page(driver, url, timeout=PAGE_TIMEOUT):
+    """
+    Navigate to a restaurant page and expand all "Read More" buttons.
     
-    # Extract restaurant information
-    restaurant_info = {}
-    rest_name = soup.find("h1")
-    restaurant_info["name"] = rest_name.get_text(strip=True) if rest_name else ""
+    Instead of sleeping for fixed intervals, this waits explicitly for the restaurant
+    heading to render and, after each round of clicks, for the expanded buttons to go away.
     
-    location = ""
-    loc_tag = soup.find("div", class_=re.compile("sc-clNaTc"))
-    if loc_tag:
-        location = loc_tag.get_text(strip=True)
-    restaurant_info["location"] = location
+    Parameters:
+        driver (webdriver.Chrome): The browser driver to use.
+        url (str): The URL of the restaurant page.
+        timeout (float): Overall seconds allowed for loading and expanding the page.
     
-    contact = ""
-    phone_tag = soup.find("a", href=re.compile(r"tel:"))
-    if phone_tag:
-        contact = phone_tag.get_text(strip=True)
-    restaurant_info["contact"] = contact
-
-    # Extract menu data
-    menu_data = []
-    menu_sections = soup.find_all("section", class_=re.compile("sc-bZVNgQ"))
-    for section in menu_sections:
-        cat_tag = section.find("h4")
-        category = cat_tag.get_text(strip=True) if cat_tag else ""
-        category_data = {"category": category, "items": []}
-        
-        # Extract items in each category
-        item_blocks = section.find_all("div", class_=re.compile("sc-jhLVlY"))
-        for item in item_blocks:
-            # Determine vegetarian status
-            veg_type = "Unknown"
-            veg_div = item.find("div", class_=re.compile("sc-gcpVEs"))
-            if veg_div and veg_div.has_attr("type"):
-                if veg_div["type"] == "veg":
-                    veg_type = "Veg"
-                elif veg_div["type"] == "non-veg":
-                    veg_type = "Non-Veg"
-            
-            # Extract item details
-            name_tag = item.find("h4", class_=re.compile("sc-cGCqpu"))
-            name = name_tag.get_text(strip=True) if name_tag else ""
-            
-            price_tag = item.find("span", class_=re.compile("sc-17hyc2s-1"))
-            price = price_tag.get_text(strip=True) if price_tag else ""
-            
-            # Extract and clean description
-            desc_tag = item.find("p", class_=re.compile("sc-gsxalj"))
-            desc = ""
-            if desc_tag:
-                for rm in desc_tag.find_all("span", string=re.compile("read more", re.I)):
-                    rm.extract()
-                desc = desc_tag.get_text(" ", strip=True)
-            
-            # Determine spice level based on description keywords
-            spice_level = "Spicy" if re.search(r"spicy|fiery|peri peri|chilli|hot", desc, re.I) else "Normal"
-            
-            # Add item to category if it has a name
-            if name:
-                category_data["items"].append({
-                    "name": name,
-                    "price": price,
-                    "description": desc,
-                    "veg_nonveg": veg_type,
-                    "spice_level": spice_level
-                })
-        
-        menu_data.append(category_data)
+    Returns:
+        str: The HTML source of the fully expanded page.
+    """
+    deadline = time.monotonic() + timeout
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.TAG_NAME, "h1")))
     
-    # Print summary of scraped data
-    print("Restaurant:", restaurant_info["name"])
-    print("Location:", restaurant_info["location"])
-    print("Contact:", restaurant_info["contact"])
-    print("Sample menu items:", menu_data[0]["items"][:3])
+    # Expand all "Read More" buttons to get complete descriptions
+    while time.monotonic() < deadline:
+        read_more_buttons = driver.find_elements(By.XPATH, READ_MORE_XPATH)
+        if not read_more_buttons:
+            break
+        for btn in read_more_buttons:
+            try:
+                driver.execute_script("arguments[0].click();", btn)
+            except Exception:
+                pass
+        remaining = max(0.1, deadline - time.monotonic())
+        try:
+            WebDriverWait(driver, min(remaining, 5), poll_frequency=0.1).until(
+                lambda d: len(d.find_elements(By.XPATH, READ_MORE_XPATH)) < len(read_more_buttons)
+            )
+        except TimeoutException:
+            # Remaining buttons do not expand; keep what has been loaded
+            break
+    return driver.page_source
 
+def save_menu(final_data, filename):
+    """
+    Save extracted menu data to a JSON file in the menu folder.
+    
+    Parameters:
+        final_data (dict): The menu data as returned by menu_parser.parse_menu_html.
+        filename (str): The name of the JSON file to save the data to.
+    
+    Returns:
+        str: Path of the saved file.
+    """
     # Ensure directory exists and prepare filepath
     os.makedirs("menu", exist_ok=True)
     filename = filename.replace(".csv", ".json")
     filepath = os.path.join("menu", filename)
 
-    # Prepare final data structure
-    final_data = {
-        "restaurant": restaurant_info,
-        "menu": menu_data
-    }
-
     # Save data to JSON file
     with open(filepath, 'w') as f:
         import json
         json.dump(final_data, f, indent=4)
+    return filepath
+
+def scrape_zomato(url, filename="zomato_menu.json", driver=None, timeout=PAGE_TIMEOUT, snapshot_dir=None):
+    """
+    Scrape restaurant menu data from a Zomato restaurant page.
+    
+    This function uses Selenium to navigate to a Zomato restaurant page,
+    expand all "Read More" buttons, and extract detailed information about
+    the restaurant and its menu items with menu_parser.parse_menu_html.
+    
+    Parameters:
+        url (str): The URL of the Zomato restaurant page to scrape.
+        filename (str): The name of the JSON file to save the data to.
+                        Default is "zomato_menu.json".
+        driver (webdriver.Chrome, optional): An existing browser to reuse. If omitted, a new
+                                             headless browser is started and quit afterwards.
+        timeout (float): Seconds allowed for loading and expanding the page.
+                         Default is PAGE_TIMEOUT.
+        snapshot_dir (str, optional): If given, the expanded page HTML is also saved there as
+                                      "<name>.html.gz", so it can be re-parsed later with
+                                      menu_parser.parse_saved_pages without browsing again.
+    
+    Returns:
+        None: The function saves the scraped data to a JSON file and prints
+              confirmation messages to the console.
+    
+    The scraped data includes:
+    - Restaurant information (name, location, contact)
+    - Menu categories
+    - Menu items with details (name, price, description, vegetarian status, spice level)
+    """
+    telemetry = get_telemetry()
+    own_driver = driver is None
+    if own_driver:
+        with telemetry.span("scrape_start_browser"):
+            driver = create_driver(timeout)
+    try:
+        with telemetry.span("scrape_load_page"):
+            html = load_page(driver, url, timeout)
+    finally:
+        if own_driver:
+            driver.quit()
+    if snapshot_dir:
+        save_snapshot(html, Path(snapshot_dir) / (Path(filename.replace(".csv", ".json")).stem + ".html.gz"))
+    with telemetry.span("scrape_parse"):
+        final_data = parse_menu_html(html)
+    telemetry.count("scraped_items_total", sum(len(category["items"]) for category in final_data["menu"]))
+    restaurant_info = final_data["restaurant"]
+    menu_data = final_data["menu"]
+
+    # Print summary of scraped data
+    print("Restaurant:", restaurant_info["name"])
+    print("Location:", restaurant_info["location"])
+    print("Contact:", restaurant_info["contact"])
+    print("Sample menu items:", menu_data[0]["items"][:3] if menu_data else [])
+
+    filepath = save_menu(final_data, filename)
     print(f"✅ Saved to {filepath}")
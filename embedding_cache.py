@@ -0,0 +1,100 @@
+"""
+Query Embedding Cache
+
+This module wraps a query embedder with an in-memory LRU cache from normalized query text to
+its embedding. Users repeat popular questions, and follow-ups about the same dish or
+restaurant are often rewritten into the same standalone query, so many queries can skip the
+encoder entirely.
+"""
+
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from dotenv import load_dotenv
+from telemetry import get_telemetry
+
+# Load environment variables
+load_dotenv()
+
+QUERY_CACHE_SIZE = int(os.getenv("query_cache_size", 4096))
+
+def normalize_query(text):
+    """
+    Normalize a query for use as a cache key.
+
+    The embedding model is uncased and ignores repeated whitespace, so lowercasing and
+    collapsing whitespace does not change the embedding.
+
+    Parameters:
+        text (str): The query text.
+
+    Returns:
+        str: The lowercased query with whitespace collapsed.
+    """
+    return " ".join(text.lower().split())
+
+class CachedEmbedder:
+    """
+    LRU cache in front of an embedder, with the same encode interface.
+
+    Parameters:
+        embedder: The wrapped embedder, e.g. a SentenceTransformer or OnnxQueryEmbedder.
+        max_entries (int): Maximum number of cached embeddings. Default is QUERY_CACHE_SIZE.
+    """
+
+    def __init__(self, embedder, max_entries=QUERY_CACHE_SIZE):
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self):
+        """
+        Return the dimension of the embeddings of the wrapped embedder.
+        """
+        return self.embedder.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        """
+        Embed texts, encoding only those not already cached.
+
+        Parameters:
+            texts (list): The texts to embed.
+            batch_size (int): Number of texts per forward pass of the wrapped embedder.
+            **kwargs: Passed through to the wrapped embedder.
+
+        Returns:
+            numpy.ndarray: The float32 embeddings, one row per text.
+        """
+        keys = [normalize_query(text) for text in texts]
+        vectors = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    vectors[i] = vector
+        missing = list(dict.fromkeys(key for key, vector in zip(keys, vectors) if vector is None))
+        if missing:
+            encoded = np.asarray(self.embedder.encode(missing, batch_size=batch_size, **kwargs), dtype=np.float32)
+            new = dict(zip(missing, encoded))
+            with self._lock:
+                for key, vector in new.items():
+                    self._entries[key] = vector
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            vectors = [new[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        missed = set(missing)
+        misses = sum(1 for key in keys if key in missed)
+        with self._lock:
+            self.misses += misses
+            self.hits += len(keys) - misses
+        get_telemetry().count("query_embedding_cache_total", len(keys) - misses, result="hit")
+        get_telemetry().count("query_embedding_cache_total", misses, result="miss")
+        if not vectors:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack(vectors)
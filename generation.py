@@ -0,0 +1,252 @@
+"""
+Answer Generation Backends
+
+This module provides the language model backends the chatbot answers with, behind a common
+interface: generate(prompt) returns the full answer and stream(prompt) yields it in text
+chunks. GeminiGenerator calls the Gemini API; LlamaGenerator runs a local GGUF model with
+llama_cpp, so the chatbot also works offline; StubGenerator returns deterministic answers
+for benchmarks. Local models are loaded once and kept warm in a small pool, with the
+constant prompt prefix pre-evaluated into the KV cache and a bounded request queue, so
+concurrent sessions wait their turn instead of thrashing one instance.
+"""
+
+import os
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+LLAMA_MODEL_PATH = os.getenv("llama_model_path")
+LLAMA_N_CTX = int(os.getenv("llama_n_ctx", 4096))
+LLAMA_N_THREADS = int(os.getenv("llama_n_threads", os.cpu_count() or 4))
+LLAMA_POOL_SIZE = int(os.getenv("llama_pool_size", 1))
+LLAMA_MAX_QUEUE = int(os.getenv("llama_max_queue", 8))
+LLAMA_QUEUE_TIMEOUT = float(os.getenv("llama_queue_timeout", 120))
+LLAMA_MAX_TOKENS = int(os.getenv("llama_max_tokens", 512))
+LLAMA_CACHE_BYTES = int(os.getenv("llama_cache_bytes", 1 << 30))
+# Simulated latency of the stub backend, e.g. to load test with realistic generation times
+STUB_FIRST_TOKEN_SECONDS = float(os.getenv("stub_first_token_seconds", 0))
+STUB_SECONDS_PER_CHUNK = float(os.getenv("stub_seconds_per_chunk", 0))
+
+class GeneratorBusy(RuntimeError):
+    """
+    Raised when a request cannot be queued or does not get a model in time.
+    """
+
+class GeminiGenerator:
+    """
+    Answer generation through the Gemini API.
+
+    Parameters:
+        model (google.generativeai.GenerativeModel): The configured Gemini model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def count_tokens(self, text):
+        """
+        Estimate the number of tokens of a text at about four characters per token; the
+        Gemini tokenizer is only available through a network call.
+
+        Parameters:
+            text (str): The text to measure.
+
+        Returns:
+            int: The estimated token count.
+        """
+        return (len(text) + 3) // 4
+
+    def generate(self, prompt):
+        """
+        Generate the full response to a prompt.
+
+        Parameters:
+            prompt (str): The prompt for the language model.
+
+        Returns:
+            str: The response text.
+        """
+        return self.model.generate_content(prompt).text.strip()
+
+    def stream(self, prompt):
+        """
+        Generate the response to a prompt as a stream of text chunks.
+
+        Parameters:
+            prompt (str): The prompt for the language model.
+
+        Yields:
+            str: Successive chunks of the response text.
+        """
+        for chunk in self.model.generate_content(prompt, stream=True):
+            # Chunks without text (e.g. safety or finish metadata) raise on .text
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+class StubGenerator:
+    """
+    Deterministic offline stand-in for a language model, for benchmarks and load tests.
+
+    The answer is the first line of the context after the prompt's "Context:" marker, so it
+    depends only on the prompt, and it is produced after a fixed, configurable latency.
+
+    Parameters:
+        first_token_seconds (float): Delay before the first chunk. Default is the
+                                     stub_first_token_seconds setting, 0 if unset.
+        seconds_per_chunk (float): Delay between chunks. Default is the
+                                   stub_seconds_per_chunk setting, 0 if unset.
+        chunk_words (int): Number of words per streamed chunk. Default is 4.
+    """
+
+    def __init__(self, first_token_seconds=STUB_FIRST_TOKEN_SECONDS, seconds_per_chunk=STUB_SECONDS_PER_CHUNK,
+                 chunk_words=4):
+        self.first_token_seconds = first_token_seconds
+        self.seconds_per_chunk = seconds_per_chunk
+        self.chunk_words = chunk_words
+
+    def count_tokens(self, text):
+        """
+        Estimate the number of tokens of a text at about four characters per token.
+        """
+        return (len(text) + 3) // 4
+
+    def _answer(self, prompt):
+        context = prompt.split("Context:", 1)[-1].strip().splitlines()
+        return context[0] if context else "I don't know"
+
+    def generate(self, prompt):
+        """
+        Return the deterministic answer to a prompt after the configured latency.
+        """
+        return "".join(self.stream(prompt)).strip()
+
+    def stream(self, prompt):
+        """
+        Yield the deterministic answer to a prompt in chunks of chunk_words words.
+        """
+        words = self._answer(prompt).split(" ")
+        time.sleep(self.first_token_seconds)
+        for i in range(0, len(words), self.chunk_words):
+            if i:
+                time.sleep(self.seconds_per_chunk)
+            yield (" " if i else "") + " ".join(words[i:i + self.chunk_words])
+
+class LlamaGenerator:
+    """
+    Answer generation with local GGUF models run by llama_cpp, kept warm in a pool.
+
+    Every model instance is loaded once. If a warm prefix is given (the constant instructions
+    at the start of every prompt), it is evaluated once per instance at start-up and kept in
+    an in-memory KV-cache, so each request only evaluates the tokens after it. Requests take
+    an instance from the pool and wait up to queue_timeout for one; at most max_queue
+    requests wait at a time.
+
+    Parameters:
+        model_path (str): Path of the GGUF model file. Default is the llama_model_path setting.
+        n_ctx (int): Context size in tokens. Default is the llama_n_ctx setting.
+        n_threads (int): CPU threads shared by the pool. Default is the llama_n_threads setting.
+        pool_size (int): Number of model instances. Default is the llama_pool_size setting.
+        max_queue (int): Maximum number of requests waiting for an instance.
+        queue_timeout (float): Seconds a request waits for an instance before failing.
+        max_tokens (int): Maximum number of generated tokens per answer.
+        cache_bytes (int): Size of each instance's KV-cache, in bytes.
+        warm_prefix (str, optional): Constant prompt prefix to pre-evaluate.
+        factory (callable, optional): Function creating a model instance from the llama_cpp
+                                      keyword arguments. Default is llama_cpp.Llama.
+    """
+
+    def __init__(self, model_path=LLAMA_MODEL_PATH, n_ctx=LLAMA_N_CTX, n_threads=LLAMA_N_THREADS,
+                 pool_size=LLAMA_POOL_SIZE, max_queue=LLAMA_MAX_QUEUE, queue_timeout=LLAMA_QUEUE_TIMEOUT,
+                 max_tokens=LLAMA_MAX_TOKENS, cache_bytes=LLAMA_CACHE_BYTES, warm_prefix=None, factory=None):
+        if not model_path:
+            raise ValueError("Set llama_model_path in .env to use the llama backend")
+        # llama_cpp is only imported when the local backend is actually used
+        from llama_cpp import Llama, LlamaRAMCache
+        factory = factory or Llama
+        self.pool_size = max(1, pool_size)
+        self.queue_timeout = queue_timeout
+        self.max_tokens = max_tokens
+        self._instances = queue.Queue()
+        # Admits the running requests plus at most max_queue waiting ones
+        self._slots = threading.BoundedSemaphore(self.pool_size + max(0, max_queue))
+        for _ in range(self.pool_size):
+            llm = factory(model_path=model_path, n_ctx=n_ctx,
+                          n_threads=max(1, n_threads // self.pool_size), verbose=False)
+            llm.set_cache(LlamaRAMCache(capacity_bytes=cache_bytes))
+            if warm_prefix:
+                # Generating one token stores the KV state of the prefix in the cache
+                llm(warm_prefix, max_tokens=1)
+            self._instances.put(llm)
+        # Pooled instances may be generating on other threads, so token counting uses its
+        # own instance that only loads the vocabulary
+        self._tokenizer = factory(model_path=model_path, vocab_only=True, verbose=False)
+
+    def count_tokens(self, text):
+        """
+        Count the tokens of a text with the model's tokenizer.
+
+        Parameters:
+            text (str): The text to measure.
+
+        Returns:
+            int: The token count.
+        """
+        return len(self._tokenizer.tokenize(text.encode("utf-8"), add_bos=False))
+
+    @contextmanager
+    def _instance(self):
+        """
+        Borrow a model instance from the pool for the duration of one request.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise GeneratorBusy("Too many pending requests for the local model")
+        try:
+            try:
+                llm = self._instances.get(timeout=self.queue_timeout)
+            except queue.Empty:
+                raise GeneratorBusy("Timed out waiting for a local model instance") from None
+            try:
+                yield llm
+            finally:
+                self._instances.put(llm)
+        finally:
+            self._slots.release()
+
+    def generate(self, prompt):
+        """
+        Generate the full response to a prompt.
+
+        Parameters:
+            prompt (str): The prompt for the language model.
+
+        Returns:
+            str: The response text.
+        """
+        with self._instance() as llm:
+            return llm(prompt, max_tokens=self.max_tokens)["choices"][0]["text"].strip()
+
+    def stream(self, prompt):
+        """
+        Generate the response to a prompt as a stream of text chunks. The model instance is
+        held until the stream is exhausted or closed.
+
+        Parameters:
+            prompt (str): The prompt for the language model.
+
+        Yields:
+            str: Successive chunks of the response text.
+        """
+        with self._instance() as llm:
+            for chunk in llm(prompt, max_tokens=self.max_tokens, stream=True):
+                text = chunk["choices"][0]["text"]
+                if text:
+                    yield text
@@ -0,0 +1,316 @@
+"""
+Persistent Index Store
+
+This module persists the artifacts produced by the retrieval pipeline - the cleaned document
+texts, their float32 embeddings, the serialized FAISS index and the BM25 lexical index - in a
+directory next to database.csv. Artifacts are keyed by a content hash of the menu files and the name of the
+embedding model, so they can be loaded from disk in milliseconds and are only rebuilt when
+the inputs actually change.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import faiss
+from pathlib import Path
+from lexical_index import BM25Index
+
+# Directory holding the persisted artifacts, alongside database.csv
+INDEX_DIR = "index_store"
+MANIFEST_FILE = "manifest.json"
+DOCUMENTS_FILE = "documents.json"
+SOURCES_FILE = "sources.json"
+METADATA_FILE = "metadata.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+FAISS_FILE = "faiss.index"
+LEXICAL_FILE = "bm25.npz"
+# Rows of embeddings copied at a time when saving them
+EMBEDDING_WRITE_ROWS = 65536
+
+def file_fingerprints(folder_path="menu"):
+    """
+    Compute a content hash for each JSON menu file in a folder.
+
+    Parameters:
+        folder_path (str): Path to the folder containing JSON menu files. Defaults to "menu".
+
+    Returns:
+        dict: Mapping of menu file name to the hex digest of its contents.
+    """
+    return {
+        file.name: hashlib.sha256(file.read_bytes()).hexdigest()
+        for file in sorted(Path(folder_path).glob("*.json"))
+    }
+
+def menu_fingerprint(folder_path="menu"):
+    """
+    Compute a content hash over all JSON menu files in a folder.
+
+    Parameters:
+        folder_path (str): Path to the folder containing JSON menu files. Defaults to "menu".
+
+    Returns:
+        str: Hex digest identifying the exact contents of the menu folder.
+    """
+    digest = hashlib.sha256()
+    for name, file_hash in file_fingerprints(folder_path).items():
+        digest.update(name.encode("utf-8"))
+        digest.update(file_hash.encode("utf-8"))
+    return digest.hexdigest()
+
+def documents_hash(documents):
+    """
+    Compute a content hash over a list of document strings.
+
+    Parameters:
+        documents (list): List of document strings.
+
+    Returns:
+        str: Hex digest identifying the documents and their order.
+    """
+    digest = hashlib.sha256()
+    for doc in documents:
+        digest.update(doc.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _write_atomic(path, write):
+    """
+    Write a file through a temporary path and move it into place, so readers never
+    observe a partially written artifact.
+
+    Parameters:
+        path (Path): Final location of the file.
+        write (callable): Function taking the temporary path and writing the content.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def load_manifest(store_dir=INDEX_DIR):
+    """
+    Load the manifest describing the persisted artifacts.
+
+    Parameters:
+        store_dir (str): Directory holding the persisted artifacts.
+
+    Returns:
+        dict: The manifest, or an empty dict if no store exists yet.
+    """
+    path = Path(store_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_manifest(manifest, store_dir):
+    """
+    Atomically write the manifest describing the persisted artifacts.
+
+    Parameters:
+        manifest (dict): The manifest to write.
+        store_dir (str): Directory holding the persisted artifacts.
+    """
+    path = Path(store_dir) / MANIFEST_FILE
+    _write_atomic(path, lambda p: p.write_text(json.dumps(manifest, indent=4), encoding="utf-8"))
+
+def save_documents(documents, fingerprint, store_dir=INDEX_DIR, sources=None, files=None, metadata=None):
+    """
+    Persist the cleaned documents together with the fingerprint of the menus they came from.
+
+    Parameters:
+        documents (list): List of document strings.
+        fingerprint (str): Content hash of the menu files, as returned by menu_fingerprint.
+        store_dir (str): Directory holding the persisted artifacts.
+        sources (list, optional): Menu file name each document was generated from, aligned
+                                  with documents. Required for incremental re-indexing.
+        files (dict, optional): Per-file fingerprints, as returned by file_fingerprints.
+        metadata (list, optional): Retrieval metadata dict for each document, aligned with
+                                   documents.
+    """
+    Path(store_dir).mkdir(parents=True, exist_ok=True)
+    path = Path(store_dir) / DOCUMENTS_FILE
+    _write_atomic(path, lambda p: p.write_text(json.dumps(documents), encoding="utf-8"))
+    metadata_path = Path(store_dir) / METADATA_FILE
+    if metadata is not None:
+        _write_atomic(metadata_path, lambda p: p.write_text(json.dumps(metadata), encoding="utf-8"))
+    elif metadata_path.exists():
+        metadata_path.unlink()
+    manifest = load_manifest(store_dir)
+    if sources is not None:
+        sources_path = Path(store_dir) / SOURCES_FILE
+        _write_atomic(sources_path, lambda p: p.write_text(json.dumps(sources), encoding="utf-8"))
+        manifest["files"] = files or {}
+    else:
+        manifest.pop("files", None)
+    manifest["menu_fingerprint"] = fingerprint
+    manifest["documents_hash"] = documents_hash(documents)
+    _save_manifest(manifest, store_dir)
+
+def load_records(store_dir=INDEX_DIR):
+    """
+    Load the persisted documents together with the menu file each one came from.
+
+    Parameters:
+        store_dir (str): Directory holding the persisted artifacts.
+
+    Returns:
+        tuple or None: (documents, sources, files, metadata) where files maps each menu file
+                       name to the fingerprint it was indexed at and metadata is the list of
+                       per-document metadata dicts (None if not stored), or None if no
+                       per-file records exist.
+    """
+    manifest = load_manifest(store_dir)
+    documents_path = Path(store_dir) / DOCUMENTS_FILE
+    sources_path = Path(store_dir) / SOURCES_FILE
+    if "files" not in manifest or not documents_path.exists() or not sources_path.exists():
+        return None
+    with open(documents_path, "r", encoding="utf-8") as f:
+        documents = json.load(f)
+    with open(sources_path, "r", encoding="utf-8") as f:
+        sources = json.load(f)
+    if len(documents) != len(sources):
+        return None
+    metadata = load_metadata(documents, store_dir)
+    return documents, sources, manifest["files"], metadata
+
+def load_metadata(documents, store_dir=INDEX_DIR):
+    """
+    Load the persisted per-document retrieval metadata if it matches the given documents.
+
+    Parameters:
+        documents (list): The documents the metadata is expected to describe.
+        store_dir (str): Directory holding the persisted artifacts.
+
+    Returns:
+        list or None: One metadata dict per document, or None if missing or stale.
+    """
+    manifest = load_manifest(store_dir)
+    path = Path(store_dir) / METADATA_FILE
+    if not path.exists() or manifest.get("documents_hash") != documents_hash(documents):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    return metadata if len(metadata) == len(documents) else None
+
+def load_documents(fingerprint, store_dir=INDEX_DIR):
+    """
+    Load persisted documents if they were built from menus matching the given fingerprint.
+
+    Parameters:
+        fingerprint (str): Content hash of the current menu files.
+        store_dir (str): Directory holding the persisted artifacts.
+
+    Returns:
+        list or None: The stored documents, or None if the store is missing or stale.
+    """
+    manifest = load_manifest(store_dir)
+    path = Path(store_dir) / DOCUMENTS_FILE
+    if manifest.get("menu_fingerprint") != fingerprint or not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_index(index, embeddings, documents, model_name, store_dir=INDEX_DIR, index_config=None):
+    """
+    Persist the document embeddings and FAISS index built from them.
+
+    Parameters:
+        index (faiss.Index): The FAISS index built from the embeddings.
+        embeddings (numpy.ndarray): The document embeddings.
+        documents (list): The documents the embeddings were computed from.
+        model_name (str): Name of the sentence transformer model used for embeddings.
+        store_dir (str): Directory holding the persisted artifacts.
+        index_config (str, optional): Description of the index type and metric.
+    """
+    Path(store_dir).mkdir(parents=True, exist_ok=True)
+    embeddings = np.asarray(embeddings)
+
+    def write_embeddings(p):
+        # Written in slices after the .npy header, so memory-mapped embeddings are never
+        # copied into memory all at once
+        with open(p, "wb") as f:
+            np.lib.format.write_array_header_1_0(f, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                                                     "fortran_order": False, "shape": embeddings.shape})
+            for start in range(0, len(embeddings), EMBEDDING_WRITE_ROWS):
+                rows = embeddings[start:start + EMBEDDING_WRITE_ROWS]
+                f.write(np.ascontiguousarray(rows, dtype=np.float32).data)
+
+    _write_atomic(Path(store_dir) / EMBEDDINGS_FILE, write_embeddings)
+    _write_atomic(Path(store_dir) / FAISS_FILE, lambda p: faiss.write_index(index, str(p)))
+    manifest = load_manifest(store_dir)
+    manifest["model_name"] = model_name
+    manifest["index_config"] = index_config
+    manifest["index_documents_hash"] = documents_hash(documents)
+    manifest["dimension"] = int(embeddings.shape[1])
+    manifest["count"] = int(embeddings.shape[0])
+    _save_manifest(manifest, store_dir)
+
+def load_index(documents, model_name, store_dir=INDEX_DIR, index_config=None):
+    """
+    Load the persisted FAISS index and memory-mapped embeddings if they match the inputs.
+
+    The index configuration only invalidates the FAISS index: embeddings computed with the
+    same model for the same documents are still returned, so the index can be rebuilt from
+    them without re-embedding.
+
+    Parameters:
+        documents (list): The documents the index is expected to cover.
+        model_name (str): Name of the sentence transformer model expected for embeddings.
+        store_dir (str): Directory holding the persisted artifacts.
+        index_config (str, optional): Expected description of the index type and metric.
+
+    Returns:
+        tuple or None: (faiss.Index, numpy.memmap) if the store is up to date, (None,
+                       numpy.memmap) if only the index configuration differs, otherwise None.
+    """
+    manifest = load_manifest(store_dir)
+    index_path = Path(store_dir) / FAISS_FILE
+    embeddings_path = Path(store_dir) / EMBEDDINGS_FILE
+    if (manifest.get("model_name") != model_name
+            or manifest.get("index_documents_hash") != documents_hash(documents)
+            or not embeddings_path.exists()):
+        return None
+    embeddings = np.load(embeddings_path, mmap_mode="r")
+    if manifest.get("index_config") != index_config or not index_path.exists():
+        return None, embeddings
+    return faiss.read_index(str(index_path)), embeddings
+
+def save_lexical(lexical, documents, store_dir=INDEX_DIR):
+    """
+    Persist the BM25 index built from the documents.
+
+    Parameters:
+        lexical (BM25Index): The BM25 index built from the documents.
+        documents (list): The documents the index was built from.
+        store_dir (str): Directory holding the persisted artifacts.
+    """
+    Path(store_dir).mkdir(parents=True, exist_ok=True)
+
+    def write_lexical(p):
+        # np.savez appends ".npz" to paths without it, so write through a file object
+        with open(p, "wb") as f:
+            lexical.save(f)
+
+    _write_atomic(Path(store_dir) / LEXICAL_FILE, write_lexical)
+    manifest = load_manifest(store_dir)
+    manifest["lexical_documents_hash"] = documents_hash(documents)
+    _save_manifest(manifest, store_dir)
+
+def load_lexical(documents, store_dir=INDEX_DIR):
+    """
+    Load the persisted BM25 index if it was built from the given documents.
+
+    Parameters:
+        documents (list): The documents the index is expected to cover.
+        store_dir (str): Directory holding the persisted artifacts.
+
+    Returns:
+        BM25Index or None: The stored index, or None if missing or stale.
+    """
+    manifest = load_manifest(store_dir)
+    path = Path(store_dir) / LEXICAL_FILE
+    if manifest.get("lexical_documents_hash") != documents_hash(documents) or not path.exists():
+        return None
+    return BM25Index.load(path)
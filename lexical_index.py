@@ -0,0 +1,166 @@
+"""
+BM25 Lexical Index
+
+This module implements an in-memory BM25 inverted index over the menu documents, used next
+to the FAISS vector index. Menu questions often hinge on exact item names ("farmhouse",
+"zinger", "lassi") that sentence embeddings blur together, while BM25 ranks documents
+containing those exact terms first. Text is tokenized with the same clean_text and
+apply_synonyms rules used to build the documents, so queries and documents agree on terms.
+"""
+
+import re
+import numpy as np
+from data_cleaning import clean_text, apply_synonyms
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """
+    Split text into BM25 terms using the document cleaning rules.
+
+    Parameters:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: Lowercased terms with punctuation removed and synonyms applied.
+    """
+    return TOKEN_PATTERN.findall(apply_synonyms(clean_text(text)))
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index stored as flat numpy postings.
+
+    The postings of every term are stored contiguously: the documents containing
+    vocabulary[t] are doc_ids[offsets[t]:offsets[t + 1]], with their term frequencies at the
+    same positions in term_freqs.
+
+    Parameters:
+        vocabulary (list): The distinct terms, in postings order.
+        offsets (numpy.ndarray): Start of each term's postings, with a final end offset.
+        doc_ids (numpy.ndarray): Document positions of all postings.
+        term_freqs (numpy.ndarray): Term frequency of each posting.
+        doc_lengths (numpy.ndarray): Number of terms in each document.
+        k1 (float): Term frequency saturation. Default is 1.2.
+        b (float): Document length normalization. Default is 0.75.
+    """
+
+    def __init__(self, vocabulary, offsets, doc_ids, term_freqs, doc_lengths, k1=1.2, b=0.75):
+        self.vocabulary = {term: i for i, term in enumerate(vocabulary)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self.term_freqs = np.asarray(term_freqs, dtype=np.float32)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.k1 = k1
+        self.b = b
+        n_docs = len(self.doc_lengths)
+        doc_freqs = np.diff(self.offsets)
+        self.idf = np.log(1 + (n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        avg_length = self.doc_lengths.mean() if n_docs else 1.0
+        # Per-document part of the BM25 denominator, computed once
+        self.length_norm = k1 * (1 - b + b * self.doc_lengths / max(avg_length, 1e-9))
+
+    @classmethod
+    def build(cls, documents, k1=1.2, b=0.75):
+        """
+        Build the index from a list of documents.
+
+        Parameters:
+            documents (list): List of document strings; IDs are their positions.
+            k1 (float): Term frequency saturation. Default is 1.2.
+            b (float): Document length normalization. Default is 0.75.
+
+        Returns:
+            BM25Index: The built index.
+        """
+        postings = {}
+        doc_lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_id, doc in enumerate(documents):
+            terms = tokenize(doc)
+            doc_lengths[doc_id] = len(terms)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((doc_id, count))
+        vocabulary = sorted(postings)
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in vocabulary])
+        doc_ids = np.fromiter((d for term in vocabulary for d, _ in postings[term]), dtype=np.int64, count=offsets[-1])
+        term_freqs = np.fromiter((c for term in vocabulary for _, c in postings[term]), dtype=np.float32, count=offsets[-1])
+        return cls(vocabulary, offsets, doc_ids, term_freqs, doc_lengths, k1, b)
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def scores(self, query):
+        """
+        Compute the BM25 score of every document for a query.
+
+        Parameters:
+            query (str): The query text.
+
+        Returns:
+            numpy.ndarray: One score per document; 0 for documents sharing no term.
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self.vocabulary.get(term)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            ids = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            scores[ids] += self.idf[t] * tf * (self.k1 + 1) / (tf + self.length_norm[ids])
+        return scores
+
+    def search(self, query, k=10, ids=None):
+        """
+        Retrieve the k highest-scoring documents for a query.
+
+        Parameters:
+            query (str): The query text.
+            k (int): Number of documents to retrieve. Default is 10.
+            ids (numpy.ndarray, optional): Restrict the search to these document positions.
+
+        Returns:
+            tuple: (numpy.ndarray of document positions, numpy.ndarray of scores), best first.
+                   Documents sharing no term with the query are never returned.
+        """
+        scores = self.scores(query)
+        if ids is not None:
+            candidates = np.asarray(ids, dtype=np.int64)
+            candidates = candidates[scores[candidates] > 0]
+        else:
+            candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = np.argsort(-scores[candidates], kind="stable")
+        return candidates[order], scores[candidates[order]]
+
+    def save(self, file):
+        """
+        Write the index to an open binary file in numpy .npz format.
+
+        Parameters:
+            file (file object): Destination opened in binary write mode.
+        """
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(file, vocabulary=np.array(vocabulary, dtype=str), offsets=self.offsets,
+                 doc_ids=self.doc_ids, term_freqs=self.term_freqs, doc_lengths=self.doc_lengths,
+                 params=np.array([self.k1, self.b]))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save.
+
+        Parameters:
+            path (str or Path): Path of the .npz file.
+
+        Returns:
+            BM25Index: The loaded index.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"]
+            return cls(data["vocabulary"].tolist(), data["offsets"], data["doc_ids"],
+                       data["term_freqs"], data["doc_lengths"], float(k1), float(b))
@@ -0,0 +1,212 @@
+"""
+Zomato Menu Parser
+
+This module extracts restaurant information and menu data from the HTML of Zomato
+restaurant pages, independently of any browser session. It works on raw HTML, on saved
+(optionally gzip-compressed) page snapshots, or on whole directories of snapshots, which
+are parsed in a process pool using lxml directly. The output follows the same schema as
+the JSON files in the menu folder, so menus can be re-extracted after a selector change
+without browsing Zomato again.
+"""
+
+import os
+import re
+import gzip
+import json
+import lxml.html
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+SPICE_PATTERN = re.compile(r"spicy|fiery|peri peri|chilli|hot", re.I)
+READ_MORE_PATTERN = re.compile(r"read more", re.I)
+
+def _text(element, separator=""):
+    """
+    Join the stripped, non-empty text fragments of an element, like BeautifulSoup's
+    get_text(separator, strip=True).
+
+    Parameters:
+        element (lxml.html.HtmlElement or None): The element to read.
+        separator (str): String placed between text fragments.
+
+    Returns:
+        str: The element text, or "" if the element is None.
+    """
+    if element is None:
+        return ""
+    return separator.join(part.strip() for part in element.itertext() if part.strip())
+
+def _first(element, xpath):
+    """
+    Return the first element matching an XPath expression, or None.
+    """
+    found = element.xpath(xpath)
+    return found[0] if found else None
+
+def _has_class(tag, class_name):
+    """
+    Build an XPath step matching tags whose class attribute contains class_name.
+    """
+    return f"{tag}[contains(@class, '{class_name}')]"
+
+def parse_menu_html(html):
+    """
+    Extract restaurant information and menu data from the HTML of a Zomato restaurant page.
+
+    Parameters:
+        html (str or bytes): The HTML source of the page.
+
+    Returns:
+        dict: The menu data with "restaurant" (name, location, contact) and "menu"
+              (list of categories with their items), in the menu/*.json schema.
+    """
+    root = lxml.html.fromstring(html)
+
+    # Extract restaurant information
+    restaurant_info = {
+        "name": _text(_first(root, "//h1")),
+        "location": _text(_first(root, "//" + _has_class("div", "sc-clNaTc"))),
+        "contact": _text(_first(root, "//a[contains(@href, 'tel:')]")),
+    }
+
+    # Extract menu data
+    menu_data = []
+    for section in root.xpath("//" + _has_class("section", "sc-bZVNgQ")):
+        category_data = {"category": _text(_first(section, ".//h4")), "items": []}
+
+        # Extract items in each category
+        for item in section.xpath(".//" + _has_class("div", "sc-jhLVlY")):
+            # Determine vegetarian status
+            veg_type = "Unknown"
+            veg_div = _first(item, ".//" + _has_class("div", "sc-gcpVEs"))
+            if veg_div is not None:
+                if veg_div.get("type") == "veg":
+                    veg_type = "Veg"
+                elif veg_div.get("type") == "non-veg":
+                    veg_type = "Non-Veg"
+
+            # Extract item details
+            name = _text(_first(item, ".//" + _has_class("h4", "sc-cGCqpu")))
+            price = _text(_first(item, ".//" + _has_class("span", "sc-17hyc2s-1")))
+
+            # Extract and clean description, dropping "read more" toggles but keeping their tail text
+            desc_tag = _first(item, ".//" + _has_class("p", "sc-gsxalj"))
+            desc = ""
+            if desc_tag is not None:
+                for span in desc_tag.xpath(".//span"):
+                    if len(span) == 0 and READ_MORE_PATTERN.search(span.text or ""):
+                        span.drop_tree()
+                desc = _text(desc_tag, " ")
+
+            # Determine spice level based on description keywords
+            spice_level = "Spicy" if SPICE_PATTERN.search(desc) else "Normal"
+
+            # Add item to category if it has a name
+            if name:
+                category_data["items"].append({
+                    "name": name,
+                    "price": price,
+                    "description": desc,
+                    "veg_nonveg": veg_type,
+                    "spice_level": spice_level
+                })
+
+        menu_data.append(category_data)
+
+    return {
+        "restaurant": restaurant_info,
+        "menu": menu_data
+    }
+
+def save_snapshot(html, path):
+    """
+    Save the HTML of a page as a gzip-compressed snapshot.
+
+    Parameters:
+        html (str): The HTML source of the page.
+        path (str or Path): Destination path, conventionally ending in ".html.gz".
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(html)
+
+def read_snapshot(path):
+    """
+    Read a saved page, transparently decompressing ".gz" snapshots.
+
+    Parameters:
+        path (str or Path): Path of a ".html" or ".html.gz" file.
+
+    Returns:
+        bytes: The raw HTML of the page.
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as f:
+            return f.read()
+    return path.read_bytes()
+
+def snapshot_stem(path):
+    """
+    Return the name of a saved page without its ".html" / ".html.gz" extension.
+    """
+    name = Path(path).name
+    for suffix in (".gz", ".html", ".htm"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+def parse_saved_page(path, output_dir="menu"):
+    """
+    Parse one saved page and write its menu JSON to the output folder.
+
+    Parameters:
+        path (str or Path): Path of a ".html" or ".html.gz" page.
+        output_dir (str): Folder the "<stem>.json" menu file is written to. Defaults to "menu".
+
+    Returns:
+        str: Path of the written menu file.
+    """
+    final_data = parse_menu_html(read_snapshot(path))
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, snapshot_stem(path) + ".json")
+    with open(filepath, "w") as f:
+        json.dump(final_data, f, indent=4)
+    return filepath
+
+def parse_saved_pages(directory, output_dir="menu", workers=None):
+    """
+    Parse every saved page in a directory in a process pool and write their menu JSON files.
+
+    Parameters:
+        directory (str): Directory containing ".html" or ".html.gz" pages.
+        output_dir (str): Folder the menu files are written to. Defaults to "menu".
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        dict: Mapping of each page path to the written menu file, or to the exception
+              raised while parsing it.
+    """
+    pages = sorted(p for p in Path(directory).iterdir() if p.name.endswith((".html", ".htm", ".html.gz")))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {page: executor.submit(parse_saved_page, page, output_dir) for page in pages}
+        for page, future in futures.items():
+            try:
+                results[str(page)] = future.result()
+            except Exception as e:
+                results[str(page)] = e
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Re-extract menu JSON files from saved Zomato pages.")
+    parser.add_argument("directory", help="directory of saved .html or .html.gz pages")
+    parser.add_argument("--output", default="menu", help="folder to write menu JSON files to")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+    for page, result in parse_saved_pages(args.directory, args.output, args.workers).items():
+        if isinstance(result, Exception):
+            print(f"❌ Failed to parse {page}: {result}")
+        else:
+            print(f"✅ Saved to {result}")
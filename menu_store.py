@@ -0,0 +1,449 @@
+"""
+Structured Menu Store
+
+This module keeps a structured copy of every menu item (restaurant, category, item,
+description, numeric price, veg type and spice level) in a SQLite database next to
+database.csv, indexed on restaurant and category. It provides exact filter and aggregate
+queries - price ranges, cheapest and most expensive items, veg-only listings and counts -
+and a small router that recognizes such questions, so the chatbot can answer them from
+exact results instead of relying on retrieved text chunks and LLM arithmetic.
+"""
+
+import os
+import re
+import sqlite3
+import math
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+MENU_DB_PATH = os.getenv("menu_db_path", "menu.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS restaurants (
+    source TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    location TEXT,
+    contact TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    restaurant TEXT NOT NULL,
+    category TEXT,
+    item TEXT NOT NULL,
+    description TEXT,
+    price REAL,
+    veg_nonveg TEXT,
+    spice_level TEXT
+);
+CREATE INDEX IF NOT EXISTS items_restaurant ON items (restaurant);
+CREATE INDEX IF NOT EXISTS items_category ON items (category);
+CREATE INDEX IF NOT EXISTS items_restaurant_category ON items (restaurant, category);
+CREATE INDEX IF NOT EXISTS items_source ON items (source);
+"""
+
+def connect(path=MENU_DB_PATH):
+    """
+    Open the menu database, creating its tables and indexes if needed.
+
+    Parameters:
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        sqlite3.Connection: The open connection.
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def save_menus(restaurants, frame, path=MENU_DB_PATH):
+    """
+    Replace the stored restaurants and items of the given menu files.
+
+    Parameters:
+        restaurants (list): One (source, name, location, contact) tuple per menu file,
+                            in the same order as the "menu_index" column of frame.
+        frame (pandas.DataFrame): Cleaned menu table as returned by data_cleaning.clean_menu_frame.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+    """
+    sources = [restaurant[0] for restaurant in restaurants]
+    conn = connect(path)
+    with conn:
+        remove_menus(sources, conn=conn)
+        conn.executemany("INSERT INTO restaurants (source, name, location, contact) VALUES (?, ?, ?, ?)", restaurants)
+        _insert_items(conn, restaurants, frame)
+    conn.close()
+
+def _insert_items(conn, restaurants, frame):
+    """
+    Insert the items of a cleaned menu table, with restaurants as in save_menus.
+    """
+    rows = [
+        (restaurants[menu_index][0], restaurants[menu_index][1], category, item, description,
+         None if price is None or math.isnan(price) else float(price), veg, spice)
+        for menu_index, category, item, description, price, veg, spice in zip(
+            frame["menu_index"], frame["category"], frame["item"], frame["description"],
+            frame["price_value"], frame["veg_nonveg"], frame["spice_level"])
+    ]
+    conn.executemany(
+        "INSERT INTO items (source, restaurant, category, item, description, price, veg_nonveg, spice_level) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+def save_restaurant(source, name, location, contact, path=MENU_DB_PATH):
+    """
+    Replace the stored restaurant of a menu file and remove its items, before its items are
+    added chunk by chunk with append_items.
+
+    Parameters:
+        source (str): Menu file name.
+        name, location, contact (str): Cleaned restaurant details.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+    """
+    conn = connect(path)
+    with conn:
+        remove_menus([source], conn=conn)
+        conn.execute("INSERT INTO restaurants (source, name, location, contact) VALUES (?, ?, ?, ?)",
+                     (source, name, location, contact))
+    conn.close()
+
+def append_items(source, name, frame, path=MENU_DB_PATH):
+    """
+    Add items of one menu file to the store, keeping the items already stored for it.
+
+    Parameters:
+        source (str): Menu file name.
+        name (str): Cleaned restaurant name.
+        frame (pandas.DataFrame): Cleaned menu table of items of this file only.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+    """
+    conn = connect(path)
+    with conn:
+        _insert_items(conn, [(source, name)], frame.assign(menu_index=0))
+    conn.close()
+
+def remove_menus(sources, path=MENU_DB_PATH, conn=None):
+    """
+    Remove the stored restaurants and items of the given menu files.
+
+    Parameters:
+        sources (iterable): Menu file names to remove.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+        conn (sqlite3.Connection, optional): Existing connection to use inside a transaction.
+    """
+    own = conn is None
+    conn = conn or connect(path)
+    for source in sources:
+        conn.execute("DELETE FROM items WHERE source = ?", (source,))
+        conn.execute("DELETE FROM restaurants WHERE source = ?", (source,))
+    if own:
+        conn.commit()
+        conn.close()
+
+def retain_menus(sources, path=MENU_DB_PATH):
+    """
+    Remove every stored menu whose file is not in sources.
+
+    Parameters:
+        sources (iterable): Menu file names to keep.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+    """
+    conn = connect(path)
+    stored = [row[0] for row in conn.execute("SELECT source FROM restaurants")]
+    conn.close()
+    remove_menus([source for source in stored if source not in set(sources)], path)
+
+def restaurant_names(path=MENU_DB_PATH):
+    """
+    List the names of all stored restaurants.
+
+    Parameters:
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        list: Cleaned restaurant names.
+    """
+    conn = connect(path)
+    names = [row[0] for row in conn.execute("SELECT DISTINCT name FROM restaurants ORDER BY name")]
+    conn.close()
+    return names
+
+def _where(restaurant=None, term=None, veg=None):
+    """
+    Build the WHERE clause and parameters for the item filters.
+
+    Parameters:
+        restaurant (str, optional): Exact cleaned restaurant name.
+        term (str, optional): Text that must appear in the category or item name.
+        veg (str, optional): "veg" or "non-veg".
+
+    Returns:
+        tuple: (sql, params).
+    """
+    # Unparseable prices are normalized to 0, so only positive prices are meaningful
+    clauses, params = ["price > 0"], []
+    if restaurant:
+        clauses.append("restaurant = ?")
+        params.append(restaurant)
+    if term:
+        clauses.append("(category LIKE ? OR item LIKE ?)")
+        params += [f"%{term}%", f"%{term}%"]
+    if veg:
+        clauses.append("veg_nonveg = ?")
+        params.append(veg)
+    return " WHERE " + " AND ".join(clauses), params
+
+def price_range(restaurant=None, term=None, veg=None, path=MENU_DB_PATH):
+    """
+    Get the lowest and highest price of the matching items.
+
+    Parameters:
+        restaurant (str, optional): Exact cleaned restaurant name.
+        term (str, optional): Text that must appear in the category or item name.
+        veg (str, optional): "veg" or "non-veg".
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        tuple: (min_price, max_price, count); prices are None if nothing matches.
+    """
+    where, params = _where(restaurant, term, veg)
+    conn = connect(path)
+    row = conn.execute(f"SELECT MIN(price), MAX(price), COUNT(*) FROM items{where}", params).fetchone()
+    conn.close()
+    return row
+
+def _items(order, restaurant=None, term=None, veg=None, limit=None, path=MENU_DB_PATH):
+    """
+    List matching items as (restaurant, category, item, price) tuples in the given order.
+    """
+    where, params = _where(restaurant, term, veg)
+    sql = f"SELECT restaurant, category, item, price FROM items{where} ORDER BY {order}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    conn = connect(path)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+def cheapest(restaurant=None, term=None, veg=None, limit=1, path=MENU_DB_PATH):
+    """
+    Get the cheapest matching items.
+
+    Parameters:
+        restaurant (str, optional): Exact cleaned restaurant name.
+        term (str, optional): Text that must appear in the category or item name.
+        veg (str, optional): "veg" or "non-veg".
+        limit (int): Number of items to return. Default is 1.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        list: (restaurant, category, item, price) tuples, cheapest first.
+    """
+    return _items("price ASC, item", restaurant, term, veg, limit, path)
+
+def most_expensive(restaurant=None, term=None, veg=None, limit=1, path=MENU_DB_PATH):
+    """
+    Get the most expensive matching items.
+
+    Parameters:
+        restaurant (str, optional): Exact cleaned restaurant name.
+        term (str, optional): Text that must appear in the category or item name.
+        veg (str, optional): "veg" or "non-veg".
+        limit (int): Number of items to return. Default is 1.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        list: (restaurant, category, item, price) tuples, most expensive first.
+    """
+    return _items("price DESC, item", restaurant, term, veg, limit, path)
+
+def list_items(restaurant=None, term=None, veg=None, limit=None, path=MENU_DB_PATH):
+    """
+    List matching items, e.g. all veg items of a restaurant.
+
+    Parameters:
+        restaurant (str, optional): Exact cleaned restaurant name.
+        term (str, optional): Text that must appear in the category or item name.
+        veg (str, optional): "veg" or "non-veg".
+        limit (int, optional): Maximum number of items to return.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        list: (restaurant, category, item, price) tuples ordered by category and item.
+    """
+    return _items("restaurant, category, item", restaurant, term, veg, limit, path)
+
+def count_items(restaurant=None, term=None, veg=None, path=MENU_DB_PATH):
+    """
+    Count the matching items.
+
+    Parameters:
+        restaurant (str, optional): Exact cleaned restaurant name.
+        term (str, optional): Text that must appear in the category or item name.
+        veg (str, optional): "veg" or "non-veg".
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        int: Number of matching items.
+    """
+    return price_range(restaurant, term, veg, path)[2]
+
+# Words that describe the question rather than what is being asked about
+STOPWORDS = {
+    "what", "whats", "which", "is", "are", "the", "a", "an", "at", "in", "of", "for", "from", "on",
+    "and", "or", "to", "me", "tell", "can", "you", "give", "show", "list", "do", "does", "they",
+    "have", "has", "there", "how", "many", "much", "number", "count", "price", "prices", "priced",
+    "range", "cost", "costs", "cheapest", "cheap", "lowest", "least", "most", "expensive", "costliest",
+    "priciest", "highest", "menu", "item", "items", "dish", "dishes", "option", "options", "only",
+    "all", "restaurant", "restaurants", "veg", "vegetarian", "non", "nonveg", "their", "its", "it",
+    "with", "any", "get", "want", "would", "like", "please", "your", "that", "this", "under", "below",
+    "above", "over", "serve", "serves", "offer", "offers", "available", "sell", "sells", "food",
+}
+# Questions the menus cannot answer, and questions about the restaurants themselves
+NUTRITION_PATTERN = re.compile(r"\b(?:calorie|calories|kcal|nutrition\w*|protein|carbs|carbohydrates|fat content)\b")
+RESTAURANT_COUNT_PATTERN = re.compile(r"\b(?:how many|number of|count of) (?:[a-z-]+ ){0,2}(?:restaurants|places)\b")
+ITEM_COUNT_PATTERN = re.compile(
+    r"\b(?:how many|number of|count of) (?:[a-z-]+ ){0,3}(?:items|dishes|options|products|things)\b")
+# Words too generic to identify a restaurant on their own, e.g. "dominos" for "dominos pizza"
+GENERIC_NAME_WORDS = {"pizza", "hotel", "restaurant", "cafe", "the", "by", "of", "and"}
+VEG_PATTERN = re.compile(r"\b(?:non[\s-]?veg(?:etarian)?)\b|\b(veg(?:etarian)?)\b")
+
+def detect_restaurant(text, names):
+    """
+    Find the restaurant a piece of text refers to.
+
+    A restaurant matches on its full cleaned name or on its name without generic words
+    ("dominos" for "dominos pizza", "prakash" for "hotel prakash"), optionally followed by
+    a possessive "s". Longer names are tried first.
+
+    Parameters:
+        text (str): Lowercased text with punctuation removed.
+        names (list): Known cleaned restaurant names.
+
+    Returns:
+        tuple: (restaurant name, matched text), or (None, None) if no restaurant matches.
+    """
+    for name in sorted((name for name in names if name), key=len, reverse=True):
+        distinctive = " ".join(word for word in name.split() if word not in GENERIC_NAME_WORDS)
+        for alias in [name, distinctive]:
+            if not alias:
+                continue
+            match = re.search(r"\b" + re.escape(alias) + r"s?\b", text)
+            if match:
+                return name, match.group(0)
+    return None, None
+
+def parse_query(query, names=None, path=MENU_DB_PATH):
+    """
+    Recognize a structured menu question and extract its intent and filters.
+
+    Every content word left after removing the restaurant, veg type and question words must
+    be part of what is asked about: the remaining words, as a phrase, must match an item or
+    category of the restaurant, otherwise the question is not treated as a structured one
+    and is left to retrieval. Counts are only recognized for items ("how many veg items"),
+    restaurants ("how many restaurants are there") and calorie or nutrition questions are
+    recognized separately, since the menus cannot answer them by counting items.
+
+    Parameters:
+        query (str): The user's question.
+        names (list, optional): Known restaurant names. Defaults to the stored restaurants.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+
+    Returns:
+        dict or None: {"intent", "restaurant", "term", "veg"} where intent is one of
+                      "price_range", "cheapest", "most_expensive", "count", "list",
+                      "count_restaurants" or "nutrition", or None if the question is not a
+                      structured one.
+    """
+    text = re.sub(r"[^a-z0-9\s-]", "", query.lower())
+    names = names if names is not None else restaurant_names(path)
+    if NUTRITION_PATTERN.search(text):
+        return {"intent": "nutrition", "restaurant": detect_restaurant(text, names)[0], "term": None, "veg": None}
+    if RESTAURANT_COUNT_PATTERN.search(text):
+        return {"intent": "count_restaurants", "restaurant": None, "term": None, "veg": None}
+    if re.search(r"price range|range of price|how (?:much|expensive) .* cost", text):
+        intent = "price_range"
+    elif re.search(r"cheapest|lowest price|least expensive|most affordable", text):
+        intent = "cheapest"
+    elif re.search(r"most expensive|costliest|priciest|highest price", text):
+        intent = "most_expensive"
+    elif ITEM_COUNT_PATTERN.search(text):
+        intent = "count"
+    elif re.search(r"\b(?:list|show)\b.*\bveg", text):
+        intent = "list"
+    else:
+        return None
+
+    restaurant, mention = detect_restaurant(text, names)
+
+    veg = None
+    for match in VEG_PATTERN.finditer(text):
+        veg = "veg" if match.group(1) else "non-veg"
+
+    remaining = VEG_PATTERN.sub(" ", text.replace(mention, " ") if mention else text)
+    terms = [word[:-1] if word.endswith("s") and len(word) > 3 else word
+             for word in re.findall(r"[a-z]+", remaining) if word not in STOPWORDS and len(word) > 2]
+    term = " ".join(terms) or None
+    # A word matching nothing ("biryani at kfc", "calories") would otherwise be silently dropped
+    if term and not count_items(restaurant, term, veg, path):
+        return None
+    return {"intent": intent, "restaurant": restaurant, "term": term, "veg": veg}
+
+def _format_items(rows):
+    """
+    Format (restaurant, category, item, price) tuples as compact lines.
+    """
+    return "\n".join(f"- {item} ({category}, {restaurant}): {price:g}" for restaurant, category, item, price in rows)
+
+def answer_structured(query, names=None, path=MENU_DB_PATH, limit=20):
+    """
+    Answer a structured menu question with exact results from the store.
+
+    Parameters:
+        query (str): The user's question.
+        names (list, optional): Known restaurant names. Defaults to the stored restaurants.
+        path (str): Path of the SQLite database. Defaults to MENU_DB_PATH.
+        limit (int): Maximum number of items listed in the answer. Default is 20.
+
+    Returns:
+        str or None: A short factual context describing the exact result, suitable as LLM
+                     context in place of retrieved documents, or None if the question is
+                     not a structured one or nothing matches.
+    """
+    if not os.path.exists(path):
+        return None
+    names = names if names is not None else restaurant_names(path)
+    parsed = parse_query(query, names, path)
+    if parsed is None:
+        return None
+    if parsed["intent"] == "count_restaurants":
+        return f"There are {len(names)} restaurants: {', '.join(names)}." if names else None
+    if parsed["intent"] == "nutrition":
+        where = f" of {parsed['restaurant']}" if parsed["restaurant"] else ""
+        return f"The menus{where} do not list calories or other nutrition information."
+    filters = (parsed["restaurant"], parsed["term"], parsed["veg"])
+    scope = " ".join(part for part in [
+        parsed["veg"], parsed["term"] and f"'{parsed['term']}'", "items",
+        parsed["restaurant"] and f"at {parsed['restaurant']}"] if part)
+
+    if parsed["intent"] == "price_range":
+        low, high, count = price_range(*filters, path=path)
+        if not count:
+            return None
+        return f"The price range of the {count} {scope} is {low:g} to {high:g}."
+    if parsed["intent"] == "count":
+        count = count_items(*filters, path=path)
+        return f"There are {count} {scope}." if count else None
+    if parsed["intent"] == "cheapest":
+        rows = cheapest(*filters, limit=3, path=path)
+        return f"The cheapest {scope} are:\n{_format_items(rows)}" if rows else None
+    if parsed["intent"] == "most_expensive":
+        rows = most_expensive(*filters, limit=3, path=path)
+        return f"The most expensive {scope} are:\n{_format_items(rows)}" if rows else None
+    rows = list_items(*filters, limit=limit, path=path)
+    if not rows:
+        return None
+    total = count_items(*filters, path=path)
+    more = f"\n... and {total - len(rows)} more." if total > len(rows) else ""
+    return f"The {total} {scope} are:\n{_format_items(rows)}{more}"
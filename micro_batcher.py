@@ -0,0 +1,112 @@
+"""
+Async Micro-Batching Dispatcher
+
+This module coalesces concurrent single-item requests into batches. Callers await
+submit(item) as if the item were processed on its own; the dispatcher collects the items
+arriving within a few milliseconds of each other (or until the batch is full), processes
+them with one call of a batch function on a worker thread, and hands each caller its own
+result. Used with rag.retrieve_batch, a burst of concurrent users shares one embedding
+forward pass and one index search instead of queueing on them one by one.
+"""
+
+import time
+import asyncio
+
+class MicroBatcher:
+    """
+    Coalesce concurrent awaits of submit into calls of a batch function.
+
+    Parameters:
+        handler (callable): Blocking function taking a list of items and returning a list of
+                            results in the same order, e.g.
+                            lambda queries: retrieve_batch(queries, index, embedder, documents).
+        max_batch_size (int): Maximum number of items per batch. Default is 64.
+        max_wait_ms (float): Milliseconds the first item of a batch waits for more items.
+                             Default is 5.
+        executor (concurrent.futures.Executor, optional): Executor the handler runs on.
+                                                          Defaults to the loop's default executor.
+    """
+
+    def __init__(self, handler, max_batch_size=64, max_wait_ms=5, executor=None):
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._task = None
+
+    async def submit(self, item):
+        """
+        Process one item as part of the next batch.
+
+        Parameters:
+            item: The item passed to the handler, e.g. a query string.
+
+        Returns:
+            The handler's result for this item. Exceptions raised by the handler are raised
+            in every caller of the failed batch.
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._dispatch())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        """
+        Wait for the first item, then gather more until the batch is full or max_wait passes.
+        """
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self):
+        """
+        Run batches until the dispatcher is closed.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.handler, items)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        """
+        Stop the dispatcher. Items already submitted but not yet batched are cancelled.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+            self._task = None
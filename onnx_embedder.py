@@ -0,0 +1,156 @@
+"""
+ONNX Query Embedder
+
+This module embeds queries with an ONNX export of the all-MiniLM-L6-v2 sentence transformer
+run by onnxruntime on CPU, as a drop-in replacement for SentenceTransformer.encode at query
+time. It avoids importing torch and sentence_transformers, which dominate the start-up time
+of the chatbot, and a quantized export further cuts per-query latency.
+
+The model folder holds the exported model ("model.onnx", or "model_quantized.onnx" which is
+preferred when present) and its "tokenizer.json", e.g. as written by
+`optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 <folder>`.
+"""
+
+import os
+import json
+import numpy as np
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+ONNX_MODEL_DIR = os.getenv("onnx_model_dir", "onnx_model")
+MODEL_FILES = ["model_quantized.onnx", "model.onnx"]
+TOKENIZER_FILE = "tokenizer.json"
+
+class OnnxQueryEmbedder:
+    """
+    Mean-pooled, normalized MiniLM embeddings computed with onnxruntime.
+
+    Parameters:
+        model_dir (str): Folder holding the ONNX model and tokenizer.json. Default is the
+                         onnx_model_dir setting.
+        model_file (str, optional): Model file name inside model_dir. Defaults to the
+                                    quantized model if present, else "model.onnx".
+        max_length (int): Maximum tokens per text, as for the sentence transformer. Default is 256.
+        threads (int, optional): onnxruntime intra-op threads. Defaults to onnxruntime's choice.
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, model_file=None, max_length=256, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        model_dir = Path(model_dir)
+        if model_file is None:
+            model_file = next((name for name in MODEL_FILES if (model_dir / name).exists()), None)
+            if model_file is None:
+                raise FileNotFoundError(f"No ONNX model found in {model_dir}")
+        self.model_path = model_dir / model_file
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(self.model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self):
+        """
+        Return the dimension of the embeddings.
+        """
+        return self.dimension
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, inputs)[0]
+        # Mean pooling over the real tokens, then L2 normalization, as in the sentence transformer
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        """
+        Embed texts, with the same interface as SentenceTransformer.encode.
+
+        Parameters:
+            texts (list): The texts to embed.
+            batch_size (int): Number of texts per forward pass. Default is 32.
+
+        Returns:
+            numpy.ndarray: The float32 embeddings, one row per text.
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        batches = [self._encode_batch(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        return np.vstack(batches).astype(np.float32)
+
+def quantize_model(model_dir=ONNX_MODEL_DIR):
+    """
+    Write an int8 dynamically quantized copy of the exported model next to it, as
+    "model_quantized.onnx", which OnnxQueryEmbedder then prefers.
+
+    Parameters:
+        model_dir (str): Folder holding "model.onnx". Default is the onnx_model_dir setting.
+
+    Returns:
+        Path: Path of the quantized model.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    source = Path(model_dir) / "model.onnx"
+    target = Path(model_dir) / "model_quantized.onnx"
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+    return target
+
+def validate_embedder(embedder, reference, texts, min_cosine=0.99, batch_size=32):
+    """
+    Compare the embeddings of a candidate embedder with those of the reference model.
+
+    Parameters:
+        embedder: Candidate embedder with an encode method, e.g. an OnnxQueryEmbedder.
+        reference: Reference embedder, e.g. the SentenceTransformer the index was built with.
+        texts (list): Texts to embed with both, e.g. sample queries and documents.
+        min_cosine (float): Lowest acceptable cosine similarity per text. Default is 0.99.
+        batch_size (int): Number of texts per forward pass.
+
+    Returns:
+        dict: "mean_cosine", "min_cosine", "max_abs_diff" between the normalized embeddings,
+              and "passed" if every text reaches min_cosine.
+    """
+    candidate = np.asarray(embedder.encode(list(texts), batch_size=batch_size), dtype=np.float32)
+    expected = np.asarray(reference.encode(list(texts), batch_size=batch_size), dtype=np.float32)
+    candidate /= np.clip(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12, None)
+    expected /= np.clip(np.linalg.norm(expected, axis=1, keepdims=True), 1e-12, None)
+    cosines = (candidate * expected).sum(axis=1)
+    return {
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "max_abs_diff": float(np.abs(candidate - expected).max()),
+        "passed": bool(cosines.min() >= min_cosine),
+    }
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Quantize and validate the ONNX query embedder.")
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR, help="folder holding model.onnx and tokenizer.json")
+    parser.add_argument("--quantize", action="store_true", help="write an int8 model_quantized.onnx")
+    parser.add_argument("--validate", action="store_true",
+                        help="compare against the sentence transformer on the indexed documents")
+    args = parser.parse_args()
+    if args.quantize:
+        print(f"✅ Saved to {quantize_model(args.model_dir)}")
+    if args.validate:
+        from rag import load_data_from_json, get_embedder
+        documents = load_data_from_json()
+        for model_file in MODEL_FILES:
+            if (Path(args.model_dir) / model_file).exists():
+                result = validate_embedder(OnnxQueryEmbedder(args.model_dir, model_file), get_embedder(),
+                                           documents[:1000])
+                mark = "✅" if result["passed"] else "❌"
+                print(f"{mark} {model_file}: {json.dumps(result)}")
@@ -0,0 +1,307 @@
+"""
+Conversational Query Rewriter
+
+A follow-up such as "can you tell me the location of it" only makes sense together with the
+earlier turns. Retrieving with the query and all earlier queries concatenated dilutes both
+the query embedding and the BM25 terms, so more documents are needed to find the right one.
+This module instead tracks the restaurant, category and item mentioned in the recent turns
+of a conversation and rewrites a follow-up into a standalone query, e.g. "can you tell me
+the location of pizza hut", by resolving its pronouns ("it", "they", "there", "that one")
+and elliptical forms ("what about kfc?") with a few rules, without calling an LLM. The
+standalone query then also names the restaurant for the structured menu store and the
+metadata filters.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from menu_store import detect_restaurant, STOPWORDS
+from context_budget import parse_document
+from telemetry import get_telemetry
+
+# Load environment variables
+load_dotenv()
+
+# Number of turns an entity stays in focus after it was last mentioned
+REWRITE_TURNS = int(os.getenv("rewrite_turns", 3))
+# Longest item or category name, in words, looked up in a query
+MAX_PHRASE_WORDS = 12
+MENTION_CACHE_SIZE = 4096
+
+# "What about kfc?", "and the desserts?": the previous query with one entity swapped
+ELLIPSIS_PATTERN = re.compile(r"^(?:(?:and|but|ok|okay|so) )*(?:what|how) about (?P<about>.+)$|^and (?P<also>.+)$")
+# "It", "this one", "that dish": the item or category in focus
+THING_REFERENCE_PATTERN = re.compile(r"\b(?:(?:this|that) (?:one|dish|item)|the same|its|it)\b|\b(?:this|that)$")
+# "They", "their", "this place", "there" (but not "is there"): the restaurant in focus
+RESTAURANT_REFERENCE_PATTERN = re.compile(
+    r"\b(?:(?:this|that|the same) (?:place|restaurant|outlet|shop)|theirs|their|they|"
+    r"(?<!is )(?<!are )(?<!was )there(?! is\b| are\b| was\b))\b")
+# "Those", "these", "them": the category in focus if there is one, else the restaurant
+GROUP_REFERENCE_PATTERN = re.compile(r"\b(?:those|these|them)\b")
+# Questions about the restaurant itself, where "it" refers to the restaurant
+RESTAURANT_ATTRIBUTE_PATTERN = re.compile(
+    r"\b(?:location|located|address|where|contact|phone|call|timings?|hours|open|opens|close|closes|"
+    r"closing|rating|ratings|reviews?|deliver\w*)\b")
+
+def normalize(text):
+    """
+    Lowercase text and remove punctuation the way menu_store.parse_query does.
+
+    Parameters:
+        text (str): The text to normalize.
+
+    Returns:
+        str: Lowercased words separated by single spaces.
+    """
+    return " ".join(re.sub(r"[^a-z0-9\s-]", "", str(text).lower()).split())
+
+class EntityVocabulary:
+    """
+    Restaurant, category and item names of the indexed documents, to find them in queries.
+
+    Lookups are cached, since the same queries are asked in many sessions.
+
+    Parameters:
+        documents (list): The document strings, as built during menu cleaning.
+        cache_size (int): Maximum number of queries whose mentions are cached.
+    """
+
+    def __init__(self, documents, cache_size=MENTION_CACHE_SIZE):
+        self.restaurants = set()
+        # Phrase -> restaurants offering it, for each kind of entity
+        self.phrases = {"category": {}, "item": {}}
+        for document in documents:
+            parsed = parse_document(document)
+            if not parsed["restaurant"]:
+                continue
+            restaurant = normalize(parsed["restaurant"])
+            self.restaurants.add(restaurant)
+            if parsed["kind"] == "item":
+                for kind in self.phrases:
+                    phrase = normalize(parsed[kind])
+                    if phrase and not (" " not in phrase and (phrase in STOPWORDS or len(phrase) < 4)):
+                        self.phrases[kind].setdefault(phrase, set()).add(restaurant)
+        self.max_words = min(MAX_PHRASE_WORDS, max(
+            (len(phrase.split()) for phrases in self.phrases.values() for phrase in phrases), default=1))
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def offers(self, restaurant, kind, value):
+        """
+        Tell whether a restaurant has the given category or item on its menu.
+        """
+        return restaurant in self.phrases[kind].get(value, ())
+
+    def find(self, text):
+        """
+        Find the restaurant, category and item a normalized query mentions.
+
+        Categories and items are matched on the longest phrases first, also with or without
+        a plural "s", and never inside the restaurant name.
+
+        Parameters:
+            text (str): The query, normalized with normalize.
+
+        Returns:
+            dict: For each kind of entity found ("restaurant", "category", "item"), a
+                  (name, matched text) pair.
+        """
+        with self._lock:
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                return self._cache[text]
+        found = {}
+        restaurant, mention = detect_restaurant(text, self.restaurants)
+        if restaurant:
+            found["restaurant"] = (restaurant, mention)
+        words = (text.replace(mention, " ") if mention else text).split()
+        taken = set()
+        for n in range(min(len(words), self.max_words), 0, -1):
+            for i in range(len(words) - n + 1):
+                if taken.intersection(range(i, i + n)):
+                    continue
+                phrase = " ".join(words[i:i + n])
+                candidates = [phrase, phrase[:-1] if phrase.endswith("s") else phrase + "s"]
+                match = next(((kind, candidate) for kind in ("category", "item") if kind not in found
+                              for candidate in candidates if candidate in self.phrases[kind]), None)
+                if match:
+                    found[match[0]] = (match[1], phrase)
+                    taken.update(range(i, i + n))
+        with self._lock:
+            self._cache[text] = found
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+class Conversation:
+    """
+    Entities in focus in one conversation, used to rewrite its follow-up queries.
+
+    A conversation keeps the restaurant, category and item of its recent turns, with the
+    most recently mentioned winning, and forgets them after max_turns turns without a
+    mention. Naming another restaurant drops the category and item of the previous one.
+    Rewrites are cached per conversation, so retrying a query costs nothing.
+
+    Parameters:
+        max_turns (int): Turns an entity stays in focus. Default is the rewrite_turns setting.
+        cache_size (int): Maximum number of cached rewrites. Default is 32.
+    """
+
+    def __init__(self, max_turns=REWRITE_TURNS, cache_size=32):
+        self.max_turns = max_turns
+        self.cache_size = cache_size
+        self.turn = 0
+        # Kind -> (name, turn it was last mentioned in)
+        self.focus = {}
+        self.last = None
+        self._cache = OrderedDict()
+
+    @classmethod
+    def from_history(cls, history, vocabulary, **kwargs):
+        """
+        Rebuild the conversation state from a list of (query, response) turns.
+        """
+        conversation = cls(**kwargs)
+        for query, _ in history[-conversation.max_turns:]:
+            conversation.add(conversation.rewrite(query, vocabulary))
+        return conversation
+
+    def copy(self):
+        """
+        Return an independent copy of the conversation state, including its cached rewrites.
+        """
+        conversation = Conversation(self.max_turns, self.cache_size)
+        conversation.turn = self.turn
+        conversation.focus = dict(self.focus)
+        conversation.last = self.last
+        conversation._cache = OrderedDict(self._cache)
+        return conversation
+
+    def current(self):
+        """
+        Return the entities still in focus, as a dict of kind -> name.
+        """
+        return {kind: name for kind, (name, turn) in self.focus.items() if self.turn - turn < self.max_turns}
+
+    def rewrite(self, query, vocabulary):
+        """
+        Rewrite a query into a standalone one, using the entities in focus.
+
+        Queries that need no rewriting are returned unchanged, so first turns behave exactly
+        as before; rewritten queries are normalized text.
+
+        Parameters:
+            query (str): The user's query.
+            vocabulary (EntityVocabulary): Names of the indexed restaurants, categories and items.
+
+        Returns:
+            dict: "query" (the standalone query), "original" (the user's query), "rewritten"
+                  (whether they differ) and "entities" (see EntityVocabulary.find) of the
+                  standalone query.
+        """
+        focus = self.current()
+        last = self.last if self.last is not None and self.turn - self.last["turn"] < self.max_turns else None
+        key = (query, tuple(sorted(focus.items())), last and last["query"], id(vocabulary))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        text = normalize(query)
+        standalone = self._resolve(text, vocabulary, focus, last) if focus else text
+        rewritten = standalone != text
+        result = {
+            "query": standalone if rewritten else query,
+            "original": query,
+            "rewritten": rewritten,
+            "entities": vocabulary.find(standalone),
+        }
+        get_telemetry().count("query_rewrites_total", result="rewritten" if rewritten else "unchanged")
+        self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def _resolve(self, text, vocabulary, focus, last):
+        """
+        Apply the rewriting rules to a normalized query.
+        """
+        mentioned = vocabulary.find(text)
+        restaurant = focus.get("restaurant")
+
+        # "What about kfc?": the previous query with the matching entity swapped
+        match = ELLIPSIS_PATTERN.match(text)
+        about = match and (match.group("about") or match.group("also"))
+        if about and last is not None and len(about.split()) <= 5 and not (
+                THING_REFERENCE_PATTERN.search(about) or RESTAURANT_REFERENCE_PATTERN.search(about)):
+            new = vocabulary.find(about)
+            previous = last["entities"]
+            standalone = last["query"]
+            swapped = False
+            if "restaurant" in new and "restaurant" in previous:
+                standalone = standalone.replace(previous["restaurant"][1], new["restaurant"][1])
+                swapped = True
+            new_thing = new.get("item") or new.get("category")
+            old_thing = previous.get("item") or previous.get("category")
+            if new_thing and old_thing:
+                standalone = standalone.replace(old_thing[1], new_thing[1])
+                swapped = True
+            if swapped:
+                return standalone
+            # Nothing to swap, e.g. "and the most expensive?": ask it about the entities in focus
+            thing = focus.get("item") or focus.get("category")
+            return " ".join(part for part in [
+                about, None if RESTAURANT_ATTRIBUTE_PATTERN.search(about) else thing,
+                restaurant and f"at {restaurant}"] if part)
+
+        thing_kind = "item" if "item" in focus else "category" if "category" in focus else None
+        references_restaurant = RESTAURANT_ATTRIBUTE_PATTERN.search(text) or not thing_kind
+        scoped = "restaurant" in mentioned
+
+        def thing_or_restaurant(match):
+            nonlocal scoped
+            if references_restaurant:
+                scoped = True
+                return restaurant or match.group(0)
+            return focus[thing_kind]
+
+        def group(match):
+            nonlocal scoped
+            if "category" in focus:
+                return focus["category"]
+            scoped = True
+            return restaurant or match.group(0)
+
+        standalone = text
+        if restaurant and "restaurant" not in mentioned:
+            standalone = RESTAURANT_REFERENCE_PATTERN.sub(restaurant, standalone)
+            scoped = scoped or standalone != text
+        standalone = THING_REFERENCE_PATTERN.sub(thing_or_restaurant, standalone)
+        standalone = GROUP_REFERENCE_PATTERN.sub(group, standalone)
+
+        # An item or category of the restaurant in focus, asked about without naming it
+        if restaurant and not scoped:
+            resolved = vocabulary.find(standalone) if standalone != text else mentioned
+            if any(vocabulary.offers(restaurant, kind, resolved[kind][0]) for kind in ("item", "category")
+                   if kind in resolved):
+                standalone = f"{standalone} at {restaurant}"
+        return standalone
+
+    def add(self, rewrite):
+        """
+        Record an answered turn, bringing the entities of its standalone query into focus.
+
+        Parameters:
+            rewrite (dict): The rewrite of the turn's query, as returned by rewrite.
+        """
+        self.turn += 1
+        entities = {kind: name for kind, (name, _) in rewrite["entities"].items()}
+        if entities.get("restaurant") not in (None, self.current().get("restaurant")):
+            self.focus.pop("category", None)
+            self.focus.pop("item", None)
+        if "category" in entities and "item" not in entities:
+            self.focus.pop("item", None)
+        for kind, name in entities.items():
+            self.focus[kind] = (name, self.turn)
+        self.last = {"query": normalize(rewrite["query"]), "entities": rewrite["entities"], "turn": self.turn}
@@ -8,17 +8,26 @@ information to answer user queries.
 """
 
 import os
+import re
+import time
 import faiss
-import requests
-import pandas as pd
+import threading
 import numpy as np
 from pathlib import Path
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from data_cleaning import load_and_clean_menus_from_json
-from llama_cpp import Llama
-import google.generativeai as genai
+from functools import lru_cache
+from data_cleaning import load_and_clean_menu_records, write_database, update_database
+from menu_store import answer_structured, remove_menus, detect_restaurant
+from index_store import (INDEX_DIR, menu_fingerprint, file_fingerprints, load_documents, save_documents,
+                         load_records, load_metadata, load_index, save_index, load_lexical, save_lexical,
+                         load_manifest)
+from lexical_index import BM25Index
+from answer_cache import get_default_cache as get_answer_cache
+from generation import GeminiGenerator, LlamaGenerator, StubGenerator
+from context_budget import assemble_context, CONTEXT_TOKEN_BUDGET
+from embedding_cache import CachedEmbedder, QUERY_CACHE_SIZE
+from query_rewriter import Conversation, EntityVocabulary
+from telemetry import get_telemetry, traced
 
 # Load environment variables
 load_dotenv()
@@ -26,34 +35,263 @@ HF_TOKEN = os.getenv("hf_token")
 MENU_FOLDER = os.getenv("menu_folder")
 os.environ["GGML_METAL_VERBOSE"] = "0"
 GEMINI_TOKEN = os.getenv("gemini_token")
-genai.configure(api_key=os.getenv("GEMINI_TOKEN"))
-model = genai.GenerativeModel("gemini-1.5-pro")
-
+telemetry = get_telemetry()
 
-# Step 1: Load and Format Data from CSVs
-import re
-import pandas as pd
-from pathlib import Path
+# Query prefix to align embeddings and retrieval
+QUERY_PREFIX = ""
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Query embedding backend: "sentence_transformers", or "onnx" for the ONNX export of the same model
+QUERY_EMBEDDER = os.getenv("query_embedder", "sentence_transformers")
+# FAISS index type ("flat", "ivf_flat", "ivf_pq" or "hnsw"), metric ("l2" or "cosine") and search-time knobs
+INDEX_KIND = os.getenv("faiss_index", "flat")
+INDEX_METRIC = os.getenv("faiss_metric", "l2")
+NPROBE = int(os.getenv("faiss_nprobe", 16))
+EF_SEARCH = int(os.getenv("faiss_ef_search", 64))
+# Approximate indexes need enough vectors to train on; smaller corpora use a flat index
+MIN_TRAINING_VECTORS = 10000
+TRAINING_SAMPLE_SIZE = 100000
+# Hybrid retrieval: number of documents put in the context, candidates taken from each
+# retriever before fusion, and the reciprocal-rank fusion constant
+RETRIEVAL_K = int(os.getenv("retrieval_k", 5))
+HYBRID_CANDIDATES = 50
+RRF_K = 60
+# Number of queries embedded per forward pass by retrieve_batch
+QUERY_BATCH_SIZE = 64
+# Language model used for answers: "gemini" or "llama" (a local GGUF model run with llama_cpp)
+LLM_BACKEND = os.getenv("llm_backend", "gemini")
+# Constant instructions opening every answer prompt, shared by all backends. Keeping them
+# first lets the local backend reuse their KV-cache state across requests.
+PROMPT_PREFIX = """You are a helpful assistant, knowledgeable about various kinds of restaurants, and have to answer user queries related to them.
+Use the context given below to answer the question faithfully.
+Ensure your answer is clear, concise, and directly addresses the user's question, and is framed like a proper answer.
+You may format your answer, and apply things like capitalisation and grammar wherever required, without changing the information itself.
+Ensure your answer is not too verbose, and is to the point, and do not add line breaks until the end of your response.
+If you do not know the answer, say "I don't know" or "I am not sure" or "I cannot say" or "I have no idea" or "I cannot answer that", do not leave an empty response.
+You may answer a question based on the history of the conversation, particulary if the user has asked a question which has not yet been answered properly, or a clarifying question has been asked to which the user has responded.
+"""
 
 def load_data_from_json():
     """
     Load and clean restaurant menu data from JSON files.
     
+    The cleaned documents are persisted in the index store, keyed by a content hash of the
+    menu files. When a menu file changes, only that restaurant is re-cleaned and re-embedded
+    (see update_index).
+    
     Returns:
         list: A list of document strings containing restaurant and menu information.
     """
-    docs = load_and_clean_menus_from_json("menu")
+    docs = load_documents(menu_fingerprint("menu"))
+    if docs is None:
+        docs, _ = update_index("menu")
     return docs
 
-# Query prefix to align embeddings and retrieval
-QUERY_PREFIX = ""
+@lru_cache(maxsize=None)
+def get_embedder(model_name=EMBEDDING_MODEL):
+    """
+    Load a sentence transformer model once per process and reuse it afterwards.
+    
+    sentence_transformers (and with it torch) is imported on first use, so starting from
+    prebuilt artifacts does not pay for it until a query needs embedding.
+    
+    Parameters:
+        model_name (str): Name of the sentence transformer model to load.
+    
+    Returns:
+        SentenceTransformer: The loaded embedding model.
+    """
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+@lru_cache(maxsize=None)
+def get_query_embedder(backend=QUERY_EMBEDDER):
+    """
+    Load the model used to embed queries once per process and reuse it afterwards.
+    
+    The model is wrapped in an LRU cache of query embeddings (query_cache_size entries,
+    0 disables it), so repeated queries skip encoding.
+    
+    Parameters:
+        backend (str): "sentence_transformers", or "onnx" to use the ONNX export of the
+                       embedding model (see onnx_embedder.py), which does not need torch.
+                       Default is the query_embedder setting.
+    
+    Returns:
+        CachedEmbedder, SentenceTransformer or OnnxQueryEmbedder: An embedder with an
+                                                                  encode method.
+    """
+    if backend == "onnx":
+        from onnx_embedder import OnnxQueryEmbedder
+        embedder = OnnxQueryEmbedder()
+    else:
+        embedder = get_embedder(EMBEDDING_MODEL)
+    return CachedEmbedder(embedder) if QUERY_CACHE_SIZE > 0 else embedder
+
+def load_prebuilt(store_dir=INDEX_DIR):
+    """
+    Load the documents and indexes prebuilt in the index store, as they are.
+    
+    Unlike load_data_from_json and build_faiss, the menu folder is not checked for changes
+    and nothing is cleaned or embedded, so start-up only reads files. The embedding model
+    is not loaded either; queries are embedded with get_query_embedder on first use.
+    
+    Parameters:
+        store_dir (str): Directory holding the persisted artifacts.
+    
+    Returns:
+        tuple or None: (documents, faiss.Index, BM25Index, metadata), or None if the store
+                       holds no complete index built with EMBEDDING_MODEL.
+    """
+    manifest = load_manifest(store_dir)
+    if manifest.get("model_name") != EMBEDDING_MODEL:
+        return None
+    documents = load_documents(manifest.get("menu_fingerprint"), store_dir)
+    if documents is None:
+        return None
+    stored = load_index(documents, EMBEDDING_MODEL, store_dir, index_config=manifest.get("index_config"))
+    if stored is None or stored[0] is None:
+        return None
+    lexical = load_lexical(documents, store_dir) or BM25Index.build(documents)
+    return documents, stored[0], lexical, load_metadata(documents, store_dir)
+
+def index_config(kind=INDEX_KIND, metric=INDEX_METRIC):
+    """
+    Describe an index configuration, so persisted indexes are rebuilt when it changes.
+    
+    Returns:
+        str: The configuration, e.g. "ivf_pq/cosine".
+    """
+    return f"{kind}/{metric}"
+
+def make_index(dim, kind=INDEX_KIND, metric=INDEX_METRIC, n_vectors=None, nlist=None, pq_m=None,
+               pq_bits=8, hnsw_m=32, ef_construction=80):
+    """
+    Create an empty FAISS index of the configured type.
+    
+    Parameters:
+        dim (int): Dimension of the vectors.
+        kind (str): "flat" (exact, brute force), "ivf_flat" (inverted lists over full
+                    vectors), "ivf_pq" (inverted lists over product-quantized codes) or
+                    "hnsw" (graph). Default is INDEX_KIND.
+        metric (str): "l2" or "cosine". Cosine uses inner product over normalized vectors.
+        n_vectors (int, optional): Expected number of vectors, used to size nlist.
+        nlist (int, optional): Number of IVF cells. Defaults to about 4 * sqrt(n_vectors).
+        pq_m (int, optional): Number of PQ sub-quantizers; must divide dim. Defaults to the
+                              largest divisor of dim giving at least 8 dimensions each.
+        pq_bits (int): Bits per PQ code. Default is 8.
+        hnsw_m (int): Number of HNSW neighbours per node. Default is 32.
+        ef_construction (int): HNSW construction beam width. Default is 80.
+    
+    Returns:
+        faiss.Index: The empty index; IVF indexes still need training.
+    """
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if metric == "cosine" else faiss.METRIC_L2
+    if kind == "flat":
+        return faiss.IndexFlatIP(dim) if metric == "cosine" else faiss.IndexFlatL2(dim)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss_metric)
+        index.hnsw.efConstruction = ef_construction
+        return index
+    if nlist is None:
+        # About 4 * sqrt(n) cells, keeping at least 39 training vectors per cell as k-means needs
+        n_vectors = n_vectors or 1
+        nlist = max(1, min(int(4 * np.sqrt(n_vectors)), n_vectors // 39))
+    quantizer = faiss.IndexFlatIP(dim) if metric == "cosine" else faiss.IndexFlatL2(dim)
+    if kind == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss_metric)
+    if kind == "ivf_pq":
+        if pq_m is None:
+            pq_m = next(m for m in range(dim // 8, 0, -1) if dim % m == 0)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_bits, faiss_metric)
+    raise ValueError(f"Unknown FAISS index type: {kind}")
+
+def prepare_vectors(vectors, metric):
+    """
+    Convert vectors to contiguous float32, normalizing them for cosine similarity.
+    
+    Parameters:
+        vectors (numpy.ndarray): The vectors to prepare.
+        metric (str or int): "cosine"/faiss.METRIC_INNER_PRODUCT normalizes the vectors.
+    
+    Returns:
+        numpy.ndarray: The prepared copy of the vectors.
+    """
+    vectors = np.array(vectors, dtype=np.float32, order="C")
+    if metric in ("cosine", faiss.METRIC_INNER_PRODUCT):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+def create_index(embeddings, kind=INDEX_KIND, metric=INDEX_METRIC, sample_size=TRAINING_SAMPLE_SIZE,
+                 id_map=False, add_batch_size=None, **kwargs):
+    """
+    Create, train and fill an index over the given embeddings.
+    
+    Approximate indexes are trained on a random sample of the embeddings. Corpora smaller
+    than MIN_TRAINING_VECTORS use a flat index, which is both exact and faster at that size.
+    
+    Parameters:
+        embeddings (numpy.ndarray): The document embeddings.
+        kind (str): Index type, see make_index. Default is INDEX_KIND.
+        metric (str): "l2" or "cosine". Default is INDEX_METRIC.
+        sample_size (int): Maximum number of vectors used for training.
+        id_map (bool): Wrap flat indexes in an IndexIDMap2, so vectors can later be removed
+                       and added incrementally by ID. Default is False.
+        add_batch_size (int, optional): Add the embeddings this many at a time, so memory-mapped
+                                        embeddings are never copied into memory all at once.
+                                        Default adds them in one call.
+        **kwargs: Passed through to make_index.
+    
+    Returns:
+        faiss.Index: The filled index; IDs are positions in embeddings.
+    """
+    n_vectors = len(embeddings)
+    if kind != "flat" and n_vectors < MIN_TRAINING_VECTORS:
+        kind = "flat"
+    index = make_index(embeddings.shape[1], kind, metric, n_vectors=n_vectors, **kwargs)
+    if kind == "flat" and id_map:
+        index = faiss.IndexIDMap2(index)
+    elif not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample = rng.choice(n_vectors, min(sample_size, n_vectors), replace=False)
+        index.train(prepare_vectors(np.asarray(embeddings)[sample], metric))
+    step = add_batch_size or max(1, n_vectors)
+    for start in range(0, n_vectors, step):
+        vectors = prepare_vectors(embeddings[start:start + step], metric)
+        if id_map and kind == "flat":
+            index.add_with_ids(vectors, np.arange(start, start + len(vectors), dtype=np.int64))
+        else:
+            index.add(vectors)
+    return index
+
+def search_params(index, sel=None, nprobe=NPROBE, ef_search=EF_SEARCH):
+    """
+    Build search parameters matching the type of an index.
+    
+    Parameters:
+        index (faiss.Index): The index to be searched (optionally wrapped in an ID map).
+        sel (faiss.IDSelector, optional): Restricts the search to the selected IDs.
+        nprobe (int): Number of IVF cells visited per query. Default is NPROBE.
+        ef_search (int): HNSW search beam width. Default is EF_SEARCH.
+    
+    Returns:
+        faiss.SearchParameters or None: Parameters for index.search.
+    """
+    base = faiss.downcast_index(index.index if isinstance(index, faiss.IndexIDMap) else index)
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=sel, nprobe=nprobe)
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=ef_search)
+    return faiss.SearchParameters(sel=sel) if sel is not None else None
 
-def build_faiss(documents, model_name="all-MiniLM-L6-v2"):
+def build_faiss(documents, model_name=EMBEDDING_MODEL):
     """
     Build a FAISS vector index from document embeddings.
     
     This function creates embeddings for each document using a sentence transformer model,
-    and builds a FAISS index for efficient similarity search.
+    and builds a FAISS index of the configured type (see make_index) for efficient similarity
+    search. If the index store already holds an index built from the same documents, model
+    and index configuration, it is loaded from disk instead. If only the index configuration
+    changed, the index is rebuilt from the stored embeddings without re-embedding.
     
     Parameters:
         documents (list): List of document strings to embed and index.
@@ -63,22 +301,249 @@ def build_faiss(documents, model_name="all-MiniLM-L6-v2"):
     Returns:
         tuple: Contains:
             - faiss.Index: The FAISS index built from document embeddings.
-            - numpy.ndarray: The document embeddings.
+            - numpy.ndarray: The document embeddings (memory-mapped when loaded from disk).
             - SentenceTransformer: The sentence transformer model used for embeddings.
     """
-    embedder = SentenceTransformer(model_name)
-    docs_with_prefix = [QUERY_PREFIX + doc for doc in documents]
-    embeddings = embedder.encode(docs_with_prefix)
-    index = faiss.IndexFlatL2(embeddings[0].shape[0])
-    index.add(np.array(embeddings))
+    embedder = get_embedder(model_name)
+    with telemetry.span("build_faiss") as span:
+        stored = load_index(documents, model_name, index_config=index_config())
+        if stored is not None and stored[0] is not None:
+            index, embeddings = stored
+            span.set(loaded=True, vectors=index.ntotal)
+            telemetry.gauge("index_vectors", index.ntotal)
+            return index, embeddings, embedder
+        if stored is not None:
+            # Same documents and model under another index configuration: reuse the embeddings
+            embeddings = stored[1]
+        else:
+            docs_with_prefix = [QUERY_PREFIX + doc for doc in documents]
+            with telemetry.span("embed_documents"):
+                embeddings = embedder.encode(docs_with_prefix).astype(np.float32)
+        index = create_index(embeddings)
+        save_index(index, embeddings, documents, model_name, index_config=index_config())
+        span.set(loaded=False, vectors=index.ntotal)
+        telemetry.gauge("index_vectors", index.ntotal)
     return index, embeddings, embedder
 
-def retrieve(query, index, embedder, documents, k=10):
+@traced("build_lexical")
+def build_lexical(documents):
+    """
+    Build the BM25 lexical index over the documents, or load it from the index store if it
+    was already built from the same documents.
+    
+    Parameters:
+        documents (list): List of document strings to index.
+    
+    Returns:
+        BM25Index: The lexical index; IDs are document positions, as in the FAISS index.
+    """
+    lexical = load_lexical(documents)
+    if lexical is None:
+        lexical = BM25Index.build(documents)
+        save_lexical(lexical, documents)
+    return lexical
+
+def _renumber_ids(index):
+    """
+    Reset the document IDs of an ID-mapped flat index to their storage positions.
+    
+    Removing vectors from a flat index compacts its storage while preserving order, and new
+    vectors are appended at the end, so after an update the storage order matches the order
+    of the persisted documents and positions can be used as IDs again.
+    
+    Parameters:
+        index (faiss.IndexIDMap2): The ID-mapped index to renumber in place.
+    """
+    faiss.copy_array_to_vector(np.arange(index.ntotal, dtype=np.int64), index.id_map)
+    index.construct_rev_map()
+
+@traced("update_index")
+def update_index(folder_path="menu", model_name=EMBEDDING_MODEL):
+    """
+    Incrementally bring the persisted documents, FAISS index and database.csv up to date
+    with the menu files.
+    
+    Each menu file is tracked by its own fingerprint and each document by an ID in an
+    IndexIDMap2. Vectors of documents from changed or deleted menu files are removed, only
+    the changed or added menu files are cleaned and embedded, and database.csv is updated
+    for just those restaurants. Approximate indexes (see make_index) do not support ordered
+    removals, so they are rebuilt from the stored embeddings instead, as is any index built
+    with another index configuration. If no usable store exists, everything is built from
+    scratch.
+    
+    Parameters:
+        folder_path (str): Path to the folder containing JSON menu files. Defaults to "menu".
+        model_name (str): Name of the sentence transformer model to use for embeddings.
+    
+    Returns:
+        tuple: Contains:
+            - list: The up-to-date document strings.
+            - faiss.Index: The up-to-date FAISS index, with IDs matching document positions.
+    """
+    embedder = get_embedder(model_name)
+    current_files = file_fingerprints(folder_path)
+    records = load_records()
+    stored = load_index(records[0], model_name, index_config=index_config()) if records is not None else None
+    if records is not None and records[3] is not None and stored is not None:
+        documents, sources, indexed_files, metadata = records
+        # index is None when it was built with another configuration; the embeddings still apply
+        index, embeddings = stored
+    else:
+        documents, sources, indexed_files, metadata = [], [], {}, []
+        index = None
+        embeddings = np.zeros((0, embedder.get_sentence_embedding_dimension()), dtype=np.float32)
+    # Only ID-mapped flat indexes keep vectors in document order across removals; approximate
+    # indexes are rebuilt from the stored embeddings instead, which still avoids re-embedding
+    incremental = isinstance(index, faiss.IndexIDMap2)
+
+    changed = [name for name, file_hash in current_files.items() if indexed_files.get(name) != file_hash]
+    stale = set(changed) | (set(indexed_files) - set(current_files))
+
+    # Remove the vectors of every document belonging to a changed or deleted menu
+    keep = [i for i, source in enumerate(sources) if source not in stale]
+    removed_ids = np.array([i for i, source in enumerate(sources) if source in stale], dtype=np.int64)
+    if incremental and len(removed_ids):
+        index.remove_ids(removed_ids)
+    remove_menus(stale - set(changed))
+
+    # Clean and embed only the changed menus
+    new_documents, new_sources, new_metadata = [], [], []
+    changed_files = [Path(folder_path) / name for name in changed]
+    for name, (file_documents, file_metadata) in zip(changed, load_and_clean_menu_records(changed_files)):
+        new_documents.extend(file_documents)
+        new_sources.extend([name] * len(file_documents))
+        new_metadata.extend(file_metadata)
+    new_embeddings = np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+    if new_documents:
+        with telemetry.span("embed_documents"):
+            new_embeddings = embedder.encode([QUERY_PREFIX + doc for doc in new_documents]).astype(np.float32)
+    all_embeddings = np.vstack([np.asarray(embeddings)[keep], new_embeddings])
+    if incremental:
+        if new_documents:
+            new_ids = np.arange(len(keep), len(keep) + len(new_documents), dtype=np.int64)
+            index.add_with_ids(prepare_vectors(new_embeddings, INDEX_METRIC), new_ids)
+        _renumber_ids(index)
+    elif stale or index is None:
+        index = create_index(all_embeddings, id_map=True)
+    embeddings = all_embeddings
+
+    documents = [documents[i] for i in keep] + new_documents
+    sources = [sources[i] for i in keep] + new_sources
+    metadata = [metadata[i] for i in keep] + new_metadata
+    save_documents(documents, menu_fingerprint(folder_path), sources=sources, files=current_files,
+                   metadata=metadata)
+    save_index(index, embeddings, documents, model_name, index_config=index_config())
+    # BM25 statistics depend on the whole corpus, and rebuilding takes milliseconds
+    save_lexical(BM25Index.build(documents), documents)
+    if not update_database(new_documents, new_sources, stale):
+        write_database(documents, sources)
+    telemetry.gauge("index_vectors", index.ntotal)
+    telemetry.gauge("documents", len(documents))
+    return documents, index
+
+def detect_filters(query, metadata):
+    """
+    Detect metadata filters implied by a query.
+    
+    The query is matched against the restaurant names known from the document metadata,
+    so a question mentioning e.g. "pizza hut" is restricted to that restaurant.
+    
+    Parameters:
+        query (str): The user query.
+        metadata (list): Metadata dict for each document.
+    
+    Returns:
+        dict: Filters for retrieve, e.g. {"restaurant": "pizza hut"}; empty if none apply.
+    """
+    text = re.sub(r"[^a-z0-9\s-]", "", query.lower())
+    names = {meta.get("restaurant") for meta in metadata if meta.get("restaurant")}
+    restaurant, _ = detect_restaurant(text, names)
+    return {"restaurant": restaurant} if restaurant else {}
+
+def matching_ids(metadata, filters):
+    """
+    Find the documents whose metadata satisfies all filters.
+    
+    Parameters:
+        metadata (list): Metadata dict for each document.
+        filters (dict): Any of "restaurant" (exact), "category" (substring), "veg_nonveg"
+                        (exact) and "max_price" (inclusive upper bound).
+    
+    Returns:
+        numpy.ndarray: Positions (and index IDs) of the matching documents.
+    """
+    def matches(meta):
+        if filters.get("restaurant") and meta.get("restaurant") != filters["restaurant"]:
+            return False
+        if filters.get("category") and filters["category"] not in (meta.get("category") or ""):
+            return False
+        if filters.get("veg_nonveg") and meta.get("veg_nonveg") != filters["veg_nonveg"]:
+            return False
+        if filters.get("max_price") is not None and (meta.get("price") is None or meta["price"] > filters["max_price"]):
+            return False
+        return True
+    return np.array([i for i, meta in enumerate(metadata) if matches(meta)], dtype=np.int64)
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuse several rankings of document IDs with reciprocal-rank fusion.
+    
+    Each document scores the sum of 1 / (k + rank) over the rankings it appears in, so
+    documents ranked well by both retrievers come first without comparing their raw scores.
+    
+    Parameters:
+        rankings (list): Lists of document IDs, each ordered best first.
+        k (int): Fusion constant damping the weight of the top ranks. Default is RRF_K.
+    
+    Returns:
+        list: The fused document IDs, best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
+
+def embed_queries(queries, embedder, batch_size=QUERY_BATCH_SIZE):
+    """
+    Embed many queries the same way documents are embedded, in micro-batches.
+    
+    Parameters:
+        queries (list): The user queries.
+        embedder (SentenceTransformer): The sentence transformer model used for the documents.
+        batch_size (int): Number of queries encoded per forward pass. Default is QUERY_BATCH_SIZE.
+    
+    Returns:
+        numpy.ndarray: The float32 query embeddings, one row per query.
+    """
+    return np.asarray(embedder.encode([QUERY_PREFIX + query for query in queries], batch_size=batch_size),
+                      dtype=np.float32)
+
+@traced("embed_query")
+def embed_query(query, embedder):
+    """
+    Embed a query the same way documents are embedded.
+    
+    Parameters:
+        query (str): The user query.
+        embedder (SentenceTransformer): The sentence transformer model used for the documents.
+    
+    Returns:
+        numpy.ndarray: The float32 query embedding, of shape (1, dimension).
+    """
+    return np.asarray(embedder.encode([QUERY_PREFIX + query]), dtype=np.float32)
+
+def retrieve(query, index, embedder, documents, k=10, filters=None, metadata=None, lexical=None,
+             query_vec=None):
     """
     Retrieve the top-k most relevant documents for a given query.
     
     This function embeds the query using the same embedder used for documents,
     performs a similarity search in the FAISS index, and returns the most relevant documents.
+    When metadata is available, the search can be restricted to a subset of documents
+    through a FAISS ID selector, so only the matching vectors are scored. When a BM25 index
+    is given, the top candidates of both searches are fused with reciprocal-rank fusion, so
+    documents naming the exact items asked about rank first.
     
     Parameters:
         query (str): The user query to search for.
@@ -86,22 +551,96 @@ def retrieve(query, index, embedder, documents, k=10):
         embedder (SentenceTransformer): The sentence transformer model for embedding the query.
         documents (list): The original list of document strings.
         k (int): Number of documents to retrieve. Default is 10.
+        filters (dict, optional): Metadata filters, see matching_ids. If omitted and metadata
+                                  is given, filters are detected from the query.
+        metadata (list, optional): Metadata dict for each document, aligned with documents.
+        lexical (BM25Index, optional): BM25 index over the documents for hybrid retrieval.
+        query_vec (numpy.ndarray, optional): The query embedding, as returned by embed_query,
+                                             if already computed.
     
     Returns:
         list: The top-k most relevant documents.
     """
-    query = QUERY_PREFIX + query
-    query_vec = embedder.encode([query])
-    _, I = index.search(np.array(query_vec), k)
-    docs = [documents[i] for i in I[0]]
-    return docs
+    return retrieve_batch([query], index, embedder, documents, k=k,
+                          filters=None if filters is None else [filters], metadata=metadata,
+                          lexical=lexical, query_vecs=query_vec)[0]
 
-def query_llama(context, query, history):
+@traced("retrieve")
+def retrieve_batch(queries, index, embedder, documents, k=10, filters=None, metadata=None, lexical=None,
+                   query_vecs=None, batch_size=QUERY_BATCH_SIZE):
     """
-    Generate a response to a user query using the Gemini model.
+    Retrieve the top-k most relevant documents for many queries at once.
     
-    This function takes the retrieved context, user query, and conversation history,
-    constructs a prompt for the Gemini model, and generates a response.
+    The queries are embedded in micro-batches of batch_size, and queries sharing the same
+    metadata filters are searched with a single index.search call over their whole query
+    matrix, which is much faster than searching one vector at a time. Results are the same
+    as calling retrieve for each query.
+    
+    Parameters:
+        queries (list): The user queries to search for.
+        index (faiss.Index): The FAISS index to search in.
+        embedder (SentenceTransformer): The sentence transformer model for embedding the queries.
+        documents (list): The original list of document strings.
+        k (int): Number of documents to retrieve per query. Default is 10.
+        filters (list, optional): Metadata filters for each query, see matching_ids. If
+                                  omitted and metadata is given, filters are detected from
+                                  each query.
+        metadata (list, optional): Metadata dict for each document, aligned with documents.
+        lexical (BM25Index, optional): BM25 index over the documents for hybrid retrieval.
+        query_vecs (numpy.ndarray, optional): The query embeddings, one row per query, if
+                                              already computed.
+        batch_size (int): Number of queries embedded per batch. Default is QUERY_BATCH_SIZE.
+    
+    Returns:
+        list: For each query, the list of its top-k most relevant documents.
+    """
+    if query_vecs is None:
+        with telemetry.span("embed_queries"):
+            query_vecs = embed_queries(queries, embedder, batch_size)
+    query_vecs = prepare_vectors(query_vecs, index.metric_type)
+    telemetry.count("retrieved_queries_total", len(queries))
+
+    # Group the queries by their filters, so each group is searched with one selector
+    groups = {}
+    for i, query in enumerate(queries):
+        query_filters = filters[i] if filters is not None else None
+        if metadata is not None and query_filters is None:
+            query_filters = detect_filters(query, metadata)
+        key = tuple(sorted(query_filters.items())) if metadata is not None and query_filters else None
+        groups.setdefault(key, []).append(i)
+
+    results = [None] * len(queries)
+    for key, positions in groups.items():
+        sel = None
+        ids = None
+        group_k = k
+        if key is not None:
+            ids = matching_ids(metadata, dict(key))
+            # Fall back to a global search if the filters match nothing
+            if len(ids):
+                sel = faiss.IDSelectorBatch(ids)
+                group_k = min(k, len(ids))
+            else:
+                ids = None
+        n_candidates = group_k if lexical is None else max(group_k, HYBRID_CANDIDATES)
+        if ids is not None:
+            n_candidates = min(n_candidates, len(ids))
+        with telemetry.span("vector_search", filtered=sel is not None):
+            _, I = index.search(query_vecs[positions], n_candidates, params=search_params(index, sel))
+        for position, row in zip(positions, I):
+            dense = [int(i) for i in row if i >= 0]
+            if lexical is None:
+                results[position] = [documents[i] for i in dense[:group_k]]
+                continue
+            with telemetry.span("lexical_search"):
+                sparse, _ = lexical.search(queries[position], n_candidates, ids=ids)
+            fused = reciprocal_rank_fusion([dense, sparse.tolist()])
+            results[position] = [documents[i] for i in fused[:group_k]]
+    return results
+
+def build_prompt(context, query, history):
+    """
+    Build the answer prompt from the retrieved context, the query and recent history.
     
     Parameters:
         context (str): The retrieved context information from relevant documents.
@@ -109,9 +648,7 @@ def query_llama(context, query, history):
         history (list): List of tuples containing previous (query, response) pairs.
     
     Returns:
-        tuple: Contains:
-            - str: The generated response.
-            - list: The updated conversation history with the new query-response pair.
+        str: The prompt for the language model.
     """
     if history:
         recent_history = history[-2:]
@@ -119,32 +656,290 @@ def query_llama(context, query, history):
     else:
         history_string = "No previous conversation history."
 
-    prompt = f"""You are a helpful assistant, knowledgeable about various kinds of restaurants, and have to answer user queries related to them.
-Use the following context to answer the question faithfully.
-Context:
+    return PROMPT_PREFIX + f"""Context:
 {context}
-The question provided by the user is,
-Question: {query}
 Your previous conversation history with the user is:
 {history_string}
-Ensure your answer is clear, concise, and directly addresses the user's question, and is framed like a proper answer.
-You may format your answer, and apply things like capitalisation and grammar wherever required, without changing the information itself.
-Ensure your answer is not too verbose, and is to the point, and do not add line breaks until the end of your response.
-If you do not know the answer, say "I don't know" or "I am not sure" or "I cannot say" or "I have no idea" or "I cannot answer that", do not leave an empty response.
-You may answer a question based on the history of the conversation, particulary if the user has asked a question which has not yet been answered properly, or a clarifying question has been asked to which the user has responded.
+The question provided by the user is,
+Question: {query}
 Answer:"""
+
+@lru_cache(maxsize=None)
+def get_gemini_model(model_name="gemini-1.5-pro"):
+    """
+    Create the Gemini model used for answers on first use.
+    
+    Parameters:
+        model_name (str): Name of the Gemini model. Default is "gemini-1.5-pro".
     
-    # Generate response using Gemini model
-    response = model.generate_content(prompt).text.strip()
+    Returns:
+        google.generativeai.GenerativeModel: The configured model.
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_TOKEN"))
+    return genai.GenerativeModel(model_name)
+
+@lru_cache(maxsize=None)
+def get_generator(backend=LLM_BACKEND):
+    """
+    Create the answer generator for a backend once per process and reuse it afterwards,
+    keeping local models loaded and warm.
+    
+    Parameters:
+        backend (str): "gemini", "llama" or "stub" (deterministic answers for benchmarks).
+                       Default is the llm_backend setting.
+    
+    Returns:
+        GeminiGenerator, LlamaGenerator or StubGenerator: The generator.
+    """
+    if backend == "gemini":
+        return GeminiGenerator(get_gemini_model())
+    if backend == "llama":
+        return LlamaGenerator(warm_prefix=PROMPT_PREFIX)
+    if backend == "stub":
+        return StubGenerator()
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+def generate_stream(prompt, backend=LLM_BACKEND):
+    """
+    Generate a response to a prompt as a stream of text chunks.
+    
+    Parameters:
+        prompt (str): The prompt for the language model.
+        backend (str): "gemini" or "llama". Default is the llm_backend setting.
+    
+    Yields:
+        str: Successive chunks of the response text.
+    """
+    yield from get_generator(backend).stream(prompt)
+
+def query_llama(context, query, history, backend=LLM_BACKEND):
+    """
+    Generate a response to a user query using the configured language model.
+    
+    This function takes the retrieved context, user query, and conversation history,
+    constructs a prompt for the Gemini model (or the local LLaMA model), and generates a
+    response.
+    
+    Parameters:
+        context (str): The retrieved context information from relevant documents.
+        query (str): The user's query.
+        history (list): List of tuples containing previous (query, response) pairs.
+        backend (str): "gemini" or "llama". Default is the llm_backend setting.
+    
+    Returns:
+        tuple: Contains:
+            - str: The generated response.
+            - list: The updated conversation history with the new query-response pair.
+    """
+    prompt = build_prompt(context, query, history)
+    generator = get_generator(backend)
+    with telemetry.span("generate", backend=backend):
+        response = generator.generate(prompt)
+    if telemetry.enabled:
+        telemetry.count("prompt_tokens_total", generator.count_tokens(prompt), backend=backend)
+        telemetry.count("response_tokens_total", generator.count_tokens(response), backend=backend)
     history.append((query, response))
     return response, history
 
+def stream_llama(context, query, history, stats=None, backend=LLM_BACKEND):
+    """
+    Generate a response to a user query as a stream of text chunks.
+    
+    The response is appended to the history only once the stream completes, so an
+    interrupted answer never enters the conversation.
+    
+    Parameters:
+        context (str): The retrieved context information from relevant documents.
+        query (str): The user's query.
+        history (list): List of tuples containing previous (query, response) pairs.
+        stats (dict, optional): Filled with "ttft_seconds" (time to the first chunk),
+                                "total_seconds" and "chunks" as the stream progresses.
+        backend (str): "gemini" or "llama". Default is the llm_backend setting.
+    
+    Yields:
+        str: Successive chunks of the response text.
+    """
+    stats = stats if stats is not None else {}
+    start = time.perf_counter()
+    stats.update(ttft_seconds=None, total_seconds=None, chunks=0)
+    chunks = []
+    prompt = build_prompt(context, query, history)
+    with telemetry.span("generate_stream", backend=backend) as span:
+        for text in generate_stream(prompt, backend):
+            if not chunks:
+                stats["ttft_seconds"] = time.perf_counter() - start
+                telemetry.observe("time_to_first_token_seconds", stats["ttft_seconds"], backend=backend)
+                text = text.lstrip()
+            chunks.append(text)
+            stats["chunks"] += 1
+            yield text
+        span.set(chunks=stats["chunks"])
+    stats["total_seconds"] = time.perf_counter() - start
+    response = "".join(chunks).strip()
+    if telemetry.enabled:
+        generator = get_generator(backend)
+        telemetry.count("prompt_tokens_total", generator.count_tokens(prompt), backend=backend)
+        telemetry.count("response_tokens_total", generator.count_tokens(response), backend=backend)
+    history.append((query, response))
+
+def cached_query_llama(context, query, history, query_vec=None, cache=None, version=None):
+    """
+    Answer a query through the answer cache, calling query_llama only on a miss.
+    
+    A cached answer is reused when the same normalized question was answered from the same
+    context, or, for the first question of a conversation, when a previous question's
+    embedding is within the cache's similarity threshold. Follow-up questions skip the
+    semantic tier because their meaning depends on the conversation history. The cache is
+    emptied whenever the persisted documents change.
+    
+    Parameters:
+        context (str): The retrieved context information from relevant documents.
+        query (str): The user's query.
+        history (list): List of tuples containing previous (query, response) pairs.
+        query_vec (numpy.ndarray, optional): The query embedding from embed_query, enabling
+                                             the semantic tier.
+        cache (AnswerCache, optional): The cache to use. Defaults to the process-wide cache.
+        version (str, optional): Identifier of the current documents. Read from the index
+                                 store manifest if omitted.
+    
+    Returns:
+        tuple: Contains:
+            - str: The generated or cached response.
+            - list: The updated conversation history with the new query-response pair.
+    """
+    cache = cache if cache is not None else get_answer_cache()
+    cache.set_version(version if version is not None else load_manifest().get("documents_hash"))
+    if query_vec is not None:
+        query_vec = prepare_vectors(query_vec, "cosine") if not history else None
+    response = cache.get(query, context, query_vec)
+    telemetry.count("answer_cache_total", result="miss" if response is None else "hit")
+    if response is not None:
+        history.append((query, response))
+        return response, history
+    start = time.perf_counter()
+    response, history = query_llama(context, query, history)
+    cache.set(query, context, response, time.perf_counter() - start, query_vec)
+    return response, history
+
+def cached_stream_llama(context, query, history, query_vec=None, cache=None, version=None, stats=None):
+    """
+    Stream the answer to a query through the answer cache.
+    
+    A cached answer (see cached_query_llama) is yielded as a single chunk. Otherwise the
+    answer is streamed by stream_llama and cached once it completes.
+    
+    Parameters:
+        context (str): The retrieved context information from relevant documents.
+        query (str): The user's query.
+        history (list): List of tuples containing previous (query, response) pairs.
+        query_vec (numpy.ndarray, optional): The query embedding from embed_query, enabling
+                                             the semantic tier.
+        cache (AnswerCache, optional): The cache to use. Defaults to the process-wide cache.
+        version (str, optional): Identifier of the current documents. Read from the index
+                                 store manifest if omitted.
+        stats (dict, optional): Filled with the timings of stream_llama, plus "cached".
+    
+    Yields:
+        str: Successive chunks of the response text.
+    """
+    cache = cache if cache is not None else get_answer_cache()
+    stats = stats if stats is not None else {}
+    cache.set_version(version if version is not None else load_manifest().get("documents_hash"))
+    if query_vec is not None:
+        query_vec = prepare_vectors(query_vec, "cosine") if not history else None
+    start = time.perf_counter()
+    response = cache.get(query, context, query_vec)
+    telemetry.count("answer_cache_total", result="miss" if response is None else "hit")
+    if response is not None:
+        stats.update(cached=True, ttft_seconds=time.perf_counter() - start, chunks=1)
+        history.append((query, response))
+        yield response
+        stats["total_seconds"] = time.perf_counter() - start
+        return
+    stats["cached"] = False
+    yield from stream_llama(context, query, history, stats)
+    cache.set(query, context, history[-1][1], stats["total_seconds"], query_vec)
+
+def build_context(query, documents, index=None, embedder=None, retrieval_query=None, metadata=None,
+                  lexical=None, k=RETRIEVAL_K, query_vec=None, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Build the context for a query, preferring exact results from the structured menu store.
+    
+    Questions about price ranges, cheapest or most expensive items, counts and veg-only
+    listings are answered from the structured store, which gives exact results in a few
+    lines. Everything else falls back to hybrid BM25 and vector retrieval, and the retrieved
+    documents are deduplicated, grouped per restaurant and cut to the token budget of the
+    answer model (see context_budget.assemble_context).
+    
+    Parameters:
+        query (str): The user query.
+        documents (list): The document strings the index was built from.
+        index (faiss.Index, optional): The FAISS index. Built or loaded on demand if omitted.
+        embedder (SentenceTransformer, optional): The embedding model used for the index.
+        retrieval_query (str, optional): Text to use for retrieval instead of query.
+        metadata (list, optional): Per-document metadata used to restrict retrieval to the
+                                   restaurant mentioned in the query. Loaded from the index
+                                   store if omitted.
+        lexical (BM25Index, optional): The BM25 index over the documents. Built or loaded on
+                                       demand if omitted.
+        k (int): Number of retrieved documents put in the context. Default is RETRIEVAL_K.
+        query_vec (numpy.ndarray, optional): Embedding of the retrieval query, if already
+                                             computed with embed_query.
+        budget (int): Maximum number of context tokens. Default is CONTEXT_TOKEN_BUDGET.
+    
+    Returns:
+        str: The context to answer the query from.
+    """
+    structured = answer_structured(query)
+    telemetry.count("contexts_total", source="retrieval" if structured is None else "structured")
+    if structured is not None:
+        return structured
+    if index is None or embedder is None:
+        index, _, embedder = build_faiss(documents)
+    metadata = metadata if metadata is not None else load_metadata(documents)
+    lexical = lexical if lexical is not None else build_lexical(documents)
+    filters = detect_filters(query, metadata) if metadata is not None else None
+    retrieved = retrieve(retrieval_query or query, index, embedder, documents, k=k, filters=filters,
+                         metadata=metadata, lexical=lexical, query_vec=query_vec)
+    return assemble_context(retrieved, budget, get_generator().count_tokens)
+
+_chatbot_state = {}
+_chatbot_state_lock = threading.Lock()
+
+def load_chatbot_state():
+    """
+    Load the documents, indexes and entity vocabulary the chatbot answers from, once per
+    version of the indexed documents.
+    
+    The first call loads them as app.init_bot does, checking the menu folder for changes.
+    Later calls only read the index store manifest and reuse the loaded state while its
+    documents hash is unchanged, so a query neither re-hashes the menu files nor reloads
+    any index. Menu changes are picked up once update_index (or streaming ingestion)
+    has rewritten the store.
+    
+    Returns:
+        tuple: (documents, faiss.Index, embedder, metadata, BM25Index, EntityVocabulary).
+    """
+    with _chatbot_state_lock:
+        version = load_manifest().get("documents_hash")
+        if version is None or _chatbot_state.get("version") != version:
+            docs = load_data_from_json()
+            index, _, embedder = build_faiss(docs)
+            state = (docs, index, embedder, load_metadata(docs), build_lexical(docs), EntityVocabulary(docs))
+            _chatbot_state.update(version=load_manifest().get("documents_hash"), state=state)
+        return _chatbot_state["state"]
+
+@traced("chatbot")
 def chatbot(query, history):
     """
     Main chatbot function that processes user queries and generates responses.
     
-    This function loads the restaurant data, processes the user query, retrieves relevant
-    context using FAISS, and generates a response using the language model.
+    This function uses the restaurant data loaded once per process (see load_chatbot_state),
+    rewrites a follow-up query into a standalone one using the entities of the previous
+    turns (see query_rewriter), retrieves relevant
+    context from the structured menu store or using FAISS, and generates a response using
+    the language model, reusing a cached answer for repeated questions.
     
     Parameters:
         query (str): The user's query.
@@ -155,11 +950,13 @@ def chatbot(query, history):
             - str: The generated response.
             - list: The updated conversation history with the new query-response pair.
     """
-    docs = load_data_from_json()
+    docs, index, embedder, metadata, lexical, vocabulary = load_chatbot_state()
     query = query.lower()
-    index, embeddings, embedder = build_faiss(docs)
-    context = "\n".join(retrieve(query, index, embedder, docs))
-    return query_llama(context, query, history)
+    standalone = Conversation.from_history(history, vocabulary).rewrite(query, vocabulary)["query"]
+    query_vec = embed_query(standalone, embedder)
+    context = build_context(standalone, docs, index, embedder, metadata=metadata, lexical=lexical,
+                            query_vec=query_vec)
+    return cached_query_llama(context, query, history, query_vec=query_vec)
 
 if __name__ == "__main__":
     q1 = "What's the price range for pizza hut's dessert menu?"
@@ -0,0 +1,129 @@
+"""
+Zomato Scraper Pool
+
+This module scrapes many restaurant pages concurrently with a fixed number of long-lived
+headless browsers. Each worker thread owns one browser and pulls jobs from a shared queue,
+so the browser start-up and driver download are paid once per worker instead of once per
+restaurant. Every job has its own timeout, and a report of successes, failures and timings
+is returned once the queue is drained.
+"""
+
+import time
+import queue
+import threading
+from data_scraper import create_driver, scrape_zomato, PAGE_TIMEOUT
+from telemetry import get_telemetry
+
+class ScraperPool:
+    """
+    Pool of reusable browser workers scraping restaurant pages from a job queue.
+
+    Parameters:
+        workers (int): Number of browsers scraping concurrently. Default is 3.
+        job_timeout (float): Seconds allowed per page, including expanding descriptions.
+        driver_factory (callable): Function taking the page timeout and returning a new
+                                   browser driver. Default is data_scraper.create_driver.
+        scrape (callable): Function scraping one page, called as
+                           scrape(url, filename, driver=driver, timeout=job_timeout).
+                           Default is data_scraper.scrape_zomato.
+    """
+
+    def __init__(self, workers=3, job_timeout=PAGE_TIMEOUT, driver_factory=create_driver, scrape=scrape_zomato):
+        self.workers = max(1, workers)
+        self.job_timeout = job_timeout
+        self.driver_factory = driver_factory
+        self.scrape = scrape
+
+    def _worker(self, jobs, results, lock):
+        """
+        Scrape jobs from the queue until it is empty, reusing one browser throughout.
+
+        A browser that fails a job is discarded and replaced for the next job, since its
+        session may be left in an unusable state.
+
+        Parameters:
+            jobs (queue.Queue): Queue of (name, url) jobs.
+            results (list): Shared list the per-job results are appended to.
+            lock (threading.Lock): Lock guarding results.
+        """
+        driver = None
+        try:
+            while True:
+                try:
+                    name, url = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.perf_counter()
+                result = {"name": name, "url": url, "status": "ok", "error": None}
+                try:
+                    if driver is None:
+                        driver = self.driver_factory(self.job_timeout)
+                    self.scrape(url, f"{name}_menu.json", driver=driver, timeout=self.job_timeout)
+                except Exception as e:
+                    result["status"] = "timeout" if "timeout" in type(e).__name__.lower() else "failed"
+                    result["error"] = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+                    if driver is not None:
+                        try:
+                            driver.quit()
+                        except Exception:
+                            pass
+                        driver = None
+                result["seconds"] = time.perf_counter() - start
+                get_telemetry().count("scrape_jobs_total", status=result["status"])
+                get_telemetry().observe("scrape_job_seconds", result["seconds"], status=result["status"])
+                with lock:
+                    results.append(result)
+        finally:
+            if driver is not None:
+                driver.quit()
+
+    def run(self, urls):
+        """
+        Scrape every restaurant page and save its menu to the menu folder.
+
+        Parameters:
+            urls (dict): Mapping of restaurant identifiers to their Zomato order page URLs.
+
+        Returns:
+            dict: Report with "succeeded" and "failed" counts, "total_seconds" of wall-clock
+                  time and a per-job list of "results" (name, url, status, error, seconds).
+        """
+        jobs = queue.Queue()
+        order = {name: i for i, name in enumerate(urls)}
+        for name, url in urls.items():
+            jobs.put((name, url))
+        results = []
+        lock = threading.Lock()
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(jobs, results, lock), daemon=True)
+            for _ in range(min(self.workers, len(urls)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            "succeeded": sum(1 for r in results if r["status"] == "ok"),
+            "failed": sum(1 for r in results if r["status"] != "ok"),
+            "total_seconds": time.perf_counter() - start,
+            "results": sorted(results, key=lambda r: order[r["name"]]),
+        }
+
+def format_report(report):
+    """
+    Format a scraping report as a human-readable summary.
+
+    Parameters:
+        report (dict): Report as returned by ScraperPool.run.
+
+    Returns:
+        str: One line per job followed by the totals.
+    """
+    lines = []
+    for r in report["results"]:
+        mark = "✅" if r["status"] == "ok" else "❌"
+        detail = f" ({r['status']}: {r['error']})" if r["status"] != "ok" else ""
+        lines.append(f"{mark} {r['name']}: {r['seconds']:.1f}s{detail}")
+    lines.append(f"{report['succeeded']} succeeded, {report['failed']} failed in {report['total_seconds']:.1f}s")
+    return "\n".join(lines)
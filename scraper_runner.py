@@ -3,11 +3,18 @@ Zomato Menu Scraper Runner
 
 This script automates the scraping of multiple Zomato restaurant menu pages
 by utilizing the scrape_zomato function from the scraper module. It processes
-a predefined dictionary of restaurant URLs and saves each restaurant's menu
-data to individual JSON files.
+a predefined dictionary of restaurant URLs with a pool of reusable headless
+browsers and saves each restaurant's menu data to individual JSON files.
 """
 
-from scraper import scrape_zomato
+import argparse
+import threading
+from pathlib import Path
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from scraper_pool import ScraperPool, format_report
+from data_scraper import scrape_zomato, PAGE_TIMEOUT
+from telemetry import get_telemetry
 
 # Dictionary mapping restaurant identifiers to their Zomato order page URLs
 urls = {
@@ -22,26 +29,78 @@ urls = {
     "baap_of_rolls": "https://www.zomato.com/roorkee/baap-of-rolls-roorkee-locality/order"
 }
 
-def main():
+def serve_fixtures(directory):
     """
-    Main function that iterates through the dictionary of restaurant URLs
-    and scrapes menu data for each restaurant.
+    Serve a directory of saved HTML pages over a local HTTP server, so the scraper
+    can be exercised without network access.
     
-    The function attempts to scrape each restaurant's menu data using the
-    scrape_zomato function. If successful, the data is saved to a JSON file
-    named after the restaurant. If an error occurs during scraping, an error
-    message is printed and the function continues to the next restaurant.
+    Parameters:
+        directory (str): Directory containing "<name>.html" restaurant pages.
     
     Returns:
-        None
+        tuple: Contains:
+            - ThreadingHTTPServer: The running server; call shutdown() when done.
+            - dict: Mapping of restaurant identifiers to their local page URLs.
     """
-    for name, url in urls.items():
-        print(f"\n==> Scraping {name} from {url}")
-        filename = f"{name}_menu.csv"
-        try:
-            scrape_zomato(url, filename)
-        except Exception as e:
-            print(f"❌ Failed to scrape {name}: {e}")
+    handler = partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    fixture_urls = {
+        page.stem: f"http://127.0.0.1:{port}/{page.name}"
+        for page in sorted(Path(directory).glob("*.html"))
+    }
+    return server, fixture_urls
+
+def main(workers=3, timeout=PAGE_TIMEOUT, fixtures=None, snapshots=None, metrics=None):
+    """
+    Main function that scrapes menu data for every restaurant in the dictionary
+    of restaurant URLs using a pool of reusable browsers.
+    
+    Each successfully scraped restaurant's menu is saved to a JSON file named
+    after the restaurant. Failures and timeouts do not stop the other jobs; a
+    summary of successes, failures and timings is printed at the end.
+    
+    Parameters:
+        workers (int): Number of browsers scraping concurrently. Default is 3.
+        timeout (float): Seconds allowed per restaurant page. Default is PAGE_TIMEOUT.
+        fixtures (str, optional): Directory of saved HTML pages to scrape from a local
+                                  server instead of the Zomato URLs.
+        snapshots (str, optional): Directory to also save compressed page HTML to, for
+                                   re-parsing with menu_parser.py without browsing again.
+        metrics (str, optional): File to write the scraping metrics to in the Prometheus
+                                 text format, e.g. for the node exporter's textfile collector.
+                                 Enables telemetry for the run.
+    
+    Returns:
+        dict: The scraping report as returned by ScraperPool.run.
+    """
+    server = None
+    targets = urls
+    if metrics:
+        get_telemetry().enabled = True
+    if fixtures:
+        server, targets = serve_fixtures(fixtures)
+    try:
+        for name, url in targets.items():
+            print(f"==> Queued {name} from {url}")
+        scrape = partial(scrape_zomato, snapshot_dir=snapshots)
+        report = ScraperPool(workers=workers, job_timeout=timeout, scrape=scrape).run(targets)
+    finally:
+        if server is not None:
+            server.shutdown()
+    print(format_report(report))
+    if metrics:
+        get_telemetry().write_prometheus(metrics)
+        print(f"✅ Metrics saved to {metrics}")
+    return report
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Scrape Zomato restaurant menus.")
+    parser.add_argument("--workers", type=int, default=3, help="number of concurrent browsers")
+    parser.add_argument("--timeout", type=float, default=PAGE_TIMEOUT, help="seconds allowed per page")
+    parser.add_argument("--fixtures", help="directory of saved HTML pages to serve locally instead of Zomato")
+    parser.add_argument("--snapshots", help="directory to save compressed page HTML to for later re-parsing")
+    parser.add_argument("--metrics", help="file to write Prometheus text metrics of the run to")
+    args = parser.parse_args()
+    main(args.workers, args.timeout, args.fixtures, args.snapshots, args.metrics)
@@ -0,0 +1,343 @@
+"""
+Streaming Menu Ingestion
+
+This module ingests very large menu folders in bounded memory. Instead of loading every
+menu file whole and keeping every document and embedding in memory until the end, menu
+items are parsed incrementally one category at a time (with ijson when installed), cleaned
+and embedded in chunks, and appended to an on-disk staging store: a JSONL file of
+documents with their source and metadata, and a raw float32 file of their embeddings.
+
+After each restaurant (menu file) completes, a checkpoint records the files done and the
+length of both staging files, so an interrupted run resumes from the last completed
+restaurant: partial writes are truncated and completed files are skipped. Once every file
+is ingested, finalize writes the usual index store artifacts, database.csv and the FAISS
+index, built from the memory-mapped embeddings, so rag.py loads them as if update_index had
+built them.
+
+Usage:
+    python -m streaming_ingest --folder menu --chunk-size 256
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from data_cleaning import (read_restaurant, generate_restaurant_summary, build_restaurant_document, flatten_menus,
+                           clean_menu_frame, build_documents_from_frame, build_metadata_from_frame,
+                           restaurant_metadata, write_database, SUMMARY_CONCURRENCY)
+from menu_store import save_restaurant, append_items, retain_menus, MENU_DB_PATH
+from index_store import INDEX_DIR, file_fingerprints, menu_fingerprint, save_documents, save_index, save_lexical
+from lexical_index import BM25Index
+from rag import get_embedder, create_index, index_config, EMBEDDING_MODEL, QUERY_PREFIX
+from telemetry import get_telemetry
+
+# Load environment variables
+load_dotenv()
+
+# Menu items cleaned and embedded together
+INGEST_CHUNK_SIZE = int(os.getenv("ingest_chunk_size", 256))
+STAGING_DIR = os.path.join(INDEX_DIR, "staging")
+CHECKPOINT_FILE = "checkpoint.json"
+RECORDS_FILE = "documents.jsonl"
+VECTORS_FILE = "embeddings.f32"
+
+def _ijson():
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson
+
+def read_menu_stream(file):
+    """
+    Open a menu file for incremental reading.
+
+    With ijson installed, only the restaurant details and one category at a time are held
+    in memory, and the categories are only read once iterated. Without it, the file is
+    parsed whole here, which bounds memory by the largest menu file rather than by the whole
+    corpus; bounded memory for very large single files needs ijson.
+
+    Parameters:
+        file (str or Path): Path to the JSON menu file.
+
+    Returns:
+        tuple: (raw restaurant dict, iterator over the raw category dicts of the menu).
+    """
+    ijson = _ijson()
+    if ijson is None:
+        with open(file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("restaurant", {}), iter(data.get("menu", []))
+    with open(file, "rb") as f:
+        restaurant = next(ijson.items(f, "restaurant", use_float=True), {})
+
+    def categories():
+        with open(file, "rb") as f:
+            yield from ijson.items(f, "menu.item", use_float=True)
+
+    return restaurant, categories()
+
+def iter_item_frames(restaurant, categories, chunk_size=INGEST_CHUNK_SIZE):
+    """
+    Clean the items of a menu in chunks of whole categories.
+
+    Parameters:
+        restaurant (dict): Raw restaurant details of the menu.
+        categories (iterable): Raw category dicts, each with its "items".
+        chunk_size (int): Number of items after which a chunk is cleaned. A chunk holds whole
+                          categories, so it can be larger.
+
+    Yields:
+        pandas.DataFrame: Cleaned menu tables, as returned by clean_menu_frame.
+    """
+    batch, n_items = [], 0
+    for category in categories:
+        batch.append(category)
+        n_items += len(category.get("items", []))
+        if n_items >= chunk_size:
+            yield clean_menu_frame(flatten_menus([{"restaurant": restaurant, "menu": batch}]))
+            batch, n_items = [], 0
+    if batch:
+        yield clean_menu_frame(flatten_menus([{"restaurant": restaurant, "menu": batch}]))
+
+class StagingStore:
+    """
+    Append-only store of documents and embeddings with a per-file checkpoint.
+
+    Parameters:
+        staging_dir (str): Directory of the staging files. Default is index_store/staging.
+    """
+
+    def __init__(self, staging_dir=STAGING_DIR):
+        self.dir = Path(staging_dir)
+        self.checkpoint = None
+
+    def open(self, model_name, dimension, resume=True):
+        """
+        Open the store, resuming from its checkpoint if it was written for the same model.
+
+        Writes after the checkpoint, from a restaurant that did not complete, are discarded.
+
+        Returns:
+            dict: The checkpoint: "files" done with their fingerprints, and "documents".
+        """
+        path = self.dir / CHECKPOINT_FILE
+        complete = all((self.dir / name).exists() for name in (CHECKPOINT_FILE, RECORDS_FILE, VECTORS_FILE))
+        checkpoint = json.loads(path.read_text(encoding="utf-8")) if resume and complete else None
+        if checkpoint is None or checkpoint["model_name"] != model_name or checkpoint["dimension"] != dimension:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            self.dir.mkdir(parents=True)
+            checkpoint = {"model_name": model_name, "dimension": dimension, "files": {}, "documents": 0,
+                          "records_bytes": 0, "vectors_bytes": 0}
+            (self.dir / RECORDS_FILE).touch()
+            (self.dir / VECTORS_FILE).touch()
+        for name, size in [(RECORDS_FILE, checkpoint["records_bytes"]), (VECTORS_FILE, checkpoint["vectors_bytes"])]:
+            with open(self.dir / name, "r+b") as f:
+                f.truncate(size)
+        self.checkpoint = checkpoint
+        self._save_checkpoint()
+        return checkpoint
+
+    def append(self, documents, source, metadata, embeddings):
+        """
+        Append documents of one menu file with their metadata and embeddings.
+        """
+        with open(self.dir / RECORDS_FILE, "a", encoding="utf-8") as f:
+            for document, meta in zip(documents, metadata):
+                f.write(json.dumps({"document": document, "source": source, "metadata": meta}) + "\n")
+        with open(self.dir / VECTORS_FILE, "ab") as f:
+            f.write(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+
+    def commit(self, source, fingerprint, n_documents):
+        """
+        Record a menu file as completed.
+        """
+        self.checkpoint["files"][source] = fingerprint
+        self.checkpoint["documents"] += n_documents
+        self.checkpoint["records_bytes"] = (self.dir / RECORDS_FILE).stat().st_size
+        self.checkpoint["vectors_bytes"] = (self.dir / VECTORS_FILE).stat().st_size
+        self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        # Written through a temporary file, so a crash never leaves a partial checkpoint
+        tmp_path = self.dir / (CHECKPOINT_FILE + ".tmp")
+        tmp_path.write_text(json.dumps(self.checkpoint), encoding="utf-8")
+        os.replace(tmp_path, self.dir / CHECKPOINT_FILE)
+
+    def records(self):
+        """
+        Yield the stored (document, source, metadata) records in order.
+        """
+        with open(self.dir / RECORDS_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield record["document"], record["source"], record["metadata"]
+
+    def embeddings(self):
+        """
+        Return the stored embeddings, memory-mapped.
+        """
+        shape = (self.checkpoint["documents"], self.checkpoint["dimension"])
+        if not shape[0]:
+            return np.zeros(shape, dtype=np.float32)
+        return np.memmap(self.dir / VECTORS_FILE, dtype=np.float32, mode="r", shape=shape)
+
+    def clear(self):
+        """
+        Delete the staging files.
+        """
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def ingest_file(file, summary, store, embedder, chunk_size=INGEST_CHUNK_SIZE, menu_db=MENU_DB_PATH, menu=None):
+    """
+    Stream one menu file into the staging store and the structured menu store.
+
+    Parameters:
+        file (Path): Path to the JSON menu file.
+        summary (dict): The restaurant summary, as returned by generate_restaurant_summary.
+        store (StagingStore): The open staging store.
+        embedder (SentenceTransformer): The document embedding model.
+        chunk_size (int): Number of items cleaned and embedded together.
+        menu_db (str, optional): Path of the structured menu store. None skips writing it.
+        menu (tuple, optional): The file as already opened with read_menu_stream, so it is
+                                not parsed again.
+
+    Returns:
+        int: Number of documents written.
+    """
+    restaurant, categories = menu if menu is not None else read_menu_stream(file)
+    name, location, contact = read_restaurant({"restaurant": restaurant})
+    if menu_db:
+        save_restaurant(file.name, name, location, contact, menu_db)
+    pending = [build_restaurant_document(name, location, contact, summary)]
+    pending_metadata = [restaurant_metadata(name)]
+    n_documents = 0
+    for frame in iter_item_frames(restaurant, categories, chunk_size):
+        if menu_db:
+            append_items(file.name, name, frame, menu_db)
+        documents = pending + build_documents_from_frame(frame)
+        metadata = pending_metadata + build_metadata_from_frame(frame)
+        pending, pending_metadata = [], []
+        store.append(documents, file.name, metadata, embedder.encode([QUERY_PREFIX + doc for doc in documents]))
+        n_documents += len(documents)
+    if pending:
+        store.append(pending, file.name, pending_metadata, embedder.encode([QUERY_PREFIX + pending[0]]))
+        n_documents += len(pending)
+    return n_documents
+
+def ingest_menus(folder_path="menu", staging_dir=STAGING_DIR, chunk_size=INGEST_CHUNK_SIZE, model_name=EMBEDDING_MODEL,
+                 resume=True, model=None, cache=None, offline=None, menu_db=MENU_DB_PATH):
+    """
+    Stream every menu file of a folder into the staging store, resuming an interrupted run.
+
+    Every file is opened once with read_menu_stream. Restaurant summaries only need the
+    restaurant details, so they are generated on a bounded thread pool a few files ahead of
+    the file whose items are being streamed in chunks; at most SUMMARY_CONCURRENCY opened
+    files wait for their summary.
+
+    Parameters:
+        folder_path (str): Path to the folder containing JSON menu files. Defaults to "menu".
+        staging_dir (str): Directory of the staging store.
+        chunk_size (int): Number of items cleaned and embedded together.
+        model_name (str): Name of the sentence transformer model used for embeddings.
+        resume (bool): Continue from the checkpoint of a previous run. Default is True.
+        model, cache, offline: Passed through to generate_restaurant_summary.
+        menu_db (str, optional): Path of the structured menu store. None skips writing it.
+
+    Returns:
+        StagingStore: The store holding every menu file of the folder.
+    """
+    telemetry = get_telemetry()
+    embedder = get_embedder(model_name)
+    store = StagingStore(staging_dir)
+    fingerprints = file_fingerprints(folder_path)
+    checkpoint = store.open(model_name, embedder.get_sentence_embedding_dimension(), resume)
+    # Completed files that changed or disappeared since cannot be removed from an append-only store
+    done = checkpoint["files"]
+    if any(fingerprints.get(name) != file_hash for name, file_hash in done.items()):
+        checkpoint = store.open(model_name, embedder.get_sentence_embedding_dimension(), resume=False)
+        done = checkpoint["files"]
+    files = [Path(folder_path) / name for name in fingerprints if name not in done]
+    if done:
+        print(f"✅ Resuming after {len(done)} completed menu files ({checkpoint['documents']} documents)")
+
+    def ingest_next():
+        file, menu, summary = pending.popleft()
+        with telemetry.span("ingest_file") as span:
+            n_documents = ingest_file(file, summary.result(), store, embedder, chunk_size, menu_db, menu=menu)
+            store.commit(file.name, fingerprints[file.name], n_documents)
+            span.set(file=file.name, documents=n_documents)
+        telemetry.count("ingested_files_total")
+        telemetry.count("ingested_documents_total", n_documents)
+
+    workers = max(1, SUMMARY_CONCURRENCY)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for file in files:
+            menu = read_menu_stream(file)
+            name, location, _ = read_restaurant({"restaurant": menu[0]})
+            pending.append((file, menu, executor.submit(generate_restaurant_summary, name, location, model=model,
+                                                        cache=cache, offline=offline)))
+            if len(pending) > workers:
+                ingest_next()
+        while pending:
+            ingest_next()
+    return store
+
+def finalize(store, folder_path="menu", model_name=EMBEDDING_MODEL, store_dir=INDEX_DIR, add_batch_size=65536,
+             menu_db=MENU_DB_PATH, database_path=None):
+    """
+    Write the index store artifacts and database.csv from a completed staging store.
+
+    The FAISS index is filled from the memory-mapped embeddings add_batch_size vectors at a
+    time, so the embeddings are never held in memory next to the index.
+
+    Parameters:
+        store (StagingStore): The staging store, as returned by ingest_menus.
+        folder_path (str): Path to the folder containing JSON menu files.
+        model_name (str): Name of the sentence transformer model used for embeddings.
+        store_dir (str): Directory holding the persisted artifacts.
+        add_batch_size (int): Number of vectors added to the index at a time.
+        menu_db (str, optional): Path of the structured menu store. None skips pruning it.
+        database_path (str, optional): Path of the CSV database. Defaults to database.csv for
+                                       the default store_dir, and to database.csv inside
+                                       store_dir otherwise, so a scratch store never
+                                       overwrites the real database.
+
+    Returns:
+        int: Number of documents indexed.
+    """
+    documents, sources, metadata = [], [], []
+    for document, source, meta in store.records():
+        documents.append(document)
+        sources.append(source)
+        metadata.append(meta)
+    embeddings = store.embeddings()
+    index = create_index(embeddings, id_map=True, add_batch_size=add_batch_size)
+    save_documents(documents, menu_fingerprint(folder_path), store_dir, sources=sources,
+                   files=dict(store.checkpoint["files"]), metadata=metadata)
+    save_index(index, embeddings, documents, model_name, store_dir, index_config=index_config())
+    save_lexical(BM25Index.build(documents), documents, store_dir)
+    if database_path is None:
+        database_path = "database.csv" if store_dir == INDEX_DIR else os.path.join(store_dir, "database.csv")
+    write_database(documents, sources, database_path)
+    if menu_db:
+        retain_menus(list(store.checkpoint["files"]), menu_db)
+    return len(documents)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Ingest menu files in bounded memory, resuming interrupted runs.")
+    parser.add_argument("--folder", default="menu", help="folder of JSON menu files")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE, help="items cleaned and embedded together")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of a previous run")
+    parser.add_argument("--keep-staging", action="store_true", help="keep the staging files after finalizing")
+    args = parser.parse_args()
+    staging = ingest_menus(args.folder, chunk_size=args.chunk_size, resume=not args.restart)
+    print(f"✅ Indexed {finalize(staging, args.folder)} documents")
+    if not args.keep_staging:
+        staging.clear()
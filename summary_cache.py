@@ -0,0 +1,169 @@
+"""
+Restaurant Summary Cache
+
+This module provides a durable SQLite cache for the restaurant summaries generated by the
+Gemini model during menu cleaning, so repeated loads do not pay for a network round-trip
+per restaurant. Entries are keyed by the normalized restaurant name, location and prompt
+version, and expire after a configurable time-to-live.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Bump whenever the summary prompt or its parsing changes, so stale entries are not reused
+PROMPT_VERSION = "1"
+SUMMARY_CACHE_PATH = os.getenv("summary_cache_path", "summary_cache.db")
+SUMMARY_CACHE_TTL = float(os.getenv("summary_cache_ttl", 30 * 24 * 3600))
+
+def normalize_key_part(text):
+    """
+    Normalize a restaurant name or location for use in a cache key.
+
+    Parameters:
+        text (str or None): The text to normalize.
+
+    Returns:
+        str: Lowercased text with punctuation removed and whitespace collapsed.
+    """
+    text = re.sub(r"[^a-z0-9\s]", "", str(text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+def make_key(restaurant_name, location, prompt_version=PROMPT_VERSION):
+    """
+    Build the cache key for a restaurant summary.
+
+    Parameters:
+        restaurant_name (str): Name of the restaurant.
+        location (str): Location of the restaurant.
+        prompt_version (str): Version of the prompt used to generate the summary.
+
+    Returns:
+        str: The cache key.
+    """
+    return "|".join([normalize_key_part(restaurant_name), normalize_key_part(location), prompt_version])
+
+class SummaryCache:
+    """
+    SQLite-backed cache of generated restaurant summaries with a time-to-live.
+
+    Parameters:
+        path (str): Path of the SQLite database file, or ":memory:" for a throwaway cache.
+        ttl (float): Seconds after which an entry is considered stale. None disables expiry.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_PATH, ttl=SUMMARY_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, restaurant_name, location, prompt_version=PROMPT_VERSION):
+        """
+        Look up a cached summary.
+
+        Parameters:
+            restaurant_name (str): Name of the restaurant.
+            location (str): Location of the restaurant.
+            prompt_version (str): Version of the prompt used to generate the summary.
+
+        Returns:
+            dict or None: The cached summary fields, or None if missing or expired.
+        """
+        key = make_key(restaurant_name, location, prompt_version)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        summary, created_at = row
+        if self.ttl is not None and time.time() - created_at > self.ttl:
+            return None
+        return json.loads(summary)
+
+    def get_any(self, restaurant_name, location, prompt_version=PROMPT_VERSION):
+        """
+        Look up a cached summary regardless of its age, for use when generation is unavailable.
+
+        Parameters:
+            restaurant_name (str): Name of the restaurant.
+            location (str): Location of the restaurant.
+            prompt_version (str): Version of the prompt used to generate the summary.
+
+        Returns:
+            dict or None: The cached summary fields, or None if missing.
+        """
+        key = make_key(restaurant_name, location, prompt_version)
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, restaurant_name, location, summary, prompt_version=PROMPT_VERSION):
+        """
+        Store a generated summary.
+
+        Parameters:
+            restaurant_name (str): Name of the restaurant.
+            location (str): Location of the restaurant.
+            summary (dict): The summary fields to cache.
+            prompt_version (str): Version of the prompt used to generate the summary.
+        """
+        key = make_key(restaurant_name, location, prompt_version)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(summary), time.time()),
+            )
+
+    def invalidate(self, restaurant_name=None, location=None):
+        """
+        Remove cached summaries.
+
+        Parameters:
+            restaurant_name (str, optional): Only remove entries for this restaurant. If omitted,
+                                             the whole cache is cleared.
+            location (str, optional): Together with restaurant_name, only remove the entry for
+                                      this location.
+        """
+        with self._lock, self._conn:
+            if restaurant_name is None:
+                self._conn.execute("DELETE FROM summaries")
+            elif location is None:
+                prefix = normalize_key_part(restaurant_name) + "|"
+                self._conn.execute("DELETE FROM summaries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            else:
+                prefix = "|".join([normalize_key_part(restaurant_name), normalize_key_part(location)]) + "|"
+                self._conn.execute("DELETE FROM summaries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def close(self):
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
+
+_default_cache = None
+
+def get_default_cache():
+    """
+    Return the process-wide summary cache stored at SUMMARY_CACHE_PATH, creating it on first use.
+
+    Returns:
+        SummaryCache: The shared cache instance.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SummaryCache()
+    return _default_cache
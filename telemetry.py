@@ -0,0 +1,328 @@
+"""
+Telemetry
+
+This module records where the time goes in ingestion, retrieval, generation and scraping:
+timing spans around each stage, counters (prompt and response tokens, cache hits, errors)
+and gauges (index size). Metrics are exported in the Prometheus text format, served on a
+local HTTP endpoint when telemetry_port is set or written to a file, and every finished span
+can be appended to a JSONL log (telemetry_log) for per-request analysis.
+
+Telemetry is off unless the telemetry setting is "true". When off, span returns a shared
+no-op context manager and the other calls return at once, so instrumented code pays a
+single attribute check per call.
+"""
+
+import os
+import json
+import time
+import bisect
+import functools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+TELEMETRY_ENABLED = os.getenv("telemetry", "false").lower() == "true"
+TELEMETRY_LOG = os.getenv("telemetry_log") or None
+TELEMETRY_PORT = int(os.getenv("telemetry_port", 0))
+METRIC_PREFIX = "menu_rag_"
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+class _NoopSpan:
+    """
+    Span returned while telemetry is disabled; does nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """
+    A timed stage, used as a context manager. Its duration is recorded in the
+    "<name>_seconds" histogram, and exceptions escaping it in the "errors_total" counter.
+
+    Parameters:
+        telemetry (Telemetry): The telemetry the span is recorded in.
+        name (str): Name of the stage, e.g. "retrieve".
+        labels (dict): Metric labels, e.g. {"backend": "gemini"}.
+    """
+    __slots__ = ("telemetry", "name", "labels", "attributes", "start")
+
+    def __init__(self, telemetry, name, labels):
+        self.telemetry = telemetry
+        self.name = name
+        self.labels = labels
+        self.attributes = {}
+        self.start = None
+
+    def set(self, **attributes):
+        """
+        Attach attributes to the span's JSONL log record, e.g. set(documents=120).
+        """
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.telemetry._finish(self, time.perf_counter() - self.start, exc_type)
+        return False
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Telemetry:
+    """
+    Thread-safe registry of counters, gauges and latency histograms.
+
+    Parameters:
+        enabled (bool): Whether anything is recorded. Default is the telemetry setting.
+        log_path (str, optional): JSONL file every finished span is appended to. Default is
+                                  the telemetry_log setting.
+        buckets (list): Upper bounds in seconds of the latency histogram buckets.
+    """
+
+    def __init__(self, enabled=TELEMETRY_ENABLED, log_path=TELEMETRY_LOG, buckets=LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.buckets = list(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._log = None
+
+    def span(self, name, **labels):
+        """
+        Time a stage.
+
+        Parameters:
+            name (str): Name of the stage, e.g. "retrieve".
+            **labels: Metric labels, e.g. backend="gemini". Keep their values few.
+
+        Returns:
+            Span: Context manager timing its block, or a no-op span when disabled.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, labels)
+
+    def count(self, name, value=1, **labels):
+        """
+        Increase a counter, e.g. count("prompt_tokens_total", 350, backend="gemini").
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        """
+        Set a gauge to its current value, e.g. gauge("index_vectors", index.ntotal).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Record a duration in a latency histogram, e.g. observe("time_to_first_token_seconds", 0.4).
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        position = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            if position < len(self.buckets):
+                histogram["buckets"][position] += 1
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+
+    def _finish(self, span, seconds, exc_type):
+        """
+        Record a finished span and append it to the JSONL log.
+        """
+        self.observe(f"{span.name}_seconds", seconds, **span.labels)
+        status = "ok"
+        if exc_type is not None:
+            # GeneratorExit and KeyboardInterrupt mean the caller stopped, not that the stage failed
+            status = "error" if issubclass(exc_type, Exception) else "cancelled"
+            if status == "error":
+                self.count("errors_total", stage=span.name, error=exc_type.__name__)
+        if self.log_path:
+            record = {"time": time.time(), "span": span.name, "seconds": round(seconds, 6), "status": status,
+                      **span.labels, **span.attributes}
+            if exc_type is not None:
+                record["error"] = exc_type.__name__
+            line = json.dumps(record, default=str) + "\n"
+            with self._lock:
+                if self._log is None:
+                    self._log = open(self.log_path, "a", encoding="utf-8")
+                self._log.write(line)
+                self._log.flush()
+
+    def snapshot(self):
+        """
+        Return the current metrics.
+
+        Returns:
+            dict: "counters", "gauges" and "histograms", each mapping a metric name to a list
+                  of {"labels": dict, ...} entries with the value, or the count, sum and
+                  per-bucket counts of a histogram.
+        """
+        result = {"counters": {}, "gauges": {}, "histograms": {}}
+        with self._lock:
+            for kind, values in [("counters", self._counters), ("gauges", self._gauges)]:
+                for (name, key), value in sorted(values.items()):
+                    result[kind].setdefault(name, []).append({"labels": dict(key), "value": value})
+            for (name, key), histogram in sorted(self._histograms.items()):
+                result["histograms"].setdefault(name, []).append({
+                    "labels": dict(key), "count": histogram["count"], "sum": histogram["sum"],
+                    "buckets": dict(zip(self.buckets, histogram["buckets"])),
+                })
+        return result
+
+    def prometheus_text(self, prefix=METRIC_PREFIX):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Parameters:
+            prefix (str): Prefix of every metric name. Default is "menu_rag_".
+
+        Returns:
+            str: The metrics, one sample per line.
+        """
+        lines = []
+        snapshot = self.snapshot()
+        for kind, prom_type in [("counters", "counter"), ("gauges", "gauge")]:
+            for name, samples in snapshot[kind].items():
+                lines.append(f"# TYPE {prefix}{name} {prom_type}")
+                for sample in samples:
+                    key = _label_key(sample["labels"])
+                    lines.append(f"{prefix}{name}{_format_labels(key)} {sample['value']}")
+        for name, samples in snapshot["histograms"].items():
+            lines.append(f"# TYPE {prefix}{name} histogram")
+            for sample in samples:
+                key = _label_key(sample["labels"])
+                cumulative = 0
+                for bound, count in sample["buckets"].items():
+                    cumulative += count
+                    lines.append(f"{prefix}{name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{prefix}{name}_bucket{_format_labels(key, [('le', '+Inf')])} {sample['count']}")
+                lines.append(f"{prefix}{name}_sum{_format_labels(key)} {sample['sum']}")
+                lines.append(f"{prefix}{name}_count{_format_labels(key)} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write the metrics in the Prometheus text format to a file, e.g. for the node
+        exporter's textfile collector after a batch job.
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def serve(self, port=TELEMETRY_PORT, host="127.0.0.1"):
+        """
+        Serve the metrics in the Prometheus text format on http://host:port/metrics from a
+        background thread.
+
+        Parameters:
+            port (int): Port to listen on; 0 picks a free port. Default is the telemetry_port setting.
+            host (str): Interface to listen on. Default is localhost only.
+
+        Returns:
+            ThreadingHTTPServer: The running server; call shutdown() to stop it.
+        """
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def reset(self):
+        """
+        Drop every recorded metric.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def close(self):
+        """
+        Close the JSONL log.
+        """
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+_default_telemetry = Telemetry()
+
+def get_telemetry():
+    """
+    Return the process-wide telemetry, configured from the telemetry settings.
+    """
+    return _default_telemetry
+
+def traced(name, **labels):
+    """
+    Decorate a function so each call is timed as a span of the process-wide telemetry.
+
+    Parameters:
+        name (str): Name of the stage.
+        **labels: Metric labels of the span.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _default_telemetry.enabled:
+                return func(*args, **kwargs)
+            with _default_telemetry.span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,71 @@
+"""
+Shared Test Fixtures
+
+Menus for the indexing tests are parsed from the saved pages in the fixtures folder, and
+documents are embedded with a small deterministic embedder instead of the sentence
+transformer, with restaurant summaries served offline.
+"""
+
+import json
+import hashlib
+import numpy as np
+import pytest
+from pathlib import Path
+import rag
+import summary_cache
+import data_cleaning
+from menu_parser import parse_menu_html
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+class FakeEmbedder:
+    """
+    Stand-in for the sentence transformer, embedding each text from its hash.
+    """
+
+    dimension = 16
+
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([np.frombuffer(hashlib.sha256(text.encode("utf-8")).digest(), dtype=np.uint8)[:self.dimension]
+                         for text in texts], dtype=np.float32).reshape(len(texts), self.dimension)
+
+def write_menu(folder, name, edit=None, source=None):
+    """
+    Parse a fixture page into "<source>_menu.json" in folder, optionally edited first.
+
+    Parameters:
+        folder (pathlib.Path): Menu folder to write to.
+        name (str): Fixture page name without ".html".
+        edit (callable, optional): Function changing the parsed menu data in place.
+        source (str, optional): Name of the menu file without "_menu.json". Default is name.
+
+    Returns:
+        pathlib.Path: The written menu file.
+    """
+    data = parse_menu_html((FIXTURES / f"{name}.html").read_bytes())
+    if edit is not None:
+        edit(data)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{source or name}_menu.json"
+    path.write_text(json.dumps(data, indent=4), encoding="utf-8")
+    return path
+
+@pytest.fixture
+def fake_embedder(monkeypatch):
+    """
+    Embed with FakeEmbedder and summarize restaurants offline from an in-memory cache.
+    """
+    embedder = FakeEmbedder()
+    monkeypatch.setattr(rag, "get_embedder", lambda model_name=rag.EMBEDDING_MODEL: embedder)
+    monkeypatch.setattr(data_cleaning, "OFFLINE_SUMMARIES", True)
+    cache = summary_cache.SummaryCache(":memory:")
+    monkeypatch.setattr(summary_cache, "_default_cache", cache)
+    yield embedder
+    cache.close()
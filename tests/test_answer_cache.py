@@ -0,0 +1,104 @@
+"""
+Answer Cache Tests
+
+Covers the exact and semantic tiers, expiry and LRU eviction, clearing when the index
+version changes, and how rag.cached_query_llama uses the cache for follow-up questions.
+"""
+
+import numpy as np
+import pytest
+import rag
+import answer_cache
+from answer_cache import AnswerCache
+
+class Clock:
+    """
+    Replacement for time.time that only moves when advanced.
+    """
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def cache(clock):
+    return AnswerCache(max_entries=3, ttl=60, threshold=0.95)
+
+def test_exact_tier_matches_normalized_query_and_context(cache):
+    cache.set("Price of Sweet Lassi?", "context a", "50", seconds=2.0)
+    assert cache.get("price of sweet lassi", "context a") == "50"
+    # The same question answered from another context is a different answer
+    assert cache.get("price of sweet lassi", "context b") is None
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["misses"], stats["saved_seconds"]) == (1, 1, 2.0)
+    assert stats["hit_rate"] == 0.5
+
+def test_semantic_tier_uses_similarity_threshold(cache):
+    cache.set("price of sweet lassi", "context a", "50", seconds=1.0, query_vec=unit(1, 0, 0))
+    assert cache.get("how much is a sweet lassi", "context b", unit(1, 0.1, 0)) == "50"
+    assert cache.get("how much is a mango lassi", "context b", unit(1, 1, 0)) is None
+    # Without an embedding only the exact tier is tried
+    assert cache.get("how much is a sweet lassi", "context b") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("price of sweet lassi", "context a", "50", seconds=1.0, query_vec=unit(1, 0, 0))
+    clock.now += 60
+    assert cache.get("price of sweet lassi", "context a") == "50"
+    clock.now += 1
+    assert cache.get("price of sweet lassi", "context a", unit(1, 0, 0)) is None
+    assert cache.get("sweet lassi price", "context a", unit(1, 0, 0)) is None
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for name in ["a", "b", "c"]:
+        cache.set(name, "context", name.upper(), seconds=1.0)
+    assert cache.get("a", "context") == "A"
+    cache.set("d", "context", "D", seconds=1.0)
+    assert cache.stats()["entries"] == 3
+    assert cache.get("b", "context") is None
+    assert [cache.get(name, "context") for name in ["a", "c", "d"]] == ["A", "C", "D"]
+
+def test_version_change_clears_entries(cache):
+    cache.set_version("v1")
+    cache.set("a", "context", "A", seconds=1.0)
+    cache.set_version("v1")
+    assert cache.get("a", "context") == "A"
+    cache.set_version("v2")
+    assert cache.get("a", "context") is None
+    assert cache.stats()["entries"] == 0
+    # Clearing keeps the statistics
+    cache.set("a", "context", "A", seconds=1.0)
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["exact_hits"] == 1
+
+def test_cached_query_llama_skips_semantic_tier_for_follow_ups(cache, monkeypatch):
+    calls = []
+
+    def query_llama(context, query, history):
+        calls.append(query)
+        history.append((query, f"answer {len(calls)}"))
+        return history[-1][1], history
+
+    monkeypatch.setattr(rag, "query_llama", query_llama)
+    vector = unit(1, 0, 0).reshape(1, -1)
+    assert rag.cached_query_llama("context a", "price of sweet lassi", [], vector, cache, "v1")[0] == "answer 1"
+    assert rag.cached_query_llama("context b", "sweet lassi price", [], vector, cache, "v1")[0] == "answer 1"
+    # A follow-up means something else depending on the conversation
+    history = [("where is patiala lassi", "in civil lines")]
+    assert rag.cached_query_llama("context c", "sweet lassi price", history, vector, cache, "v1")[0] == "answer 2"
+    # The exact tier still applies to follow-ups
+    history = [("where is patiala lassi", "in civil lines")]
+    assert rag.cached_query_llama("context a", "price of sweet lassi", history, vector, cache, "v1")[0] == "answer 1"
+    assert calls == ["price of sweet lassi", "sweet lassi price"]
@@ -0,0 +1,204 @@
+"""
+API Server Tests
+
+Covers the bounded session store and the snapshot swap on reindex: requests in flight
+finish on the snapshot they started with, and each snapshot answers from its own cache.
+Retrieval and generation are replaced by small fakes, so no models are loaded.
+"""
+
+import os
+import gc
+import asyncio
+import threading
+import numpy as np
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import rag
+import api_server
+import menu_store
+from api_server import SessionStore, IndexSnapshot, ChatService
+from query_rewriter import Conversation
+
+OLD_DOCUMENTS = [
+    "patiala lassi offers sweet lassi in the category 'lassi'.\n"
+    "sweet lassi is rich source of protein and calcium. for price 50 and type: veg with spice level: normal.",
+]
+NEW_DOCUMENTS = OLD_DOCUMENTS + [
+    "patiala lassi offers cold coffee in the category 'other specialty'.\n"
+    "cold coffee is not described. for price 80 and type: veg with spice level: normal.",
+]
+
+class Clock:
+    """
+    Replacement for time.monotonic that only moves when advanced.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(api_server.time, "monotonic", clock)
+    return clock
+
+def test_sessions_keep_only_recent_turns():
+    store = SessionStore(max_turns=2)
+    assert store.history("a") == []
+    for turn in range(3):
+        store.append("a", f"q{turn}", f"r{turn}")
+    assert store.history("a") == [("q1", "r1"), ("q2", "r2")]
+    # The history returned is a copy
+    store.history("a").append(("q3", "r3"))
+    assert len(store.history("a")) == 2
+
+def test_sessions_evict_least_recently_updated():
+    store = SessionStore(max_sessions=2)
+    store.append("a", "q", "r")
+    store.append("b", "q", "r")
+    store.append("a", "q2", "r2")
+    store.append("c", "q", "r")
+    assert len(store) == 2
+    assert store.history("b") == []
+    assert len(store.history("a")) == 2 and len(store.history("c")) == 1
+
+def focused(restaurant, turn=1):
+    conversation = Conversation()
+    conversation.turn = turn
+    conversation.focus = {"restaurant": (restaurant, turn)}
+    return conversation
+
+def test_sessions_expire_after_ttl(clock):
+    store = SessionStore(ttl=60)
+    store.append("a", "q", "r", focused("kfc"))
+    clock.now += 60
+    assert store.conversation("a").current() == {"restaurant": "kfc"}
+    clock.now += 1
+    assert store.history("a") == []
+    assert store.conversation("a").current() == {}
+    assert len(store) == 0
+
+def test_sessions_keep_conversation_until_cleared():
+    store = SessionStore()
+    store.append("a", "q", "r", focused("kfc"))
+    assert store.conversation("a").current() == {"restaurant": "kfc"}
+    store.append("a", "q2", "r2")
+    assert store.conversation("a").current() == {"restaurant": "kfc"}
+    store.append("a", "q3", "r3", focused("pizza hut", turn=2))
+    assert store.conversation("a").current() == {"restaurant": "pizza hut"}
+    store.clear("a")
+    assert store.history("a") == [] and store.conversation("a").current() == {}
+
+def test_sessions_hand_out_conversation_copies():
+    store = SessionStore()
+    store.append("a", "q", "r", focused("kfc"))
+    first, second = store.conversation("a"), store.conversation("a")
+    assert first is not second
+    # A turn answered on one copy changes nothing until it is stored back
+    first.add({"query": "what about pizza hut", "entities": {"restaurant": ("pizza hut", "pizza hut")}})
+    assert second.current() == {"restaurant": "kfc"}
+    assert store.conversation("a").current() == {"restaurant": "kfc"}
+    store.append("a", "what about pizza hut", "r2", first)
+    assert store.conversation("a").current() == {"restaurant": "pizza hut"}
+
+@pytest.fixture
+def service(monkeypatch):
+    """
+    A ChatService serving OLD_DOCUMENTS, then NEW_DOCUMENTS after the first reindex.
+
+    Contexts name the snapshot version they were built on. Generation answers with the
+    context, and blocks on service.gate for queries starting with "slow".
+    """
+    loads = iter([OLD_DOCUMENTS, NEW_DOCUMENTS, NEW_DOCUMENTS])
+    monkeypatch.setattr(api_server, "load_snapshot",
+                        lambda prebuilt=False: IndexSnapshot(next(loads), None, None, []))
+    monkeypatch.setattr(api_server, "get_query_embedder", lambda: None)
+    monkeypatch.setattr(api_server, "get_generator", lambda: None)
+    monkeypatch.setattr(api_server, "build_contexts",
+                        lambda items: [(f"context of {snapshot.version}", None) for snapshot, _ in items])
+    started, gate, generated = threading.Event(), threading.Event(), []
+
+    def query_llama(context, query, history):
+        generated.append(query)
+        if query.startswith("slow"):
+            started.set()
+            gate.wait(5)
+        history.append((query, f"{query} from {context}"))
+        return history[-1][1], history
+
+    monkeypatch.setattr(rag, "query_llama", query_llama)
+    service = ChatService(workers=4)
+    service.started, service.gate, service.generated = started, gate, generated
+    return service
+
+def test_reindex_swaps_snapshot_while_requests_finish_on_the_old_one(service):
+    async def scenario():
+        await service.start()
+        old = service.snapshot
+        assert await service.answer("a", "price of sweet lassi") == f"price of sweet lassi from context of {old.version}"
+
+        slow = asyncio.ensure_future(service.answer("b", "slow question"))
+        await asyncio.get_running_loop().run_in_executor(None, service.started.wait, 5)
+        new = await service.reindex()
+        assert service.snapshot is new and new is not old and new.version != old.version
+        # The reindex leaves the old snapshot's answers alone while requests still use it
+        assert old.answers.stats()["entries"] == 1
+
+        service.gate.set()
+        assert await slow == f"slow question from context of {old.version}"
+        assert old.answers.stats()["entries"] == 2
+        assert new.answers.stats()["entries"] == 0
+
+        # Served from the new documents, not from the old snapshot's cache
+        answer = await service.answer("c", "price of sweet lassi")
+        assert answer == f"price of sweet lassi from context of {new.version}"
+        assert service.generated.count("price of sweet lassi") == 2
+        assert service.sessions.history("b") == [("slow question", f"slow question from context of {old.version}")]
+        await service.close()
+
+    asyncio.run(scenario())
+
+def test_reindex_keeps_answers_when_documents_are_unchanged(service):
+    async def scenario():
+        await service.start()
+        await service.reindex()
+        first = service.snapshot
+        await service.answer("a", "price of sweet lassi")
+        second = await service.reindex()
+        assert second is not first and second.answers is first.answers
+        await service.answer("b", "price of sweet lassi")
+        assert service.generated.count("price of sweet lassi") == 1
+        assert second.answers.stats()["exact_hits"] == 1
+        await service.close()
+
+    asyncio.run(scenario())
+
+def test_snapshot_answers_structured_questions_from_its_own_menus(tmp_path, monkeypatch):
+    path = str(tmp_path / "menu.db")
+    conn = menu_store.connect(path)
+    with conn:
+        conn.execute("INSERT INTO restaurants VALUES ('patiala_lassi_menu.json', 'patiala lassi', '', '')")
+        conn.executemany("INSERT INTO items (source, restaurant, category, item, price, veg_nonveg) "
+                         "VALUES ('patiala_lassi_menu.json', 'patiala lassi', 'lassi', ?, ?, 'veg')",
+                         [("sweet lassi", 50), ("dryfruit lassi", 60)])
+    snapshot = IndexSnapshot(OLD_DOCUMENTS, None, None, [], menu_db=api_server.copy_menu_store(path))
+    # A reindex rewriting the store does not change what the served snapshot answers
+    with conn:
+        conn.execute("DELETE FROM items WHERE item = 'dryfruit lassi'")
+    conn.close()
+
+    monkeypatch.setattr(api_server, "get_query_embedder", lambda: None)
+    monkeypatch.setattr(api_server, "get_generator", lambda: type("Generator", (), {"count_tokens": len})())
+    monkeypatch.setattr(api_server, "embed_queries", lambda queries, embedder: np.zeros((len(queries), 8)))
+    [(context, _)] = api_server.build_contexts([(snapshot, "how many lassi items at patiala lassi")])
+    assert context == "There are 2 'lassi' items at patiala lassi."
+
+    copy = snapshot.menu_db
+    del snapshot
+    gc.collect()
+    assert not os.path.exists(copy)
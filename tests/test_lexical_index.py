@@ -0,0 +1,71 @@
+"""
+Lexical Index Tests
+
+Checks BM25 scores and rankings against values worked out by hand, search restricted to
+given documents, the save and load round trip, and reciprocal-rank fusion of rankings.
+"""
+
+import math
+import numpy as np
+import pytest
+from lexical_index import BM25Index, tokenize
+from rag import reciprocal_rank_fusion
+
+DOCUMENTS = ["sweet lassi", "mango lassi lassi", "cold coffee"]
+
+def bm25(tf, df, length, n_docs=3, avg_length=7 / 3, k1=1.2, b=0.75):
+    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+    return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+
+@pytest.fixture
+def index():
+    return BM25Index.build(DOCUMENTS)
+
+def test_tokenize_uses_cleaning_rules():
+    assert tokenize("Sweet  Lassi!") == ["sweet", "lassi"]
+
+def test_scores_match_hand_computed_bm25(index):
+    # "lassi" is in two of three documents; the longer one repeats it
+    assert bm25(1, 2, 2) == pytest.approx(0.49917, abs=1e-4)
+    assert bm25(2, 2, 3) == pytest.approx(0.59818, abs=1e-4)
+    np.testing.assert_allclose(index.scores("lassi"), [bm25(1, 2, 2), bm25(2, 2, 3), 0.0], rtol=1e-5)
+    # The rarer "sweet" outweighs the repeated "lassi"
+    np.testing.assert_allclose(index.scores("sweet lassi"),
+                               [bm25(1, 1, 2) + bm25(1, 2, 2), bm25(2, 2, 3), 0.0], rtol=1e-5)
+    # Repeated query terms count once
+    np.testing.assert_allclose(index.scores("lassi lassi"), index.scores("lassi"))
+
+def test_search_ranks_and_skips_unmatched_documents(index):
+    ids, scores = index.search("lassi")
+    assert ids.tolist() == [1, 0]
+    assert scores[0] > scores[1] > 0
+    assert index.search("sweet lassi")[0].tolist() == [0, 1]
+    assert index.search("lassi", k=1)[0].tolist() == [1]
+    assert index.search("biryani")[0].tolist() == []
+
+def test_search_restricted_to_ids(index):
+    assert index.search("lassi", ids=np.array([0, 2]))[0].tolist() == [0]
+    # "coffee" is in one document only, so it outweighs "lassi"
+    assert index.search("lassi coffee", ids=[1, 2])[0].tolist() == [2, 1]
+    assert index.search("coffee", ids=[0, 1])[0].tolist() == []
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(DOCUMENTS, k1=1.5, b=0.5)
+    path = tmp_path / "lexical.npz"
+    with open(path, "wb") as f:
+        index.save(f)
+    loaded = BM25Index.load(path)
+    assert (loaded.k1, loaded.b) == (1.5, 0.5)
+    assert len(loaded) == len(DOCUMENTS)
+    for query in ["lassi", "sweet lassi", "cold coffee", "biryani"]:
+        np.testing.assert_array_equal(loaded.scores(query), index.scores(query))
+
+def test_reciprocal_rank_fusion():
+    # 1: 1/61 + 1/62, 3: 1/63 + 1/61, 2: 1/62
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]]) == [1, 3, 2]
+    # With k = 0 the top ranks dominate: 1: 1 + 1/2, 3: 1/3 + 1, 2: 1/2
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=0) == [1, 3, 2]
+    assert reciprocal_rank_fusion([[4, 5], [6, 4]], k=0) == [4, 6, 5]
+    # Equal scores keep the order of first appearance
+    assert reciprocal_rank_fusion([[1, 2], [2, 1]]) == [1, 2]
+    assert reciprocal_rank_fusion([]) == []
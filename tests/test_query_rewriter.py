@@ -0,0 +1,94 @@
+"""
+Query Rewriter Tests
+
+Two-turn conversations over a small vocabulary, checking that pronouns, elliptical
+follow-ups and group references are resolved into standalone queries, and that entities
+leave focus when another restaurant is named or too many turns pass.
+"""
+
+import pytest
+from query_rewriter import Conversation, EntityVocabulary
+
+DOCUMENTS = [
+    "pizza hut is at civil lines roorkee.\npizza hut is a restaurant in Roorkee Locality.\n"
+    "their contact number is 911.\npizza hut serves Pizza and is open from 11 AM to 11 PM.\n",
+    "pizza hut offers choco lava cake in the category 'desserts'.\n"
+    "choco lava cake is warm chocolate cake. for price 109 and type: veg with spice level: normal.",
+    "pizza hut offers garlic bread in the category 'sides'.\n"
+    "garlic bread is bread with garlic butter. for price 99 and type: veg with spice level: normal.",
+    "kfc is at nehru nagar roorkee.\nkfc is a restaurant in Roorkee Locality.\n"
+    "their contact number is 912.\nkfc serves Chicken and is open from 11 AM to 11 PM.\n",
+    "kfc offers chocolate mousse in the category 'desserts'.\n"
+    "chocolate mousse is rich mousse. for price 89 and type: veg with spice level: normal.",
+]
+
+@pytest.fixture(scope="module")
+def vocabulary():
+    return EntityVocabulary(DOCUMENTS)
+
+def converse(vocabulary, *queries, **kwargs):
+    """
+    Ask the queries in one conversation and return the standalone query of each turn.
+    """
+    conversation = Conversation(**kwargs)
+    standalone = []
+    for query in queries:
+        rewrite = conversation.rewrite(query, vocabulary)
+        standalone.append(rewrite["query"])
+        conversation.add(rewrite)
+    return standalone
+
+def test_vocabulary_finds_restaurants_categories_and_items(vocabulary):
+    assert vocabulary.restaurants == {"pizza hut", "kfc"}
+    found = vocabulary.find("is the garlic bread at pizza hut veg")
+    assert found["restaurant"] == ("pizza hut", "pizza hut")
+    assert found["item"] == ("garlic bread", "garlic bread")
+    # Plural or singular forms of a category
+    assert vocabulary.find("any dessert at kfc")["category"] == ("desserts", "dessert")
+
+def test_first_turn_is_unchanged(vocabulary):
+    query = "What's the price range for pizza hut's dessert menu?"
+    rewrite = Conversation().rewrite(query, vocabulary)
+    assert rewrite["query"] == query and not rewrite["rewritten"]
+    assert rewrite["entities"]["restaurant"][0] == "pizza hut"
+
+def test_restaurant_attribute_of_it_refers_to_the_restaurant(vocabulary):
+    assert converse(vocabulary, "What's the price range for pizza hut's dessert menu?",
+                    "can you tell me the location of it")[1] == "can you tell me the location of pizza hut"
+
+def test_it_refers_to_the_item_in_focus(vocabulary):
+    assert converse(vocabulary, "how much is the garlic bread at pizza hut",
+                    "is it veg")[1] == "is garlic bread veg at pizza hut"
+
+def test_what_about_swaps_the_restaurant(vocabulary):
+    assert converse(vocabulary, "What's the price range for pizza hut's dessert menu?",
+                    "what about kfc?")[1] == "whats the price range for kfc dessert menu"
+
+def test_group_and_restaurant_references(vocabulary):
+    assert converse(vocabulary, "show me the desserts at kfc", "how much do those cost",
+                    "what are their timings")[1:] == ["how much do desserts cost at kfc", "what are kfc timings"]
+
+def test_naming_another_restaurant_moves_the_focus(vocabulary):
+    assert converse(vocabulary, "where is kfc", "where is pizza hut",
+                    "what is their contact number")[2] == "what is pizza hut contact number"
+    # The item of the previous restaurant is dropped with it
+    assert converse(vocabulary, "how much is the garlic bread at pizza hut", "where is kfc",
+                    "is it veg")[2] == "is kfc veg"
+
+def test_entities_leave_focus_after_max_turns(vocabulary):
+    standalone = converse(vocabulary, "how much is the garlic bread at pizza hut", "hello", "thanks",
+                          "is it veg", max_turns=2)
+    assert standalone[3] == "is it veg"
+
+def test_from_history_rebuilds_the_focus(vocabulary):
+    history = [("What's the price range for pizza hut's dessert menu?", "109 to 109")]
+    conversation = Conversation.from_history(history, vocabulary)
+    assert conversation.rewrite("where is it located", vocabulary)["query"] == "where is pizza hut located"
+
+def test_copy_is_independent(vocabulary):
+    conversation = Conversation()
+    conversation.add(conversation.rewrite("where is kfc", vocabulary))
+    copy = conversation.copy()
+    copy.add(copy.rewrite("where is pizza hut", vocabulary))
+    assert conversation.current() == {"restaurant": "kfc"}
+    assert copy.current() == {"restaurant": "pizza hut"}
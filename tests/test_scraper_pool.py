@@ -0,0 +1,137 @@
+"""
+Scraper Pool Tests
+
+Runs ScraperPool with the real scrape_zomato against the saved pages in the fixtures folder,
+served by scraper_runner.serve_fixtures. Browsers are replaced by a small driver that fetches
+pages over HTTP and answers the few Selenium calls load_page makes, so no Chrome is needed.
+"""
+
+import json
+import urllib.request
+import lxml.html
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("webdriver_manager")
+
+from pathlib import Path
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+from scraper_pool import ScraperPool
+from scraper_runner import serve_fixtures
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+class FixtureElement:
+    """
+    Stand-in for a Selenium WebElement wrapping an lxml element, which is always truthy.
+    """
+
+    def __init__(self, element):
+        self.element = element
+
+class FixtureDriver:
+    """
+    Stand-in for webdriver.Chrome serving the page source of static HTML pages.
+
+    Clicking an element removes it from the page, as clicking "Read More" does on Zomato.
+    """
+
+    def __init__(self, page_timeout):
+        self.page_timeout = page_timeout
+        self.root = None
+        self.visited = []
+        self.quit_called = False
+
+    def get(self, url):
+        with urllib.request.urlopen(url, timeout=self.page_timeout) as response:
+            self.root = lxml.html.fromstring(response.read())
+        self.visited.append(url)
+
+    def find_elements(self, by, value):
+        if self.root is None:
+            return []
+        return [FixtureElement(e) for e in self.root.xpath(f"//{value}" if by == By.TAG_NAME else value)]
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(value)
+        return found[0]
+
+    def execute_script(self, script, element):
+        element.element.drop_tree()
+
+    @property
+    def page_source(self):
+        return lxml.html.tostring(self.root, encoding="unicode")
+
+    def quit(self):
+        self.quit_called = True
+
+@pytest.fixture
+def fixture_server():
+    server, urls = serve_fixtures(str(FIXTURES))
+    yield urls
+    server.shutdown()
+
+@pytest.fixture
+def drivers():
+    created = []
+
+    def factory(page_timeout):
+        created.append(FixtureDriver(page_timeout))
+        return created[-1]
+
+    factory.created = created
+    return factory
+
+def load_saved(tmp_path, name):
+    return json.loads((tmp_path / "menu" / f"{name}_menu.json").read_text())
+
+def test_pool_scrapes_fixture_pages(tmp_path, monkeypatch, fixture_server, drivers):
+    monkeypatch.chdir(tmp_path)
+    report = ScraperPool(workers=2, job_timeout=5, driver_factory=drivers).run(fixture_server)
+
+    assert report["succeeded"] == 2 and report["failed"] == 0
+    assert [r["name"] for r in report["results"]] == ["kfc", "patiala_lassi"]
+
+    lassi = load_saved(tmp_path, "patiala_lassi")
+    assert lassi["restaurant"] == {
+        "name": "Patiala Lassi",
+        "location": "Shop 01, Gandhi Vatika, Civil Lines, Roorkee Locality, Roorkee",
+        "contact": "+918650305000",
+    }
+    assert [c["category"] for c in lassi["menu"]] == ["Lassi", "Other Specialty"]
+    assert lassi["menu"][0]["items"][1] == {
+        "name": "Dryfruit Lassi",
+        "price": "₹60",
+        "description": "A power house of vital nutrients and delicious dry fruits.",
+        "veg_nonveg": "Veg",
+        "spice_level": "Normal",
+    }
+    assert lassi["menu"][1]["items"][0]["description"] == ""
+
+    kfc = load_saved(tmp_path, "kfc")
+    items = kfc["menu"][0]["items"]
+    # The nameless item is skipped
+    assert [item["name"] for item in items] == ["Classic Chicken Roll", "Veg Zinger Roll"]
+    assert [item["veg_nonveg"] for item in items] == ["Non-Veg", "Veg"]
+    assert [item["spice_level"] for item in items] == ["Spicy", "Normal"]
+
+    assert all(driver.quit_called for driver in drivers.created)
+
+def test_pool_reuses_browser_and_replaces_it_after_failure(tmp_path, monkeypatch, fixture_server, drivers):
+    monkeypatch.chdir(tmp_path)
+    urls = {"unreachable": "http://127.0.0.1:9/unreachable.html", **fixture_server}
+    report = ScraperPool(workers=1, job_timeout=5, driver_factory=drivers).run(urls)
+
+    assert report["succeeded"] == 2 and report["failed"] == 1
+    failed = report["results"][0]
+    assert failed["name"] == "unreachable" and failed["status"] == "failed" and failed["error"]
+    assert not (tmp_path / "menu" / "unreachable_menu.json").exists()
+
+    # The failed browser is discarded, its replacement scrapes both remaining pages
+    assert len(drivers.created) == 2
+    assert drivers.created[0].quit_called
+    assert drivers.created[1].visited == list(fixture_server.values())
@@ -0,0 +1,82 @@
+"""
+Streaming Ingestion Tests
+
+Interrupts streaming ingestion in the middle of the second restaurant, resumes it, and
+checks that completed restaurants are not ingested again and that the finalized index
+store matches the one update_index builds from the same menus.
+"""
+
+import csv
+import shutil
+import numpy as np
+import pytest
+import rag
+import streaming_ingest
+from index_store import load_records, load_index
+from conftest import write_menu
+
+class Interrupted(Exception):
+    pass
+
+def rename_kfc(data):
+    data["restaurant"]["name"] = "Roll Corner"
+
+def read_database(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(map(tuple, csv.reader(f)))
+
+@pytest.fixture
+def menus(tmp_path, fake_embedder, monkeypatch):
+    monkeypatch.setattr(streaming_ingest, "get_embedder", lambda model_name=rag.EMBEDDING_MODEL: fake_embedder)
+    folder = tmp_path / "streamed"
+    write_menu(folder / "menu", "kfc")
+    write_menu(folder / "menu", "kfc", rename_kfc, source="roll_corner")
+    write_menu(folder / "menu", "patiala_lassi")
+    monkeypatch.chdir(folder)
+    return folder
+
+def test_resume_after_interruption_matches_update_index(tmp_path, monkeypatch, menus, fake_embedder):
+    ingest_file = streaming_ingest.ingest_file
+    started = []
+
+    def interrupted_ingest_file(file, summary, store, *args, **kwargs):
+        started.append(file.name)
+        if len(started) == 2:
+            # Part of the restaurant is written before the crash
+            store.append(["partial document"], file.name, [{}], np.ones((1, fake_embedder.dimension)))
+            raise Interrupted()
+        return ingest_file(file, summary, store, *args, **kwargs)
+
+    monkeypatch.setattr(streaming_ingest, "ingest_file", interrupted_ingest_file)
+    with pytest.raises(Interrupted):
+        streaming_ingest.ingest_menus("menu", chunk_size=2)
+    checkpoint = streaming_ingest.StagingStore().open(rag.EMBEDDING_MODEL, fake_embedder.dimension)
+    assert list(checkpoint["files"]) == started[:1]
+
+    monkeypatch.setattr(streaming_ingest, "ingest_file", ingest_file)
+    fake_embedder.encoded.clear()
+    store = streaming_ingest.ingest_menus("menu", chunk_size=2)
+    # The completed restaurant is skipped, and the partial writes are discarded
+    completed = started[0].replace("_menu.json", "").replace("_", " ")
+    assert fake_embedder.encoded and not any(text.startswith(completed) for text in fake_embedder.encoded)
+    scratch = menus / "scratch_store"
+    n_documents = streaming_ingest.finalize(store, "menu", store_dir=str(scratch))
+    assert not (menus / "database.csv").exists()
+
+    rebuilt = tmp_path / "rebuilt"
+    shutil.copytree(menus / "menu", rebuilt / "menu")
+    monkeypatch.chdir(rebuilt)
+    documents, index = rag.update_index("menu")
+
+    streamed_documents, sources, files, metadata = load_records(str(scratch))
+    assert n_documents == len(streamed_documents)
+    assert "partial document" not in streamed_documents
+    assert streamed_documents == documents
+    assert (sources, files, metadata) == load_records()[1:]
+    streamed_index, streamed_embeddings = load_index(streamed_documents, rag.EMBEDDING_MODEL, str(scratch),
+                                                     index_config=rag.index_config())
+    embeddings = load_index(documents, rag.EMBEDDING_MODEL, index_config=rag.index_config())[1]
+    np.testing.assert_array_equal(streamed_embeddings, embeddings)
+    queries = rag.prepare_vectors(fake_embedder.encode(["sweet lassi", "chicken roll"]), rag.INDEX_METRIC)
+    np.testing.assert_array_equal(streamed_index.search(queries, 5)[1], index.search(queries, 5)[1])
+    assert read_database(scratch / "database.csv") == read_database(rebuilt / "database.csv")
@@ -0,0 +1,122 @@
+"""
+Summary Cache Tests
+
+Covers expiry and invalidation of cached restaurant summaries, and how
+data_cleaning.generate_restaurant_summary uses fresh, expired and missing entries.
+"""
+
+import pytest
+import summary_cache
+from summary_cache import SummaryCache, make_key, PROMPT_VERSION
+from data_cleaning import generate_restaurant_summary
+
+SUMMARY = {"main_information": "Lassi shop", "cuisines": "Beverages", "operational_hours": "9 AM to 10 PM"}
+
+class Clock:
+    """
+    Replacement for time.time that only moves when advanced.
+    """
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class FakeModel:
+    """
+    Stand-in for the Gemini model answering every prompt with the same summary.
+    """
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": "Main Information: Fresh summary\nCuisines: Beverages\n"
+                                             "Operational Hours: 8 AM to 11 PM"})()
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(summary_cache.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def cache(clock):
+    cache = SummaryCache(":memory:", ttl=60)
+    yield cache
+    cache.close()
+
+def test_key_is_normalized():
+    assert make_key("Patiala  Lassi!", " Civil Lines, Roorkee ") == make_key("patiala lassi", "civil lines roorkee")
+    assert make_key("Patiala Lassi", "Roorkee", "2") != make_key("Patiala Lassi", "Roorkee", "1")
+
+def test_entry_expires_after_ttl(cache, clock):
+    cache.set("Patiala Lassi", "Roorkee", SUMMARY)
+    clock.now += 60
+    assert cache.get("PATIALA LASSI", "roorkee") == SUMMARY
+    clock.now += 1
+    assert cache.get("Patiala Lassi", "Roorkee") is None
+    # Expired entries are kept for offline use and failed generations
+    assert cache.get_any("Patiala Lassi", "Roorkee") == SUMMARY
+
+def test_no_ttl_never_expires(clock):
+    cache = SummaryCache(":memory:", ttl=None)
+    cache.set("Patiala Lassi", "Roorkee", SUMMARY)
+    clock.now += 10 ** 9
+    assert cache.get("Patiala Lassi", "Roorkee") == SUMMARY
+    cache.close()
+
+def test_prompt_version_change_misses(cache):
+    cache.set("Patiala Lassi", "Roorkee", SUMMARY, prompt_version=PROMPT_VERSION)
+    assert cache.get("Patiala Lassi", "Roorkee", prompt_version=PROMPT_VERSION + "-next") is None
+    assert cache.get_any("Patiala Lassi", "Roorkee", prompt_version=PROMPT_VERSION + "-next") is None
+
+def test_invalidate(cache):
+    cache.set("Patiala Lassi", "Civil Lines", SUMMARY)
+    cache.set("Patiala Lassi", "Nehru Nagar", SUMMARY)
+    cache.set("Patiala Lassi Express", "Civil Lines", SUMMARY)
+    cache.set("KFC", "Nehru Nagar", SUMMARY)
+
+    cache.invalidate("patiala lassi", "civil lines")
+    assert cache.get_any("Patiala Lassi", "Civil Lines") is None
+    assert cache.get_any("Patiala Lassi", "Nehru Nagar") == SUMMARY
+
+    # A restaurant's entries go, but not those of a restaurant whose name starts the same
+    cache.invalidate("Patiala Lassi")
+    assert cache.get_any("Patiala Lassi", "Nehru Nagar") is None
+    assert cache.get_any("Patiala Lassi Express", "Civil Lines") == SUMMARY
+
+    cache.invalidate()
+    assert cache.get_any("Patiala Lassi Express", "Civil Lines") is None
+    assert cache.get_any("KFC", "Nehru Nagar") is None
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "summaries.db")
+    cache = SummaryCache(path)
+    cache.set("Patiala Lassi", "Roorkee", SUMMARY)
+    cache.close()
+    cache = SummaryCache(path)
+    assert cache.get("Patiala Lassi", "Roorkee") == SUMMARY
+    cache.close()
+
+def test_generation_uses_fresh_entries_and_regenerates_expired_ones(cache, clock):
+    model = FakeModel()
+    cache.set("patiala lassi", "roorkee", SUMMARY)
+    assert generate_restaurant_summary("patiala lassi", "roorkee", model=model, cache=cache, offline=False) == SUMMARY
+    assert model.prompts == []
+
+    clock.now += 61
+    summary = generate_restaurant_summary("patiala lassi", "roorkee", model=model, cache=cache, offline=False)
+    assert summary["main_information"] == "Fresh summary"
+    assert len(model.prompts) == 1
+    assert cache.get("patiala lassi", "roorkee") == summary
+
+def test_offline_serves_expired_entries_without_generating(cache, clock):
+    model = FakeModel()
+    cache.set("patiala lassi", "roorkee", SUMMARY)
+    clock.now += 61
+    assert generate_restaurant_summary("patiala lassi", "roorkee", model=model, cache=cache, offline=True) == SUMMARY
+    assert generate_restaurant_summary("kfc", "roorkee", model=model, cache=cache, offline=True)["main_information"]
+    assert model.prompts == []
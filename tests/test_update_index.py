@@ -0,0 +1,77 @@
+"""
+Incremental Index Update Tests
+
+Builds the index from two fixture menus and a third, renamed copy of one of them, then
+changes one menu and deletes another, and checks that update_index removes, adds and
+renumbers vectors so the result matches a full rebuild from the final menus.
+"""
+
+import csv
+import shutil
+import faiss
+import numpy as np
+import rag
+from conftest import write_menu
+
+QUERIES = ["sweet lassi price", "dryfruit lassi", "mango shake", "chicken roll", "patiala lassi location"]
+
+def edit_lassi(data):
+    items = data["menu"][0]["items"]
+    items[0]["price"] = "₹55"
+    items.append({"name": "Mango Shake", "price": "₹90", "description": "Fresh mango blended with milk.",
+                  "veg_nonveg": "Veg", "spice_level": "Normal"})
+
+def rename_kfc(data):
+    data["restaurant"]["name"] = "Roll Corner"
+
+def read_database(folder):
+    with open(folder / "database.csv", newline="", encoding="utf-8") as f:
+        return sorted(map(tuple, csv.reader(f)))
+
+def search(index, embedder, documents, k=5):
+    vectors = rag.prepare_vectors(embedder.encode(QUERIES), rag.INDEX_METRIC)
+    distances, ids = index.search(vectors, k)
+    return [[documents[i] for i in row if i >= 0] for row in ids], distances
+
+def test_update_matches_full_rebuild(tmp_path, monkeypatch, fake_embedder):
+    incremental = tmp_path / "incremental"
+    write_menu(incremental / "menu", "kfc")
+    write_menu(incremental / "menu", "kfc", rename_kfc, source="roll_corner")
+    write_menu(incremental / "menu", "patiala_lassi")
+    monkeypatch.chdir(incremental)
+    documents, index = rag.update_index("menu")
+    assert list(dict.fromkeys(document.split(" ")[0] for document in documents)) == ["kfc", "patiala", "roll"]
+
+    write_menu(incremental / "menu", "patiala_lassi", edit_lassi)
+    (incremental / "menu" / "kfc_menu.json").unlink()
+    fake_embedder.encoded.clear()
+    documents, index = rag.update_index("menu")
+    # Only the changed menu is embedded again; the unchanged one moves up into the deleted one's place
+    assert fake_embedder.encoded and all(text.startswith("patiala lassi") for text in fake_embedder.encoded)
+    assert documents[0].startswith("roll corner")
+    assert isinstance(index, faiss.IndexIDMap2)
+    assert faiss.vector_to_array(index.id_map).tolist() == list(range(len(documents)))
+
+    full = tmp_path / "full"
+    shutil.copytree(incremental / "menu", full / "menu")
+    monkeypatch.chdir(full)
+    rebuilt_documents, rebuilt_index = rag.update_index("menu")
+
+    # Changed menus are appended after the kept ones, so only the order may differ
+    assert sorted(documents) == sorted(rebuilt_documents)
+    assert not any(document.startswith("kfc") for document in documents)
+    assert any("mango shake" in document for document in documents)
+    assert index.ntotal == rebuilt_index.ntotal == len(documents)
+    results, distances = search(index, fake_embedder, documents)
+    rebuilt_results, rebuilt_distances = search(rebuilt_index, fake_embedder, rebuilt_documents)
+    assert results == rebuilt_results
+    np.testing.assert_allclose(distances, rebuilt_distances, rtol=1e-5)
+    assert read_database(incremental) == read_database(full)
+
+def test_unchanged_menus_embed_nothing(tmp_path, monkeypatch, fake_embedder):
+    write_menu(tmp_path / "menu", "kfc")
+    monkeypatch.chdir(tmp_path)
+    documents, _ = rag.update_index("menu")
+    fake_embedder.encoded.clear()
+    assert rag.update_index("menu")[0] == documents
+    assert fake_embedder.encoded == []